@@ -0,0 +1,319 @@
+"""
+Adachi.py
+ This module calculates the dielectric function and complex refractive index
+ of III-V semiconductors and their alloys using the model dielectric function
+ (MDF) of Adachi. The parameter sets are those of the scripts in
+ scripts/Adachi 1989 - *.py, scripts/Adachi_GaSb.py,
+ scripts/Adachi 1990 - AlSb.py and scripts/Adachi 1993 - CdTe.py.
+
+ Alloy parameters are interpolated piecewise-linearly in composition between
+ the tabulated anchor compositions, so any number of compositions is
+ evaluated as one (ncompositions x nlambda) array expression. Results are
+ cached per (material, compositions, wavelength grid).
+
+ Below the fundamental gap (the lower of E0 and the indirect gap Eg) the
+ imaginary part of the dielectric function is set to zero: the broadened
+ E1/E2 terms of the MDF otherwise leave an unphysical sub-gap absorption
+ tail across the infrared.
+
+    Example:
+
+    from Adachi import Adachi
+    import numpy as np
+    lamda = np.linspace(2E-6, 12E-6, 100)   # 2 um to 12 um
+    algaas = Adachi(lamda, 'AlGaAs', composition=0.3)
+    print algaas.n
+    print algaas.k
+
+%   INPUT PARAMETERS:
+%
+%       lambda      ==> wavelength (meters) of light excitation on material. Numpy array
+%
+%       material    ==> a binary or quaternary in ADACHI_PARAMS ('GaAs', 'GaSb', 'InAs',
+%                       'InSb', 'InP', 'GaP', 'InGaAsP'), ADACHI_1990_PARAMS ('AlSb'),
+%                       ADACHI_1993_PARAMS ('CdTe') or an alloy in ADACHI_ALLOYS
+%                       ('AlGaAs', 'InGaAs', 'InAsSb', 'InGaSb')
+%
+%       composition ==> alloy fraction x as defined in ADACHI_ALLOYS, within the
+%                       tabulated anchors (AlGaAs: 0-0.7); outside them a ValueError
+%                       is raised.
+%
+%       Reference:
+%       S. Adachi, Optical dispersion relations for GaP, GaAs, GaSb, InP, InAs,
+%       InSb, AlxGa1-xAs, and In1-xGaxAsyP1-y, J. Appl. Phys. 66, 6030 (1989)
+%       S. Adachi, Optical properties of AlSb, J. Appl. Phys. 67, 6427 (1990)
+%       S. Adachi, T. Kimura and N. Suzuki, Optical properties of CdTe,
+%       J. Appl. Phys. 74, 3435 (1993)
+
+"""
+
+import numpy as np
+
+from dispersion_cache import DispersionCache, grid_key
+
+# hc in eV*m
+HC = 1.23984198e-06
+
+# Order of the Adachi 1989 parameters in every parameter row
+PARAM_NAMES = ('E0', 'Delta0', 'E1', 'Delta1', 'E2', 'Eg', 'A', 'B1', 'B11',
+               'B2', 'B21', 'Gamma', 'C', 'gamma', 'D', 'eps_inf', 'E2_onset')
+
+# Adachi 1989 parameters (energies in eV). E2_onset suppresses the E2
+# oscillator below that energy (used for GaP only, as in the script)
+ADACHI_PARAMS = {
+    #              E0    Δ0    E1    Δ1    E2    Eg    A      B1    B11    B2    B21   Γ     C     γ      D     εinf  E2on
+    'GaAs':       [1.42, 0.35, 2.90, 0.23, 4.70, 1.73, 3.45,  6.37, 13.08, 0.00, 0.00, 0.10, 2.39, 0.146, 24.2,  1.6, 0.0],
+    'GaP':        [2.74, 0.10, 3.70, 0.00, 5.00, 2.26, 13.76, 6.35, 9.49,  0.00, 0.00, 0.06, 2.08, 0.132, 4.6,   0.0, 3.4],
+    'GaSb':       [0.72, 0.74, 2.05, 0.45, 4.00, 0.76, 0.71,  6.68, 14.29, 0.00, 0.00, 0.09, 5.69, 0.290, 7.4,   1.0, 0.0],
+    'InP':        [1.35, 0.10, 3.10, 0.15, 4.70, 2.05, 6.57,  4.93, 10.43, 0.00, 0.00, 0.10, 1.49, 0.094, 60.4,  1.6, 0.0],
+    'InAs':       [0.36, 0.40, 2.50, 0.28, 4.45, 1.07, 0.61,  6.59, 13.76, 0.00, 0.00, 0.21, 1.78, 0.108, 20.8,  2.8, 0.0],
+    'InSb':       [0.18, 0.81, 1.80, 0.50, 3.90, 0.93, 0.19,  6.37, 12.26, 0.00, 0.00, 0.16, 5.37, 0.318, 19.5,  3.1, 0.0],
+    'Al0.315Ga0.685As':
+                  [1.83, 0.32, 3.13, 0.00, 4.70, 1.92, 8.80,  6.05, 11.05, 0.00, 0.00, 0.11, 2.30, 0.135, 16.1,  0.6, 0.0],
+    'Al0.700Ga0.300As':
+                  [2.42, 0.31, 3.43, 0.00, 4.70, 2.03, 23.20, 5.41, 9.55,  0.00, 0.00, 0.12, 1.76, 0.103, 8.1,  -0.3, 0.0],
+    'In0.52Ga0.48As':
+                  [0.75, 0.29, 2.57, 0.26, 4.41, 1.20, 1.20,  3.84, 7.57,  1.48, 2.96, 0.14, 2.90, 0.225, 20.7,  2.8, 0.0],
+    'InGaAsP':    [1.18, 0.16, 2.96, 0.18, 4.65, 1.83, 4.39,  4.30, 8.76,  0.53, 1.06, 0.12, 1.98, 0.145, 39.0,  2.1, 0.0],
+}
+
+# Alloys as (composition x, parameter set) anchors, sorted in x
+ADACHI_ALLOYS = {
+    'AlGaAs': [(0.0, 'GaAs'), (0.315, 'Al0.315Ga0.685As'), (0.700, 'Al0.700Ga0.300As')],  # Al(x)Ga(1-x)As
+    'InGaAs': [(0.0, 'InAs'), (0.48, 'In0.52Ga0.48As'), (1.0, 'GaAs')],                   # In(1-x)Ga(x)As
+    'InAsSb': [(0.0, 'InSb'), (1.0, 'InAs')],                                             # InAs(x)Sb(1-x)
+    'InGaSb': [(0.0, 'InSb'), (1.0, 'GaSb')],                                             # In(1-x)Ga(x)Sb
+}
+
+# Adachi 1990 AlSb parameters (broadened MDF, energies in eV)
+ADACHI_1990_PARAMS = {
+    'AlSb': {'E0': 2.27, 'Delta0': 0.63, 'A': 29.0, 'Gamma0': 0.015,
+             'E1': 2.84, 'Delta1': 0.39, 'B1': 1.45, 'B2': 1.17,
+             'B1x': 1.98, 'B2x': 1.60, 'Gamma1': 0.14,
+             'C': [1.83, 0.06, 1.23], 'Ec': [3.70, 5.25, 4.05], 'gamma': [0.18, 0.06, 0.09],
+             'Eg': 1.61, 'D': 1.00, 'Gammag': 0.040},
+}
+
+# Adachi 1993 CdTe parameters (MDF with excitons, energies in eV)
+ADACHI_1993_PARAMS = {
+    'CdTe': {'E0': 1.58, 'Delta0': 0.97, 'A': 10.0, 'A0x': 0.0034, 'G0': 0.0065, 'Gamma0': 0.01,
+             'E1': 3.55, 'Delta1': 0.58, 'B1': 2.0, 'B1s': 0.6, 'B1x': 1.56, 'B1sx': 0.65,
+             'G1': 0.24, 'GDelta': 0.24, 'Gamma1': 0.21,
+             'E2': 5.13, 'C': 1.00, 'gamma': 0.16, 'eps_inf': 1.27},
+}
+
+_ANCHORS = {name: (np.array([a[0] for a in anchors]),
+                   np.array([ADACHI_PARAMS[a[1]] for a in anchors], dtype=float))
+            for name, anchors in ADACHI_ALLOYS.items()}
+_ANCHORS.update({name: (np.array([0.0]), np.array([p], dtype=float))
+                 for name, p in ADACHI_PARAMS.items()})
+
+_cache = DispersionCache(maxsize=128)
+
+
+class Adachi():
+    def __init__(self, lamda, material, composition=0.0):
+        """
+        Initialize the material model
+
+        Parameters:
+        lamda : array_like
+            Wavelength(s) in meters
+        material : str
+            Material or alloy name
+        composition : float
+            Alloy fraction x (ignored for binaries)
+        """
+        self.lamda = np.asarray(lamda, dtype=float)
+        self.material = material
+        self.composition = composition
+
+        self.refractive_index = refractive_index(self.lamda, material, composition)[0]
+        self.n = self.refractive_index.real
+        self.k = self.refractive_index.imag
+        self.epsilon = self.refractive_index**2
+        self.epsilon_real = self.epsilon.real
+        self.epsilon_imag = self.epsilon.imag
+
+
+def refractive_index(lamda, material, compositions):
+    """
+    Complex refractive index n + ik for one or more compositions
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    material : str
+        Material or alloy name
+    compositions : float or array_like
+        Alloy fraction(s) x
+
+    Returns:
+    (ncompositions, nlambda) complex array, shared and read-only
+    """
+    lamda = np.asarray(lamda, dtype=float)
+    compositions = np.atleast_1d(np.asarray(compositions, dtype=float))
+    key = (material, tuple(compositions), grid_key(lamda))
+    return _cache.get(key, lambda: np.sqrt(epsilon(lamda, material, compositions)))
+
+
+def epsilon(lamda, material, compositions):
+    """Dielectric function as an (ncompositions, nlambda) array"""
+    E = (HC / np.asarray(lamda, dtype=float))[np.newaxis, :]
+    compositions = np.atleast_1d(np.asarray(compositions, dtype=float))
+    if material in ADACHI_1990_PARAMS or material in ADACHI_1993_PARAMS:
+        if material in ADACHI_1990_PARAMS:
+            p = ADACHI_1990_PARAMS[material]
+            eps = _epsilon_1990(E[0], p)
+            gap = min(p['E0'], p['Eg'])
+        else:
+            p = ADACHI_1993_PARAMS[material]
+            eps = _epsilon_1993(E[0], p)
+            gap = p['E0']
+        eps = np.broadcast_to(_transparent_below(eps, E[0], gap), (compositions.size, E.size))
+        return eps.copy()
+    p = interpolate_params(material, compositions)
+    eps = _epsilon_1989(E, {name: p[:, i, np.newaxis] for i, name in enumerate(PARAM_NAMES)})
+    gap = np.minimum(p[:, PARAM_NAMES.index('E0')], p[:, PARAM_NAMES.index('Eg')])
+    return _transparent_below(eps, E, gap[:, np.newaxis])
+
+
+def _transparent_below(eps, E, gap):
+    """Zero the imaginary part of eps at photon energies E below the gap"""
+    return np.where(E < gap, eps.real + 0j, eps)
+
+
+def interpolate_params(material, compositions):
+    """
+    Interpolate the Adachi 1989 parameters in composition
+
+    Returns:
+    (ncompositions, nparams) array in PARAM_NAMES order
+    """
+    if material not in _ANCHORS:
+        raise ValueError(f"No Adachi parameters for material '{material}'. "
+                         f"Available: {available_materials()}")
+    x_anchor, p_anchor = _ANCHORS[material]
+    compositions = np.atleast_1d(np.asarray(compositions, dtype=float))
+    if x_anchor.size == 1:
+        return np.repeat(p_anchor, compositions.size, axis=0)
+    if np.any((compositions < x_anchor[0]) | (compositions > x_anchor[-1])):
+        raise ValueError(f"Compositions {compositions.tolist()} of '{material}' are outside the "
+                         f"tabulated range {composition_range(material)}")
+    x = compositions
+    i = np.clip(np.searchsorted(x_anchor, x, side='right') - 1, 0, x_anchor.size - 2)
+    t = ((x - x_anchor[i]) / (x_anchor[i + 1] - x_anchor[i]))[:, np.newaxis]
+    return p_anchor[i] + t * (p_anchor[i + 1] - p_anchor[i])
+
+
+def available_materials():
+    return list(ADACHI_PARAMS) + list(ADACHI_ALLOYS) + list(ADACHI_1990_PARAMS) + list(ADACHI_1993_PARAMS)
+
+
+def composition_range(material):
+    """(x_min, x_max) of the tabulated anchors of an alloy, (0.0, 0.0) for a compound"""
+    if material in ADACHI_ALLOYS:
+        return (ADACHI_ALLOYS[material][0][0], ADACHI_ALLOYS[material][-1][0])
+    return (0.0, 0.0)
+
+
+def _epsilon_1989(E, p):
+    """Adachi 1989 MDF. E is a row vector, p holds (ncomp, 1) columns"""
+    E0, D0, E1, D1 = p['E0'], p['Delta0'], p['E1'], p['Delta1']
+
+    # E0 and E0+Delta0 transitions
+    x0 = E / E0
+    xs0 = E / (E0 + D0)
+    f0 = x0**-2 * (2 - np.sqrt(1 + x0) - np.sqrt(np.maximum(1 - x0, 0)))
+    fs0 = xs0**-2 * (2 - np.sqrt(1 + xs0) - np.sqrt(np.maximum(1 - xs0, 0)))
+    eps1 = p['A'] * E0**-1.5 * (f0 + 0.5 * (E0 / (E0 + D0))**1.5 * fs0)
+    eps2 = p['A'] / E**2 * (np.sqrt(np.maximum(E - E0, 0)) +
+                            0.5 * np.sqrt(np.maximum(E - E0 - D0, 0)))
+
+    # E1 and E1+Delta1 transitions
+    x1 = E / E1
+    xs1 = E / (E1 + D1)
+    e2B = (np.pi * x1**-2 * (p['B1'] - p['B11'] * np.sqrt(np.maximum(E1 - E, 0))) +
+           np.pi * xs1**-2 * (p['B2'] - p['B21'] * np.sqrt(np.maximum(E1 + D1 - E, 0))))
+    eps2 = eps2 + np.maximum(e2B, 0)
+    x1 = (E + 1j * p['Gamma']) / E1
+    xs1 = (E + 1j * p['Gamma']) / (E1 + D1)
+    eps1 = eps1 + (-p['B1'] * x1**-2 * np.log(1 - x1**2) -
+                   p['B2'] * xs1**-2 * np.log(1 - xs1**2)).real
+
+    # E2 damped harmonic oscillator
+    x2 = E / p['E2']
+    denom = (1 - x2**2)**2 + (x2 * p['gamma'])**2
+    eps1 = eps1 + p['C'] * (1 - x2**2) / denom
+    eps2 = eps2 + p['C'] * x2 * p['gamma'] / denom * (E >= p['E2_onset'])
+
+    # Indirect gap
+    eps2 = eps2 + p['D'] / E**2 * (E - p['Eg'])**2 * ((E > p['Eg']) & (E < E1))
+
+    return eps1 + p['eps_inf'] + 1j * eps2
+
+
+def _epsilon_1990(E, p):
+    """Adachi 1990 broadened MDF (AlSb)"""
+    E0, D0, E1, D1 = p['E0'], p['Delta0'], p['E1'], p['Delta1']
+
+    x0 = (E + 1j * p['Gamma0']) / E0
+    xs0 = (E + 1j * p['Gamma0']) / (E0 + D0)
+    f0 = x0**-2 * (2 - (1 + x0)**0.5 - (1 - x0)**0.5)
+    fs0 = xs0**-2 * (2 - (1 + xs0)**0.5 - (1 - xs0)**0.5)
+    eps = p['A'] * E0**-1.5 * (f0 + 0.5 * (E0 / (E0 + D0))**1.5 * fs0)
+
+    x1 = (E + 1j * p['Gamma1']) / E1
+    xs1 = (E + 1j * p['Gamma1']) / (E1 + D1)
+    eps = eps - p['B1'] * x1**-2 * np.log(1 - x1**2) - p['B2'] * xs1**-2 * np.log(1 - xs1**2)
+    eps = eps + p['B1x'] / (E1 - E - 1j * p['Gamma1']) + p['B2x'] / (E1 + D1 - E - 1j * p['Gamma1'])
+
+    x2 = E[np.newaxis, :] / np.asarray(p['Ec'])[:, np.newaxis]
+    C = np.asarray(p['C'])[:, np.newaxis]
+    g = np.asarray(p['gamma'])[:, np.newaxis]
+    eps = eps + (C / ((1 - x2**2) - 1j * x2 * g)).sum(axis=0)
+
+    Eg, Ec = p['Eg'], E1
+    Eb = E + 1j * p['Gammag']
+    eps = eps + 2 * p['D'] / np.pi * (-Eg**2 / Eb**2 * np.log(Ec / Eg)
+                                      + 0.5 * (1 + Eg / Eb)**2 * np.log((Eb + Ec) / (Eb + Eg))
+                                      + 0.5 * (1 - Eg / Eb)**2 * np.log((Eb - Ec) / (Eb - Eg)))
+    return eps
+
+
+def cache_stats():
+    """Return hit/miss counters of the Adachi result cache"""
+    return _cache.stats()
+
+
+if __name__ == '__main__':
+    wavelengths = np.linspace(2e-6, 12e-6, 300)
+    N = refractive_index(wavelengths, 'AlGaAs', [0.0, 0.315, 0.7])
+    print(f"n at {wavelengths[0]*1e6:.1f} um for x = 0, 0.315, 0.7: {N[:, 0].real}")
+
+
+def _epsilon_1993(E, p):
+    """Adachi 1993 MDF with E0 and E1 excitons (CdTe)"""
+    E0, D0, E1, D1 = p['E0'], p['Delta0'], p['E1'], p['Delta1']
+
+    x0 = (E + 1j * p['Gamma0']) / E0
+    xs0 = (E + 1j * p['Gamma0']) / (E0 + D0)
+    f0 = x0**-2 * (2 - (1 + x0)**0.5 - (1 - x0)**0.5)
+    fs0 = xs0**-2 * (2 - (1 + xs0)**0.5 - (1 - xs0)**0.5)
+    eps = p['A'] * E0**-1.5 * (f0 + 0.5 * (E0 / (E0 + D0))**1.5 * fs0)
+
+    # E0 exciton series, summed over n = 1..999 as in the script
+    n = np.arange(1, 1000)[:, np.newaxis]
+    Eb = p['G0'] / n**2
+    Ec = E[np.newaxis, :] + 1j * p['Gamma0']
+    eps = eps + (p['A0x'] / n**3 * (1 / (E0 - Eb - Ec) + 0.5 / (E0 + D0 - Eb - Ec))).sum(axis=0)
+
+    x1 = (E + 1j * p['Gamma1']) / E1
+    xs1 = (E + 1j * p['Gamma1']) / (E1 + D1)
+    eps = eps - p['B1'] * x1**-2 * np.log(1 - x1**2) - p['B1s'] * xs1**-2 * np.log(1 - xs1**2)
+    eps = eps + (p['B1x'] / (E1 - p['G1'] - E - 1j * p['Gamma1']) +
+                 p['B1sx'] / (E1 + D1 - p['GDelta'] - E - 1j * p['Gamma1']))
+
+    x2 = E / p['E2']
+    eps = eps + p['C'] / ((1 - x2**2) - 1j * x2 * p['gamma'])
+    return eps + p['eps_inf']
@@ -0,0 +1,271 @@
+"""
+Air.py
+ This module calculates the refractive index of air as a function of wavelength,
+ temperature, pressure and humidity, for use as the incident (ambient) medium.
+ It collects the models of scripts/Mathar 2007 - Air *.py, scripts/Ciddor 1996 - air.py
+ and scripts/Birch 1994 - air.py.
+
+ Mathar 2007 is a 6-term polynomial in wavenumber per IR band. The
+ temperature/pressure/humidity dependent coefficients of every band are
+ computed once per condition, and a wavelength grid is then evaluated as one
+ (nlambda x 6) array product with each point assigned to its band
+ automatically. Wavelengths below the first Mathar band use Ciddor 1996;
+ wavelengths in the gaps between bands use the nearest band.
+
+    Example:
+
+    from Air import Air
+    import numpy as np
+    lamda = np.linspace(2E-6, 12E-6, 100)   # 2 um to 12 um
+    lab = Air(lamda, T=296.15, p=101325, H=40)
+    purge = Air(lamda, T=296.15, p=101325, H=0)
+    print lab.n - purge.n
+
+    As the ambient layer of a stack:
+    [np.nan, "Air", [296.15, 101325, 40]]   # T (K), p (Pa), H (%)
+
+%   INPUT PARAMETERS:
+%
+%       lambda   ==> wavelength (meters). Numpy array
+%       T        ==> temperature (K)
+%       p        ==> pressure (Pa)
+%       H        ==> relative humidity (0-100 %)
+%       xc       ==> CO2 concentration (ppm), Ciddor model only
+%       model    ==> 'auto' (Mathar bands, Ciddor below 1.3 um), 'Mathar', 'Ciddor' or 'Birch'
+
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from dispersion_cache import DispersionCache, grid_key
+
+# Mathar 2007 reference conditions
+TREF = 273.15 + 17.5  # K
+PREF = 75000          # Pa
+HREF = 10             # %
+
+# Mathar 2007 bands: (lambda_min, lambda_max, lambda_ref) in um and the
+# coefficient rows cref, cT, cTT, cH, cHH, cp, cpp, cTH, cTp, cHp (cm^j units)
+MATHAR_BANDS = [
+    (1.3, 2.5, 2.25, [
+        [0.200192e-3,  0.113474e-9,  -0.424595e-14,  0.100957e-16, -0.293315e-20,  0.307228e-24],
+        [0.588625e-1, -0.385766e-7,   0.888019e-10, -0.567650e-13,  0.166615e-16, -0.174845e-20],
+        [-3.01513,     0.406167e-3,  -0.514544e-6,   0.343161e-9,  -0.101189e-12,  0.106749e-16],
+        [-0.103945e-7, 0.136858e-11, -0.171039e-14,  0.112908e-17, -0.329925e-21,  0.344747e-25],
+        [0.573256e-12, 0.186367e-16, -0.228150e-19,  0.150947e-22, -0.441214e-26,  0.461209e-30],
+        [0.267085e-8,  0.135941e-14,  0.135295e-18,  0.818218e-23, -0.222957e-26,  0.249964e-30],
+        [0.609186e-17, 0.519024e-23, -0.419477e-27,  0.434120e-30, -0.122445e-33,  0.134816e-37],
+        [0.497859e-4, -0.661752e-8,   0.832034e-11, -0.551793e-14,  0.161899e-17, -0.169901e-21],
+        [0.779176e-6,  0.396499e-12,  0.395114e-16,  0.233587e-20, -0.636441e-24,  0.716868e-28],
+        [-0.206567e-15, 0.106141e-20, -0.149982e-23, 0.984046e-27, -0.288266e-30,  0.299105e-34]]),
+    (2.8, 4.2, 3.4, [
+        [0.200049e-3,  0.145221e-9,   0.250951e-12, -0.745834e-15, -0.161432e-17,  0.352780e-20],
+        [0.588432e-1, -0.825182e-7,   0.137982e-9,   0.352420e-13, -0.730651e-15, -0.167911e-18],
+        [-3.13579,     0.694124e-3,  -0.500604e-6,  -0.116668e-8,   0.209644e-11,  0.591037e-14],
+        [-0.108142e-7, 0.230102e-11, -0.154652e-14, -0.323014e-17,  0.630616e-20,  0.173880e-22],
+        [0.586812e-12, 0.312198e-16, -0.197792e-19, -0.461945e-22,  0.788398e-25,  0.245580e-27],
+        [0.266900e-8,  0.168162e-14,  0.353075e-17, -0.963455e-20, -0.223079e-22,  0.453166e-25],
+        [0.608860e-17, 0.461560e-22,  0.184282e-24, -0.524471e-27, -0.121299e-29,  0.246512e-32],
+        [0.517962e-4, -0.112149e-7,   0.776507e-11,  0.172569e-13, -0.320582e-16, -0.899435e-19],
+        [0.778638e-6,  0.446396e-12,  0.784600e-15, -0.195151e-17, -0.542083e-20,  0.103530e-22],
+        [-0.217243e-15, 0.104747e-20, -0.523689e-23, 0.817386e-26,  0.309913e-28, -0.363491e-31]]),
+    (4.35, 5.2, 4.8, [
+        [0.200020e-3,  0.275346e-9,   0.325702e-12, -0.693603e-14,  0.285610e-17,  0.338758e-18],
+        [0.590035e-1, -0.375764e-6,   0.134585e-9,   0.124316e-11,  0.508510e-13, -0.189245e-15],
+        [-4.09830,     0.250037e-2,   0.275187e-6,  -0.653398e-8,  -0.310589e-9,   0.127747e-11],
+        [-0.140463e-7, 0.839350e-11, -0.190929e-14, -0.121399e-16, -0.898863e-18,  0.364662e-20],
+        [0.543605e-12, 0.112802e-15, -0.229979e-19, -0.191450e-21, -0.120352e-22,  0.500955e-25],
+        [0.266898e-8,  0.273629e-14,  0.463466e-17, -0.916894e-23,  0.136685e-21,  0.413687e-23],
+        [0.610706e-17, 0.116620e-21,  0.244736e-24, -0.497682e-26,  0.742024e-29,  0.224625e-30],
+        [0.674488e-4, -0.406775e-7,   0.289063e-11,  0.819898e-13,  0.468386e-14, -0.191182e-16],
+        [0.778627e-6,  0.593296e-12,  0.145042e-14,  0.489815e-17,  0.327941e-19,  0.128020e-21],
+        [-0.211676e-15, 0.487921e-20, -0.682545e-23, 0.942802e-25, -0.946422e-27, -0.153682e-29]]),
+    (7.5, 14.1, 10.1, [
+        [0.199885e-3,  0.344739e-9,  -0.273714e-12,  0.393383e-15, -0.569488e-17,  0.164556e-19],
+        [0.593900e-1, -0.172226e-5,   0.237654e-8,  -0.381812e-11,  0.305050e-14, -0.157464e-16],
+        [-6.50355,     0.103830e-1,  -0.139464e-4,   0.220077e-7,  -0.272412e-10,  0.126364e-12],
+        [-0.221938e-7, 0.347377e-10, -0.465991e-13,  0.735848e-16, -0.897119e-19,  0.380817e-21],
+        [0.393524e-12, 0.464083e-15, -0.621764e-18,  0.981126e-21, -0.121384e-23,  0.515111e-26],
+        [0.266809e-8,  0.695247e-15,  0.159070e-17, -0.303451e-20, -0.661489e-22,  0.178226e-24],
+        [0.610508e-17, 0.227694e-22,  0.786323e-25, -0.174448e-27, -0.359791e-29,  0.978307e-32],
+        [0.106776e-3, -0.168516e-6,   0.226201e-9,  -0.356457e-12,  0.437980e-15, -0.194545e-17],
+        [0.77368e-6,   0.216404e-12,  0.581805e-15, -0.189618e-17, -0.198869e-19,  0.589381e-22],
+        [-0.206365e-15, 0.300234e-19, -0.426519e-22, 0.684306e-25, -0.467320e-29,  0.126117e-30]]),
+    (16.0, 24.0, 20.0, [
+        [0.199436e-3,  0.299123e-8,  -0.214862e-10,  0.143338e-12,  0.122398e-14, -0.114628e-16],
+        # cT[3] reads -0.954584-9 in the script; -0.954584e-9 is the published value
+        [0.621723e-1, -0.177074e-4,   0.152213e-6,  -0.954584e-9,  -0.996706e-11,  0.921476e-13],
+        [-23.2409,     0.108557,     -0.102439e-2,   0.634072e-5,   0.762517e-7,  -0.675587e-9],
+        [-0.772707e-7, 0.347237e-9,  -0.272675e-11,  0.170858e-13,  0.156889e-15, -0.150004e-17],
+        [-0.326604e-12, 0.463606e-14, -0.364272e-16, 0.228756e-18,  0.209502e-20, -0.200547e-22],
+        [0.266827e-8,  0.120788e-14,  0.522646e-17,  0.783027e-19,  0.753235e-21, -0.228819e-24],
+        [0.613675e-17, 0.585494e-22,  0.286055e-24,  0.425193e-26,  0.413455e-28, -0.812941e-32],
+        [0.375974e-3, -0.171849e-5,   0.146704e-7,  -0.917231e-10, -0.955922e-12,  0.880502e-14],
+        [0.778436e-6,  0.461840e-12,  0.306229e-14, -0.623183e-16, -0.161119e-18,  0.800756e-20],
+        [-0.272614e-15, 0.304662e-18, -0.239590e-20, 0.149285e-22,  0.136086e-24, -0.130999e-26]]),
+]
+
+_BAND_LIMITS = np.array([[b[0], b[1]] for b in MATHAR_BANDS])
+_SIGMA_REF = np.array([1e4 / b[2] for b in MATHAR_BANDS])           # cm^-1
+_COEFFS = np.array([b[3] for b in MATHAR_BANDS])                    # (nbands, 10, 6)
+
+_cache = DispersionCache(maxsize=32)
+
+
+class Air():
+    def __init__(self, lamda, T=288.15, p=101325, H=0, xc=450, model='auto'):
+        """
+        Initialize the ambient model
+
+        Parameters:
+        lamda : array_like
+            Wavelength(s) in meters
+        T, p, H : float
+            Temperature (K), pressure (Pa) and relative humidity (%)
+        xc : float
+            CO2 concentration (ppm), used by the Ciddor model
+        model : str
+            'auto', 'Mathar', 'Ciddor' or 'Birch'
+        """
+        self.lamda = np.asarray(lamda, dtype=float)
+        self.T, self.p, self.H, self.xc = T, p, H, xc
+        self.model = model
+
+        self.n = refractive_index(self.lamda, T, p, H, xc, model)
+        self.k = np.zeros_like(self.n)
+        self.refractive_index = self.n + 0j
+        self.epsilon = self.refractive_index**2
+
+
+def refractive_index(lamda, T=288.15, p=101325, H=0, xc=450, model='auto'):
+    """
+    Real refractive index of air on a wavelength grid (meters)
+
+    The result is shared and read-only; repeated calls with the same
+    condition and grid are served from the cache.
+    """
+    lamda = np.asarray(lamda, dtype=float)
+    key = (float(T), float(p), float(H), float(xc), model, grid_key(lamda))
+    return _cache.get(key, lambda: _evaluate(lamda * 1e6, T, p, H, xc, model))
+
+
+def _evaluate(um, T, p, H, xc, model):
+    if model == 'Mathar':
+        return mathar(um, T, p, H)
+    if model == 'Ciddor':
+        return ciddor(um, T, p, H, xc)
+    if model == 'Birch':
+        return birch(um, T, p, H)
+    if model != 'auto':
+        raise ValueError(f"Invalid model '{model}'. Use 'auto', 'Mathar', 'Ciddor' or 'Birch'")
+    n = mathar(um, T, p, H)
+    visible = um < _BAND_LIMITS[0, 0]
+    if np.any(visible):
+        n[visible] = ciddor(um[visible], T, p, H, xc)
+    return n
+
+
+@lru_cache(maxsize=64)
+def mathar_coefficients(T, p, H):
+    """
+    Polynomial coefficients of every Mathar band at one condition
+
+    Returns:
+    (nbands, 6) array, computed once per (T, p, H)
+    """
+    dT = 1 / T - 1 / TREF
+    dH = H - HREF
+    dp = p - PREF
+    terms = np.array([1, dT, dT**2, dH, dH**2, dp, dp**2, dT * dH, dT * dp, dH * dp])
+    coeffs = np.einsum('t,btj->bj', terms, _COEFFS)
+    coeffs.setflags(write=False)
+    return coeffs
+
+
+def mathar_band(um):
+    """Index of the Mathar band used for each wavelength (nearest band in the gaps)"""
+    um = np.asarray(um, dtype=float)
+    distance = np.maximum(_BAND_LIMITS[:, 0] - um[:, np.newaxis], 0) + \
+        np.maximum(um[:, np.newaxis] - _BAND_LIMITS[:, 1], 0)
+    return np.argmin(distance, axis=1)
+
+
+def mathar(um, T=288.15, p=101325, H=0):
+    """Mathar 2007 refractive index, band selected per wavelength (um)"""
+    um = np.asarray(um, dtype=float)
+    band = mathar_band(um)
+    coeffs = mathar_coefficients(float(T), float(p), float(H))
+    dsigma = 1e4 / um - _SIGMA_REF[band]
+    powers = dsigma[:, np.newaxis] ** np.arange(6)
+    return 1 + np.einsum('ij,ij->i', powers, coeffs[band])
+
+
+@lru_cache(maxsize=64)
+def ciddor_factors(T, p, H, xc):
+    """
+    Density ratios of the Ciddor 1996 model at one condition
+
+    Returns:
+    (dry air factor, water vapour factor, CO2 correction)
+    """
+    t = T - 273.15
+    R = 8.314510
+    h = H / 100
+    if t >= 0:
+        svp = np.exp(1.2378847e-5 * T**2 - 1.9121316e-2 * T + 33.93711047 - 6.3431645e3 / T)
+    else:
+        svp = 10**(-2663.5 / T + 12.537)
+    f = 1.00062 + 3.14e-8 * p + 5.6e-7 * t**2
+    xw = f * h * svp / p
+
+    Ma = 1e-3 * (28.9635 + 12.011e-6 * (xc - 400))
+    Mw = 0.018015
+    rho_axs = 101325 * Ma / (_ciddor_Z(288.15, 101325, 0) * R * 288.15)
+    rho_ws = 1333 * Mw / (_ciddor_Z(293.15, 1333, 1) * R * 293.15)
+    Z = _ciddor_Z(T, p, xw)
+    rho_a = p * Ma / (Z * R * T) * (1 - xw)
+    rho_w = p * Mw / (Z * R * T) * xw
+    return rho_a / rho_axs, rho_w / rho_ws, 1 + 0.534e-6 * (xc - 450)
+
+
+def _ciddor_Z(T, p, xw):
+    """Compressibility of moist air"""
+    t = T - 273.15
+    return (1 - (p / T) * (1.58123e-6 - 2.9331e-8 * t + 1.1043e-10 * t**2
+                           + (5.707e-6 - 2.051e-8 * t) * xw + (1.9898e-4 - 2.376e-6 * t) * xw**2)
+            + (p / T)**2 * (1.83e-11 - 0.765e-8 * xw**2))
+
+
+def ciddor(um, T=288.15, p=101325, H=0, xc=450):
+    """Ciddor 1996 refractive index (um), valid 0.3 to 1.69 um"""
+    s2 = np.asarray(um, dtype=float)**-2
+    a, b, co2 = ciddor_factors(float(T), float(p), float(H), float(xc))
+    nas = (5792105 / (238.0185 - s2) + 167917 / (57.362 - s2)) * 1e-8
+    nws = 1.022 * (295.235 + 2.6422 * s2 - 0.032380 * s2**2 + 0.004028 * s2**3) * 1e-8
+    return 1 + a * nas * co2 + b * nws
+
+
+def birch(um, T=288.15, p=101325, H=0):
+    """Birch and Downs 1994 refractive index (um), valid 0.35 to 0.65 um"""
+    s2 = np.asarray(um, dtype=float)**-2
+    t = T - 273.15
+    # Partial water vapour pressure from the Ciddor saturation vapour pressure
+    svp = np.exp(1.2378847e-5 * T**2 - 1.9121316e-2 * T + 33.93711047 - 6.3431645e3 / T)
+    f = H / 100 * svp
+    ns = 1 + 1e-8 * (8342.54 + 2406147 / (130 - s2) + 15998 / (38.9 - s2))
+    ntp = 1 + p * (ns - 1) * (1 + 1e-8 * (0.601 - 0.00972 * t) * p) / (1 + 0.003661 * t) / 96095.43
+    return ntp - f * (3.73345 - 0.0401 * s2) * 1e-10
+
+
+def cache_stats():
+    """Return hit/miss counters of the Air result cache"""
+    return _cache.stats()
+
+
+if __name__ == '__main__':
+    wavelengths = np.linspace(2e-6, 12e-6, 300)
+    lab = refractive_index(wavelengths, T=296.15, H=40)
+    purge = refractive_index(wavelengths, T=296.15, H=0)
+    print(f"n(lab) - n(purge) at {wavelengths[0]*1e6:.1f} um: {lab[0] - purge[0]:.3e}")
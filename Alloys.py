@@ -0,0 +1,167 @@
+"""
+Alloys.py
+ This module returns the complex refractive index of the III-V alloys grown
+ in our DBRs and grades for any number of compositions at once, as one
+ (ncompositions x nlambda) array:
+
+   AlGaSb  R. Ferrini et al. (Sellmeier below E0, tabulated n,k above)
+   AlAsSb  average of the Gupta, Moss, Herve-Vandamme, Ravindra and Reddy
+           band-gap relations, square-root absorption above the gap
+   others  Adachi MDF (see Adachi.py)
+
+ Every composition row is cached on its own, keyed by (material,
+ composition, wavelength grid), so layers and grade slices that share a
+ composition reuse the same row.
+
+    Example:
+
+    import Alloys
+    import numpy as np
+    lamda = np.linspace(2E-6, 12E-6, 100)   # 2 um to 12 um
+    N = Alloys.refractive_index(lamda, 'AlGaSb', [0.1, 0.3, 0.5])
+    print N.real
+    print N.imag
+
+%   INPUT PARAMETERS:
+%
+%       lambda       ==> wavelength (meters) of light excitation on material. Numpy array
+%
+%       material     ==> 'AlGaSb', 'AlAsSb' or any material of Adachi.available_materials()
+%
+%       compositions ==> alloy fraction(s) x (0-1): Al(x)Ga(1-x)Sb, AlAs(x)Sb(1-x)
+%
+%       Reference:
+%       R. Ferrini et al., Optical functions from 0.02 to 6 eV of AlxGa1-xSb/GaSb
+%       epitaxial layers, J. Appl. Phys. (2002)
+
+"""
+
+import numpy as np
+
+import Adachi
+from dispersion_cache import DispersionCache, grid_key
+
+# hc in eV*nm, as used by the AlAsSb relations
+HC_NM = 1239.84
+
+# Ferrini AlGaSb n,k above E0, on an x by photon energy (eV) grid
+FERRINI_X = np.array([0.0, 0.1, 0.3, 0.5])
+FERRINI_E = np.round(np.arange(0.5, 3.05, 0.1), 1)
+FERRINI_N = np.array([
+    [3.846, 3.878, 3.959, 4.010, 4.026, 4.050, 4.096, 4.140, 4.200, 4.270, 4.370, 4.500, 4.644,
+     4.822, 5.037, 5.197, 4.630, 4.470, 4.455, 4.464, 4.235, 3.946, 3.816, 3.755, 3.740, 3.751],
+    [3.765, 3.781, 3.807, 3.861, 3.942, 3.952, 3.983, 4.031, 4.110, 4.183, 4.262, 4.393, 4.529,
+     4.697, 4.917, 5.154, 5.087, 4.568, 4.483, 4.461, 4.425, 4.100, 3.893, 3.804, 3.768, 3.758],
+    [3.637, 3.645, 3.657, 3.674, 3.702, 3.751, 3.863, 3.906, 3.946, 4.015, 4.106, 4.249, 4.373,
+     4.515, 4.679, 4.853, 5.053, 5.127, 4.636, 4.489, 4.453, 4.419, 4.180, 3.959, 3.870, 3.829],
+    [3.508, 3.514, 3.523, 3.535, 3.551, 3.575, 3.610, 3.667, 3.778, 3.895, 3.970, 4.063, 4.176,
+     4.289, 4.475, 4.720, 4.989, 5.112, 5.031, 4.632, 4.483, 4.552, 4.491, 4.302, 4.105, 4.030],
+])
+FERRINI_K = np.array([
+    [0.000, 0.000, 0.023, 0.125, 0.145, 0.173, 0.201, 0.225, 0.268, 0.299, 0.338, 0.407, 0.514,
+     0.647, 0.881, 1.465, 1.843, 1.770, 1.812, 2.000, 2.289, 2.268, 2.190, 2.148, 2.116, 2.119],
+    [0.000, 0.000, 0.000, 0.014, 0.094, 0.125, 0.148, 0.162, 0.184, 0.217, 0.268, 0.309, 0.372,
+     0.487, 0.675, 1.025, 1.729, 1.804, 1.792, 1.897, 2.142, 2.327, 2.247, 2.200, 2.181, 2.164],
+    [0.000, 0.000, 0.000, 0.000, 0.000, 0.000, 0.033, 0.075, 0.109, 0.125, 0.133, 0.174, 0.240,
+     0.361, 0.497, 0.674, 0.974, 1.539, 1.845, 1.833, 1.909, 2.101, 2.318, 2.286, 2.259, 2.249],
+    [0.000, 0.000, 0.000, 0.000, 0.000, 0.000, 0.000, 0.000, 0.000, 0.004, 0.017, 0.033, 0.067,
+     0.098, 0.155, 0.265, 0.525, 0.970, 1.426, 1.702, 1.605, 1.716, 1.943, 2.147, 2.146, 2.149],
+])
+
+_cache = DispersionCache(maxsize=1024)
+
+
+def refractive_index(lamda, material, compositions):
+    """
+    Complex refractive index n + ik for one or more compositions
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    material : str
+        Alloy name
+    compositions : float or array_like
+        Alloy fraction(s) x
+
+    Returns:
+    (ncompositions, nlambda) complex array
+    """
+    lamda = np.asarray(lamda, dtype=float)
+    compositions = np.atleast_1d(np.asarray(compositions, dtype=float))
+    grid = grid_key(lamda)
+
+    # Look every row up on its own and evaluate all misses in one batch
+    rows = [_cache.lookup((material, x, grid)) for x in compositions]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    if missing:
+        batch = _evaluate(lamda, material, compositions[missing])
+        for i, row in zip(missing, batch):
+            rows[i] = _cache.put((material, compositions[i], grid), row.copy())
+    return np.array(rows)
+
+
+def _evaluate(lamda, material, compositions):
+    if material == 'AlGaSb':
+        return algasb(lamda, compositions)
+    if material == 'AlAsSb':
+        return alassb(lamda, compositions)
+    return Adachi.refractive_index(lamda, material, compositions)
+
+
+def algasb(lamda, compositions):
+    """Al(x)Ga(1-x)Sb after Ferrini: Sellmeier below E0, bilinear table interpolation above"""
+    um = np.asarray(lamda, dtype=float)[np.newaxis, :] * 1e6
+    E = 1.2398 / um
+    x = np.atleast_1d(np.asarray(compositions, dtype=float))[:, np.newaxis]
+
+    # Fundamental gap and Sellmeier coefficients (C in microns)
+    E0 = 0.738 + 1.247 * x
+    A = 14.07 - 4.80*x - 0.66*x*x
+    B = 0.458 - 0.099*x + 1.258*x*x
+    C = 1.486 - 2.308*x + 1.973*x*x
+    with np.errstate(invalid='ignore', divide='ignore'):  # only used below E0
+        n_sellmeier = np.sqrt(A + B * um**2 / (um**2 - C**2))
+
+    # Table rows at x (linear in x, clamped to the tabulated range), then linear in energy
+    xc = np.clip(x[:, 0], FERRINI_X[0], FERRINI_X[-1])
+    i = np.clip(np.searchsorted(FERRINI_X, xc, side='right') - 1, 0, FERRINI_X.size - 2)
+    t = ((xc - FERRINI_X[i]) / (FERRINI_X[i + 1] - FERRINI_X[i]))[:, np.newaxis]
+    n_rows = FERRINI_N[i] + t * (FERRINI_N[i + 1] - FERRINI_N[i])
+    k_rows = FERRINI_K[i] + t * (FERRINI_K[i + 1] - FERRINI_K[i])
+
+    Ec = np.clip(E[0], FERRINI_E[0], FERRINI_E[-1])
+    j = np.clip(np.searchsorted(FERRINI_E, Ec, side='right') - 1, 0, FERRINI_E.size - 2)
+    s = (Ec - FERRINI_E[j]) / (FERRINI_E[j + 1] - FERRINI_E[j])
+    n_table = n_rows[:, j] + s * (n_rows[:, j + 1] - n_rows[:, j])
+    k_table = k_rows[:, j] + s * (k_rows[:, j + 1] - k_rows[:, j])
+
+    below = E < E0
+    return np.where(below, n_sellmeier, n_table) + 1j * np.where(below, 0.0, k_table)
+
+
+def alassb(lamda, compositions):
+    """AlAs(x)Sb(1-x) from the mean of five band-gap relations, sqrt absorption above the gap"""
+    nm = np.asarray(lamda, dtype=float)[np.newaxis, :] * 1e9
+    E = HC_NM / nm
+    x = np.atleast_1d(np.asarray(compositions, dtype=float))[:, np.newaxis]
+
+    # Vegard's law with bowing (https://www.sciencedirect.com/science/article/pii/S0749603613000931)
+    Eg = 1.615 * x + 0.73 * (1-x) - 0.5 * x * (1-x)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n_gupta = 4.084 - 0.62 * Eg
+        n_moss = np.where(Eg > 0, (95 / Eg)**0.25, n_gupta)
+        n_herve = np.sqrt(1 + (13.6/(Eg + 3.4))**2)
+        n_ravindra = 4.16 - 0.85 * Eg
+        n_reddy = np.where(Eg > 0.365, (154/(Eg - 0.365))**0.25, n_gupta)
+    n = np.nanmean(np.stack((n_gupta, n_moss, n_herve, n_ravindra, n_reddy)), axis=0)
+
+    # alpha = 1e4 sqrt(E - Eg) 1/cm above the gap
+    alpha = 1e4 * np.sqrt(np.clip(E - Eg, 0.0, None))
+    k = np.where(E >= Eg, alpha * nm * 1e-7 / (4 * np.pi), 0.0)
+    return np.broadcast_to(n, k.shape) + 1j * k
+
+
+def cache_stats():
+    """Return hit/miss counters of the composition row cache"""
+    return _cache.stats()
@@ -0,0 +1,205 @@
+"""
+BB.py
+ This module calculates the real and imaginary part of the dielectric function,
+ real and imaginary part of the refractive index for metals using the
+ Brendel-Bormann (BB) model. The parameters are obtained from Rakic et al.
+ and replace the standalone scripts in scripts/Rakic 1998 - * (BB model).py.
+
+ Every Gaussian-broadened oscillator is evaluated at once as a
+ (noscillators x nlambda) array with a single Faddeeva (wofz) call, and the
+ result is cached per material, delta set and wavelength grid.
+
+    Example:
+
+    from BB import BB
+    import numpy as np
+    lamda = np.linspace(2E-6, 12E-6, 100)   # 2 um to 12 um
+    gold = BB(lamda, material='Au')
+    print gold.n
+    print gold.k
+
+%   INPUT PARAMETERS:
+%
+%       lambda   ==> wavelength (meters) of light excitation on material. Numpy array
+%
+%       material ==>    'Ag', 'Al', 'Au', 'Be', 'Cr', 'Cu', 'Ni', 'Pd', 'Pt',
+%                       'Ti', 'W' or a dict with the same keys as BB_PARAMS
+%
+%       Reference:
+%       Rakic et al., Optical properties of metallic films for vertical-
+%       cavity optoelectronic devices, Applied Optics (1998)
+
+"""
+
+import numpy as np
+from scipy.special import wofz
+
+from dispersion_cache import DispersionCache, grid_key
+
+# Rakic 1998 BB parameters (eV). Index 0 is the Drude term (omega and sigma unused)
+BB_PARAMS = {
+    'Ag': {'omega_p': 9.01,
+           'f':     [0.821, 0.050, 0.133, 0.051, 0.467, 4.000],
+           'Gamma': [0.049, 0.189, 0.067, 0.019, 0.117, 0.052],
+           'omega': [0.000, 2.025, 5.185, 4.343, 9.809, 18.56],
+           'sigma': [0.000, 1.894, 0.665, 0.189, 1.170, 0.516]},
+    'Al': {'omega_p': 14.98,
+           'f':     [0.526, 0.213, 0.060, 0.182, 0.014],
+           'Gamma': [0.047, 0.312, 0.315, 1.587, 2.145],
+           'omega': [0.000, 0.163, 1.561, 1.827, 4.495],
+           'sigma': [0.000, 0.013, 0.042, 0.256, 1.735]},
+    'Au': {'omega_p': 9.03,
+           'f':     [0.770, 0.054, 0.050, 0.312, 0.719, 1.648],
+           'Gamma': [0.050, 0.074, 0.035, 0.083, 0.125, 0.179],
+           'omega': [0.000, 0.218, 2.885, 4.069, 6.137, 27.97],
+           'sigma': [0.000, 0.742, 0.349, 0.830, 1.246, 1.795]},
+    'Be': {'omega_p': 18.51,
+           'f':     [0.081, 0.066, 0.067, 0.346, 0.311],
+           'Gamma': [0.035, 2.956, 3.962, 2.398, 3.904],
+           'omega': [0.000, 0.131, 0.469, 2.827, 4.318],
+           'sigma': [0.000, 0.277, 3.167, 1.446, 0.893]},
+    'Cr': {'omega_p': 10.75,
+           'f':     [0.154, 0.338, 0.261, 0.817, 0.105],
+           'Gamma': [0.048, 4.256, 3.957, 2.218, 6.983],
+           'omega': [0.000, 0.281, 0.584, 1.919, 6.997],
+           'sigma': [0.000, 0.115, 0.252, 0.225, 4.903]},
+    'Cu': {'omega_p': 10.83,
+           'f':     [0.562, 0.076, 0.081, 0.324, 0.726],
+           'Gamma': [0.030, 0.056, 0.047, 0.113, 0.172],
+           'omega': [0.000, 0.416, 2.849, 4.819, 8.136],
+           'sigma': [0.000, 0.562, 0.469, 1.131, 1.719]},
+    'Ni': {'omega_p': 15.92,
+           'f':     [0.083, 0.357, 0.039, 0.127, 0.654],
+           'Gamma': [0.022, 2.820, 0.120, 1.822, 6.637],
+           'omega': [0.000, 0.317, 1.059, 4.583, 8.825],
+           'sigma': [0.000, 0.606, 1.454, 0.379, 0.510]},
+    'Pd': {'omega_p': 9.72,
+           'f':     [0.330, 0.769, 0.093, 0.309, 0.409],
+           'Gamma': [0.009, 2.343, 0.497, 2.022, 0.119],
+           'omega': [0.000, 0.066, 0.502, 2.432, 5.987],
+           'sigma': [0.000, 0.694, 0.027, 1.167, 1.331]},
+    'Pt': {'omega_p': 9.59,
+           'f':     [0.333, 0.186, 0.665, 0.551, 2.214],
+           'Gamma': [0.080, 0.498, 1.851, 2.604, 2.891],
+           'omega': [0.000, 0.782, 1.317, 3.189, 8.236],
+           'sigma': [0.000, 0.031, 0.096, 0.766, 1.146]},
+    'Ti': {'omega_p': 7.29,
+           'f':     [0.126, 0.427, 0.218, 0.513, 0.0002],
+           'Gamma': [0.067, 1.877, 0.100, 0.615, 4.109],
+           'omega': [0.000, 1.459, 2.661, 0.805, 19.86],
+           'sigma': [0.000, 0.463, 0.506, 0.799, 2.854]},
+    'W':  {'omega_p': 13.22,
+           'f':     [0.197, 0.006, 0.022, 0.136, 2.648],
+           'Gamma': [0.057, 3.689, 0.277, 1.433, 4.555],
+           'omega': [0.000, 0.481, 0.985, 1.962, 5.442],
+           'sigma': [0.000, 3.754, 0.059, 0.273, 1.912]},
+}
+
+_cache = DispersionCache(maxsize=64)
+
+
+class BB():
+    def __init__(self, lamda, material, delta_omega_p=0, delta_f=0,
+                 delta_gamma=0, delta_omega=0):
+        """
+        Initialize the material model
+
+        Parameters:
+        lamda : array_like
+            Wavelength(s) in meters
+        material : str or dict
+            Metal name in BB_PARAMS or a parameter dict with the same keys
+        delta_* : float
+            Adjustments added to omega_p, f, Gamma and omega (eV), as in LD.LD
+        """
+        self.lamda = np.asarray(lamda, dtype=float)
+        self.material = material
+        self.model = 'BB'
+
+        # Delta parameters for adjustments
+        self.delta_omega_p = delta_omega_p
+        self.delta_f = delta_f
+        self.delta_gamma = delta_gamma
+        self.delta_omega = delta_omega
+
+        # Physical constants
+        self.twopic = 1.883651567308853e+09  # 2*pi*c
+        self.ehbar = 1.519250349719305e+15    # e/hbar
+
+        params = self._get_material_params(material)
+        key = (self._params_key(params), delta_omega_p, delta_f,
+               delta_gamma, delta_omega, grid_key(self.lamda))
+        self.epsilon, self.refractive_index = _cache.get(
+            key, lambda: self._calculate(params))
+
+        # Complex refractive index (n + ik)
+        self.n = self.refractive_index.real
+        self.k = self.refractive_index.imag
+        self.epsilon_real = self.epsilon.real
+        self.epsilon_imag = self.epsilon.imag
+
+    def _calculate(self, params):
+        epsilon = self.calculate_epsilon(params)
+        return epsilon, np.sqrt(epsilon)
+
+    def calculate_epsilon(self, params):
+        """Evaluate the BB dielectric function on the wavelength grid"""
+        # Photon energy (eV) as a row vector
+        w = (self.twopic / self.lamda / self.ehbar)[np.newaxis, :]
+
+        omega_p = params['omega_p'] + self.delta_omega_p
+        f = params['f'] + self.delta_f
+        Gamma = params['Gamma'] + self.delta_gamma
+
+        # Drude term
+        epsilon = 1 - f[0] * omega_p**2 / (w[0] * (w[0] + 1j * Gamma[0]))
+
+        # Oscillator terms as (nosc, 1) columns against (1, nlambda)
+        fj = f[1:, np.newaxis]
+        Gj = Gamma[1:, np.newaxis]
+        wj = (params['omega'][1:] + self.delta_omega)[:, np.newaxis]
+        sj = params['sigma'][1:, np.newaxis]
+
+        alpha = np.sqrt(w**2 + 1j * w * Gj)
+        z = np.stack(((alpha - wj), (alpha + wj))) / (np.sqrt(2) * sj)
+        W = wofz(z)
+        chi = (1j * np.sqrt(np.pi) * fj * omega_p**2 /
+               (2**1.5 * alpha * sj) * (W[0] + W[1]))
+        return epsilon + chi.sum(axis=0)
+
+    @staticmethod
+    def _get_material_params(material):
+        """Get BB parameters as float arrays"""
+        if isinstance(material, str):
+            if material not in _BB_ARRAYS:
+                raise ValueError(f"No Brendel-Bormann parameters for material '{material}'. "
+                                 f"Available: {list(BB_PARAMS.keys())}")
+            return _BB_ARRAYS[material]
+        return _as_arrays(material)  # Assume parameters were passed directly
+
+    @staticmethod
+    def _params_key(params):
+        return tuple((name, tuple(np.atleast_1d(params[name])))
+                     for name in ('omega_p', 'f', 'Gamma', 'omega', 'sigma'))
+
+
+def _as_arrays(params):
+    return {'omega_p': float(params['omega_p']),
+            'f': np.asarray(params['f'], dtype=float),
+            'Gamma': np.asarray(params['Gamma'], dtype=float),
+            'omega': np.asarray(params['omega'], dtype=float),
+            'sigma': np.asarray(params['sigma'], dtype=float)}
+
+
+_BB_ARRAYS = {name: _as_arrays(p) for name, p in BB_PARAMS.items()}
+
+
+def cache_stats():
+    """Return hit/miss counters of the BB result cache"""
+    return _cache.stats()
+
+
+if __name__ == '__main__':
+    wavelengths = np.linspace(2e-6, 12e-6, 300)
+    gold = BB(wavelengths, 'Au')
+    print(f"At {wavelengths[0]*1e6:.1f} um: n = {gold.n[0]:.3f}, k = {gold.k[0]:.3f}")
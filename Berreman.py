@@ -0,0 +1,197 @@
+"""
+Berreman.py
+ This module is the 4x4 Berreman transfer-matrix engine for stacks with
+ uniaxial layers whose optic axis may be tilted. Every layer is handled as
+ one (nlambda, 4, 4) batch: the Berreman matrix of the layer is built for
+ all wavelengths at once and its propagator comes from a single batched
+ matrix exponential. Incidence and exit media must be isotropic.
+
+ Funcs.calc_rsrpTsTp only calls this engine when the stack contains a
+ 'Uniaxial' layer; isotropic stacks keep the 2x2 kernel.
+
+    Example:
+
+    import Funcs
+    import numpy as np
+    x = np.linspace(2000, 12000, 500)   # nm
+    layers = [[np.nan, 'Constant', [1.0, 0.0]],
+              [1000, 'Uniaxial', [(2.27, 0.0), (2.29, 0.0), 90, 0]],   # CdS in the mid-IR
+              [np.nan, 'Constant', [3.816, 0.0]]]
+    rs, rp, Ts, Tp = Funcs.calc_rsrpTsTp(0*x, layers, x)
+
+%   INPUT PARAMETERS ('Uniaxial' layer):
+%
+%       ordinary      ==> (n, k) of the ordinary index, or a script name of the
+%                         dispersion bundle (see dispersion_bundle.py); the grid
+%                         must lie in the native range of the script
+%
+%       extraordinary ==> (n, k) of the extraordinary index, or a script name
+%
+%       theta         ==> tilt of the optic axis from the layer normal (degrees)
+%
+%       phi           ==> azimuth of the optic axis from the plane of incidence (degrees)
+%
+%       Reference:
+%       D. W. Berreman, Optics in stratified and anisotropic media: 4x4-matrix
+%       formulation, J. Opt. Soc. Am. 62, 502 (1972)
+
+"""
+
+import numpy as np
+from scipy.linalg import expm
+
+import dispersion_bundle
+
+ANISOTROPIC_CASES = ('Uniaxial',)
+
+
+def is_anisotropic(layers):
+    """True if any layer of the stack needs the 4x4 engine"""
+    return any(layer[1] in ANISOTROPIC_CASES for layer in layers)
+
+
+def uniaxial_tensor(N_o, N_e, theta, phi):
+    """
+    Dielectric tensors (nlambda, 3, 3) of a uniaxial medium
+
+    Parameters:
+    N_o, N_e : array_like
+        Ordinary and extraordinary complex index n + ik on the grid
+    theta, phi : float
+        Optic axis tilt from the normal and azimuth from the plane of incidence (degrees)
+    """
+    theta, phi = np.radians(theta), np.radians(phi)
+    c = np.array([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)])
+    eps_o = np.asarray(N_o, dtype=complex)**2
+    eps_e = np.asarray(N_e, dtype=complex)**2
+    return (eps_o[:, np.newaxis, np.newaxis] * np.eye(3) +
+            (eps_e - eps_o)[:, np.newaxis, np.newaxis] * np.outer(c, c))
+
+
+def berreman_matrix(eps, kx):
+    """
+    Berreman matrices (nlambda, 4, 4) for the field vector (Ex, Hy, Ey, -Hx)
+
+    Parameters:
+    eps : ndarray
+        Dielectric tensors, shape (nlambda, 3, 3)
+    kx : ndarray
+        Tangential wavevector N0 sin(angle), shape (nlambda,)
+    """
+    e = eps
+    D = np.zeros(e.shape[:-2] + (4, 4), dtype=complex)
+    e33 = e[:, 2, 2]
+    D[:, 0, 0] = -kx * e[:, 2, 0] / e33
+    D[:, 0, 1] = 1 - kx**2 / e33
+    D[:, 0, 2] = -kx * e[:, 2, 1] / e33
+    D[:, 1, 0] = e[:, 0, 0] - e[:, 0, 2] * e[:, 2, 0] / e33
+    D[:, 1, 1] = -kx * e[:, 0, 2] / e33
+    D[:, 1, 2] = e[:, 0, 1] - e[:, 0, 2] * e[:, 2, 1] / e33
+    D[:, 2, 3] = 1
+    D[:, 3, 0] = e[:, 1, 0] - e[:, 1, 2] * e[:, 2, 0] / e33
+    D[:, 3, 1] = -kx * e[:, 1, 2] / e33
+    D[:, 3, 2] = e[:, 1, 1] - kx**2 - e[:, 1, 2] * e[:, 2, 1] / e33
+    return D
+
+
+def isotropic_modes(N, kx):
+    """
+    Field vectors (nlambda, 4, 4) of the s+, p+, s-, p- plane waves in an isotropic medium
+    """
+    kz = np.sqrt(N**2 - kx**2)
+    kz = np.where(kz.imag < 0, -kz, kz)  # forward waves decay into +z
+    zero, one = np.zeros_like(kz), np.ones_like(kz)
+    modes = np.array([[zero, kz / N, zero, kz / N],
+                      [zero, N, zero, -N],
+                      [one, zero, one, zero],
+                      [kz, zero, -kz, zero]])
+    return np.moveaxis(modes, (0, 1), (-2, -1))
+
+
+def jones_matrices(incang, layers, x, calc_Nlayer):
+    """
+    Reflection and transmission Jones matrices of a stack with uniaxial layers
+
+    Parameters:
+    incang : ndarray
+        Angle of incidence (radians) per wavelength
+    layers : list
+        Layer list, first and last layer isotropic and semi-infinite
+    x : ndarray
+        Wavelengths (nm)
+    calc_Nlayer : callable
+        Funcs.calc_Nlayer, used for the isotropic layers
+
+    Returns:
+    R, T : (nlambda, 2, 2) arrays with rows/columns in (s, p) order,
+           in the n + ik (exp(-i w t)) convention
+    """
+    x = np.asarray(x, dtype=float)
+    k0 = 2 * np.pi / x
+
+    # calc_Nlayer returns n - ik; the 4x4 engine works with n + ik
+    N0 = np.conj(calc_Nlayer(layers, x, 0))
+    Nm = np.conj(calc_Nlayer(layers, x, len(layers) - 1))
+    kx = N0 * np.sin(incang)
+
+    M = np.broadcast_to(np.eye(4, dtype=complex), (x.size, 4, 4))
+    for im in range(1, len(layers) - 1):
+        d = layers[im][0]
+        if np.isnan(d) or d <= 0:
+            continue
+        eps = layer_tensor(layers, x, im, calc_Nlayer)
+        D = berreman_matrix(eps, kx)
+        M = M @ expm(-1j * (k0 * d)[:, np.newaxis, np.newaxis] * D)
+
+    # Incident plus reflected waves above equal M times the transmitted waves below
+    A0 = isotropic_modes(N0, kx)
+    Am = isotropic_modes(Nm, kx)[:, :, :2]
+    T = np.linalg.solve(A0, M @ Am)
+    T_top_inv = np.linalg.inv(T[:, :2, :])
+    return T[:, 2:, :] @ T_top_inv, T_top_inv
+
+
+def layer_tensor(layers, x, num_lay, calc_Nlayer):
+    """Dielectric tensors (nlambda, 3, 3) of one layer"""
+    if layers[num_lay][1] == 'Uniaxial':
+        params = list(layers[num_lay][2]) + [0] * (4 - len(layers[num_lay][2]))
+        N_o = _uniaxial_index(params[0], x)
+        N_e = _uniaxial_index(params[1], x)
+        return uniaxial_tensor(N_o, N_e, params[2] or 0.0, params[3] or 0.0)
+    N = np.conj(calc_Nlayer(layers, x, num_lay))
+    return (N**2)[:, np.newaxis, np.newaxis] * np.eye(3)
+
+
+def _uniaxial_index(spec, x):
+    """
+    Complex index n + ik on x (nm) from a bundle script name or an (n, k) pair
+
+    Raises dispersion_bundle.OutOfRangeError when x leaves the native range of the bundle script.
+    """
+    if isinstance(spec, str):
+        return dispersion_bundle.load_bundle().refractive_index(spec, x * 1e-9)
+    n, k = spec
+    return np.broadcast_to(np.asarray(n) + 1j * np.abs(np.asarray(k)), x.shape).astype(complex)
+
+
+def calc_rsrpTsTp(incang, layers, x, calc_Nlayer):
+    """
+    4x4 counterpart of Funcs.calc_rsrpTsTp with the same return values
+
+    rs, rp are the diagonal reflection coefficients and Ts, Tp the transmission
+    coefficients normalized like the 2x2 kernel, all in its n - ik convention.
+    """
+    x = np.asarray(x, dtype=float)
+    incang = np.broadcast_to(np.asarray(incang, dtype=float), x.shape)
+    R, T = jones_matrices(incang, layers, x, calc_Nlayer)
+
+    N0 = np.conj(calc_Nlayer(layers, x, 0))
+    Nm = np.conj(calc_Nlayer(layers, x, len(layers) - 1))
+    cos_m = np.sqrt(1 - (N0 * np.sin(incang) / Nm)**2)
+
+    # The 2x2 kernel reports t_s / (N0 cos) and t_p cos_m / N0
+    rs = np.conj(R[:, 0, 0])
+    rp = np.conj(R[:, 1, 1])
+    Ts = np.conj(T[:, 0, 0] / (N0 * np.cos(incang)))
+    Tp = np.conj(T[:, 1, 1] * cos_m / N0)
+    return rs, rp, Ts, Tp
@@ -0,0 +1,158 @@
+"""
+EMA.py
+ This module calculates the effective permittivity and complex refractive
+ index of a mixture of materials with the Bruggeman or the Maxwell-Garnett
+ effective-medium approximation (spherical inclusions). The whole wavelength
+ grid is handled at once: two-component Bruggeman uses the closed-form root
+ of its quadratic, more components use a vectorized, damped Newton iteration.
+
+    Example:
+
+    import EMA
+    import numpy as np
+    n_gaas = np.full(100, 3.3)
+    N = EMA.effective_index([(n_gaas, 0.0), (1.0, 0.0)], [0.7, 0.3], 'Bruggeman')
+    print N.real
+    print N.imag
+
+    As a layer of a stack, components given as (n, k) or as (case, params)
+    layer models that Funcs.calc_Nlayer evaluates on the simulation grid:
+    [1000, "EMA", [[(3.3, 0.0), (1.0, 0.0)], [0.7, 0.3], 'Bruggeman']]
+    [1000, "EMA", [[("Adachi", ["GaAs", 0.0]), ("Constant", [1.0, 0.0])], [70, 30], 'Bruggeman']]
+
+%   INPUT PARAMETERS:
+%
+%       components ==> list of (n, k) pairs, scalars or arrays on the wavelength grid
+%
+%       fractions  ==> volume fractions of the components (normalized to sum 1)
+%
+%       model      ==>    'Bruggeman'       = symmetric, all components equivalent
+%                         'Maxwell-Garnett' = first component is the host
+%
+%       Reference:
+%       D. E. Aspnes, Optical properties of thin films, Thin Solid Films (1982)
+
+"""
+
+import numpy as np
+
+MODELS = ('Bruggeman', 'Maxwell-Garnett')
+
+
+def effective_index(components, fractions, model='Bruggeman', size=None):
+    """
+    Effective complex refractive index n + ik of a mixture
+
+    Parameters:
+    components : list of (n, k)
+        Optical constants of every component, scalars or arrays
+    fractions : array_like
+        Volume fractions, one per component
+    model : str
+        'Bruggeman' or 'Maxwell-Garnett'
+    size : int or None
+        Grid size to broadcast scalar components to
+
+    Returns:
+    N : ndarray
+    """
+    shape = (size,) if size is not None else np.broadcast(*[np.asarray(c[0]) for c in components]).shape
+    eps = np.array([np.broadcast_to((np.asarray(n) + 1j * np.asarray(k))**2, shape)
+                    for n, k in components])
+    fractions = _normalize(fractions, len(components))
+
+    if model == 'Bruggeman':
+        epsilon = bruggeman(eps, fractions)
+    elif model == 'Maxwell-Garnett':
+        epsilon = maxwell_garnett(eps, fractions)
+    else:
+        raise ValueError(f"Unknown effective-medium model '{model}'. Available: {list(MODELS)}")
+    return np.sqrt(epsilon)
+
+
+def bruggeman(eps, fractions, tol=1e-12, maxiter=50):
+    """
+    Solve sum_i f_i (eps_i - eps) / (eps_i + 2 eps) = 0 on every grid point
+
+    Parameters:
+    eps : ndarray
+        Component permittivities, shape (ncomponents, nlambda)
+    fractions : array_like
+        Volume fractions summing to 1
+    """
+    eps = np.asarray(eps, dtype=complex)
+    f = np.asarray(fractions, dtype=float)[:, np.newaxis]
+
+    if len(eps) == 1:
+        return eps[0].copy()
+
+    if len(eps) == 2:
+        # -2 eps^2 + b eps + eps1 eps2 = 0
+        b = ((3 * f - 1) * eps).sum(axis=0)
+        root = np.sqrt(b**2 + 8 * eps[0] * eps[1])
+        return _physical_root((b + root) / 4, (b - root) / 4)
+
+    # Damped Newton iteration, started in the upper half plane and kept there
+    epsilon = (f * eps).sum(axis=0)
+    epsilon = np.maximum(epsilon.real, 1.0) + 1j * (np.abs(epsilon.imag) + 1.0)
+    F = _bruggeman_sum(eps, f, epsilon)
+    for _ in range(maxiter):
+        dF = (-3 * f * eps / (eps + 2 * epsilon)**2).sum(axis=0)
+        step = F / dF
+
+        # Halve the step on every grid point where |F| would grow
+        t = np.ones(epsilon.shape)
+        for _ in range(30):
+            trial = epsilon - t * step
+            trial = np.where(trial.imag < 0, trial.conj(), trial)
+            F_trial = _bruggeman_sum(eps, f, trial)
+            worse = (np.abs(F_trial) >= np.abs(F)) & (np.abs(F) > tol)
+            if not worse.any():
+                break
+            t = np.where(worse, t / 2, t)
+        epsilon, F = trial, F_trial
+        if np.all(np.abs(F) <= tol):
+            break
+    return epsilon
+
+
+def _bruggeman_sum(eps, f, epsilon):
+    return (f * (eps - epsilon) / (eps + 2 * epsilon)).sum(axis=0)
+
+
+def maxwell_garnett(eps, fractions):
+    """
+    Maxwell-Garnett permittivity with the first component as host
+
+    Parameters:
+    eps : ndarray
+        Component permittivities, shape (ncomponents, nlambda)
+    fractions : array_like
+        Volume fractions summing to 1
+    """
+    eps = np.asarray(eps, dtype=complex)
+    f = np.asarray(fractions, dtype=float)[1:, np.newaxis]
+    host = eps[0]
+    S = (f * (eps[1:] - host) / (eps[1:] + 2 * host)).sum(axis=0)
+    return host * (1 + 2 * S) / (1 - S)
+
+
+def _physical_root(r1, r2):
+    """Pick the root with non-negative loss, the larger real part if both are lossless"""
+    tol = 1e-12 * (np.abs(r1) + np.abs(r2))
+    take_r1 = (r1.imag > r2.imag + tol) | ((np.abs(r1.imag - r2.imag) <= tol) & (r1.real >= r2.real))
+    return np.where(take_r1, r1, r2)
+
+
+def _normalize(fractions, ncomponents):
+    f = np.asarray(fractions, dtype=float)
+    if f.size != ncomponents:
+        raise ValueError(f"Expected {ncomponents} volume fractions, got {f.size}.")
+    if np.any(f < 0) or f.sum() <= 0:
+        raise ValueError("Volume fractions must be non-negative and not all zero.")
+    return f / f.sum()
+
+
+if __name__ == '__main__':
+    N = effective_index([(3.3, 0.0), (1.0, 0.0)], [0.7, 0.3], 'Bruggeman', size=1)
+    print(f"70% GaAs / 30% voids: n = {N.real[0]:.4f}")
@@ -0,0 +1,194 @@
+"""
+FreeCarrier.py
+ This module adds free-carrier absorption of doped semiconductors to a host
+ dielectric function, for any number of doping levels at once. Two models
+ are available:
+
+   Drude      eps = eps_host - N e^2 / (eps0 m* (w^2 + i w gamma)),
+              gamma = e / (m* mu), with the mobility given or taken from the
+              Caughey-Thomas fit of MOBILITY_PARAMS
+   empirical  k = alpha(lambda) N / N_REF lambda / (4 pi), with the alpha(lambda)
+              polynomial fits (1/cm at N_REF) of the 'Sellmeier-epi' and
+              'Sellmeier-sub' layers of Funcs.calc_Nlayer
+
+ Doping levels are broadcast against the wavelength grid, so a doping sweep
+ returns one (ndoping x nlambda) array.
+
+    Example:
+
+    import FreeCarrier
+    import numpy as np
+    lamda = np.linspace(2E-6, 12E-6, 100)   # 2 um to 12 um
+    N = FreeCarrier.refractive_index(lamda, 'GaAs', [1e17, 1e18, 1e19])
+    print N.real
+    print N.imag
+
+    As a layer of a stack (doping in cm^-3, mobility in cm^2/Vs, 0 = Caughey-Thomas):
+    [1000, "Free-Carrier", ['GaAs', 1e18, 0, 'n']]
+
+%   INPUT PARAMETERS:
+%
+%       lambda   ==> wavelength (meters) of light excitation on material. Numpy array
+%
+%       material ==> host semiconductor of Adachi.py with an entry in EFFECTIVE_MASS
+%
+%       doping   ==> carrier concentration(s) in cm^-3
+%
+%       mobility ==> mobility in cm^2/Vs, scalar or one per doping level
+%
+%       carrier  ==> 'n' (electrons) or 'p' (holes)
+%
+%       Reference:
+%       M. Sotoodeh et al., Empirical low-field mobility model for III-V
+%       compounds applicable in device simulation codes, J. Appl. Phys. 87, 2890 (2000)
+
+"""
+
+import numpy as np
+
+import Adachi
+from dispersion_cache import DispersionCache, grid_key
+
+# Physical constants (SI)
+Q = 1.602176634e-19
+EPS0 = 8.8541878128e-12
+M0 = 9.1093837015e-31
+C = 2.99792458e8
+
+# Conductivity effective masses (units of m0); holes use the heavy-hole mass
+EFFECTIVE_MASS = {
+    'GaAs': {'n': 0.067, 'p': 0.51},
+    'GaSb': {'n': 0.041, 'p': 0.40},
+    'InAs': {'n': 0.023, 'p': 0.41},
+    'InP':  {'n': 0.080, 'p': 0.60},
+}
+
+# Caughey-Thomas mobility mu_min + (mu_max - mu_min) / (1 + (N / N_ref)^a) at 300 K
+# (cm^2/Vs, cm^-3), from Sotoodeh 2000
+MOBILITY_PARAMS = {
+    ('GaAs', 'n'): {'mu_max': 9400, 'mu_min': 500, 'N_ref': 6.0e16, 'a': 0.394},
+    ('GaAs', 'p'): {'mu_max': 491.5, 'mu_min': 20, 'N_ref': 1.48e17, 'a': 0.38},
+    ('GaSb', 'n'): {'mu_max': 5650, 'mu_min': 1050, 'N_ref': 2.8e17, 'a': 1.05},
+    ('GaSb', 'p'): {'mu_max': 875, 'mu_min': 190, 'N_ref': 9.0e17, 'a': 0.65},
+    ('InAs', 'n'): {'mu_max': 34000, 'mu_min': 1000, 'N_ref': 1.1e18, 'a': 0.32},
+    ('InP', 'n'):  {'mu_max': 5200, 'mu_min': 400, 'N_ref': 3.0e17, 'a': 0.47},
+}
+
+# alpha(lambda in um) polynomial coefficients (1/cm at N_REF), lowest order first
+N_REF = 10.0e18
+ALPHA_FITS = {
+    'epi': (-168.5, 90.45, -3.59),
+    'sub': (22.0, 12.6, -2.59),
+}
+
+_cache = DispersionCache(maxsize=64)
+
+
+def refractive_index(lamda, material, doping, mobility=None, carrier='n'):
+    """
+    Drude free-carrier index n + ik of a doped Adachi host
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    material : str
+        Host semiconductor
+    doping : float or array_like
+        Carrier concentration(s) in cm^-3
+    mobility : float, array_like or None
+        Mobility in cm^2/Vs (None = Caughey-Thomas)
+    carrier : str
+        'n' or 'p'
+
+    Returns:
+    (ndoping, nlambda) complex array, shared and read-only
+    """
+    lamda = np.asarray(lamda, dtype=float)
+    doping = np.atleast_1d(np.asarray(doping, dtype=float))
+    mobility = caughey_thomas(material, doping, carrier) if mobility is None else \
+        np.broadcast_to(np.asarray(mobility, dtype=float), doping.shape)
+    key = (material, carrier, tuple(doping), tuple(mobility), grid_key(lamda))
+
+    def compute():
+        eps_host = Adachi.epsilon(lamda, material, 0.0)[0]
+        return np.sqrt(drude_epsilon(lamda, eps_host, doping, mobility,
+                                     effective_mass(material, carrier)))
+    return _cache.get(key, compute)
+
+
+def drude_epsilon(lamda, eps_host, doping, mobility, m_eff):
+    """
+    Host permittivity minus the Drude free-carrier term
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    eps_host : complex or array_like
+        Host permittivity on lamda
+    doping : array_like
+        Carrier concentration(s) in cm^-3
+    mobility : array_like
+        Mobility in cm^2/Vs, one per doping level
+    m_eff : float
+        Effective mass in units of m0
+
+    Returns:
+    (ndoping, nlambda) complex array
+    """
+    w = (2 * np.pi * C / np.asarray(lamda, dtype=float))[np.newaxis, :]
+    N = np.atleast_1d(np.asarray(doping, dtype=float))[:, np.newaxis] * 1e6
+    mu = np.atleast_1d(np.asarray(mobility, dtype=float))[:, np.newaxis] * 1e-4
+    m = m_eff * M0
+    gamma = Q / (m * mu)
+    return eps_host - N * Q**2 / (EPS0 * m * (w**2 + 1j * w * gamma))
+
+
+def empirical_k(lamda, doping, fit='epi'):
+    """
+    Extinction coefficient from an alpha(lambda) fit scaled linearly with doping
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    doping : float or array_like
+        Carrier concentration(s) in cm^-3
+    fit : str
+        Name in ALPHA_FITS
+
+    Returns:
+    (ndoping, nlambda) array
+    """
+    if fit not in ALPHA_FITS:
+        raise ValueError(f"No absorption fit '{fit}'. Available: {list(ALPHA_FITS.keys())}")
+    lamda = np.asarray(lamda, dtype=float)[np.newaxis, :]
+    doping = np.atleast_1d(np.asarray(doping, dtype=float))[:, np.newaxis]
+    alpha = np.polynomial.polynomial.polyval(lamda * 1e6, ALPHA_FITS[fit])
+    return (lamda * 1e2 / (4 * np.pi)) * alpha * (doping / N_REF)
+
+
+def caughey_thomas(material, doping, carrier='n'):
+    """Doping-dependent mobility (cm^2/Vs) for each doping level (cm^-3)"""
+    if (material, carrier) not in MOBILITY_PARAMS:
+        raise ValueError(f"No mobility model for {carrier}-type {material}; pass the mobility. "
+                         f"Available: {list(MOBILITY_PARAMS.keys())}")
+    p = MOBILITY_PARAMS[(material, carrier)]
+    doping = np.atleast_1d(np.asarray(doping, dtype=float))
+    return p['mu_min'] + (p['mu_max'] - p['mu_min']) / (1 + (doping / p['N_ref'])**p['a'])
+
+
+def effective_mass(material, carrier='n'):
+    if material not in EFFECTIVE_MASS or carrier not in EFFECTIVE_MASS[material]:
+        raise ValueError(f"No {carrier}-type effective mass for material '{material}'. "
+                         f"Available: {list(EFFECTIVE_MASS.keys())}")
+    return EFFECTIVE_MASS[material][carrier]
+
+
+def cache_stats():
+    """Return hit/miss counters of the free-carrier result cache"""
+    return _cache.stats()
+
+
+if __name__ == '__main__':
+    wavelengths = np.linspace(2e-6, 12e-6, 300)
+    N = refractive_index(wavelengths, 'GaAs', [1e17, 1e18, 1e19])
+    print(f"At {wavelengths[-1]*1e6:.1f} um: k = {N.imag[:, -1]}")
@@ -3,6 +3,18 @@
 NNN = []
 from numpy import *
 import LD   # import from "Lorentz_Drude_funcs.py"
+import BB   # Brendel-Bormann metals
+import Adachi   # Adachi MDF semiconductors
+import Alloys   # AlGaSb/AlAsSb composition tables
+import Air   # ambient gas dispersion
+import Gaussian   # Gaussian oscillator glasses and phonon bands
+import dispersion_bundle   # precomputed scripts/ models
+import KK   # Kramers-Kronig n from absorption-only sources
+import EMA   # effective-medium mixtures
+import Graded   # composition-graded layers
+import FreeCarrier   # doping-dependent free-carrier absorption
+import Berreman   # 4x4 engine for uniaxial layers
+import Thermal   # temperature-dependent dispersion
 import numpy as np
 def calc_Nlayer(layers, x, num_lay):
     try:
@@ -34,7 +46,8 @@ def calc_Nlayer(layers, x, num_lay):
             v2p=[layers[num_lay][2][0],layers[num_lay][2][1], layers[num_lay][2][2]]
             nnn=sqrt(v2p[0]+v2p[1]*(x*(1e-9))**2/((x*(1e-9))**2-v2p[2]**2))
             lmbd = 7.8e-6
-            kap = ((x*(1e-7))/(4*pi))*(-168.5 + 90.45*(x*(1e-3)) - 3.59*(x*(1e-3))**2)*((10.0e16)/(10.0e18))
+            doping = layers[num_lay][2][3] or 10.0e16  # cm^-3
+            kap = FreeCarrier.empirical_k(x*(1e-9), doping, 'epi')[0]
             # kap = ((x*(1e-9))/(4*pi))*(22.0 + 12.6*(x*(1e-9)) - 2.59*(x*(1e-9))**2)
             #kap = 0
             Nlay=nnn-1j*kap
@@ -43,7 +56,8 @@ def calc_Nlayer(layers, x, num_lay):
             v2p=[layers[num_lay][2][0],layers[num_lay][2][1], layers[num_lay][2][2]]
             nnn=sqrt(v2p[0]+v2p[1]*(x*(1e-9))**2/((x*(1e-9))**2-v2p[2]**2))
             lmbd = 7.8e-6
-            kap = ((x*(1e-7))/(4*pi))*(22.0 + 12.6*(x*(1e-3)) - 2.59*(x*(1e-3))**2)*((10.0e17)/(10.0e18))
+            doping = layers[num_lay][2][3] or 10.0e17  # cm^-3
+            kap = FreeCarrier.empirical_k(x*(1e-9), doping, 'sub')[0]
 
             #kap = ((x*(1e-9))/(4*pi))*(-168.5 + 90.45*(x*(1e-9)) - 3.59*(x*(1e-9))**2)
             #kap = 0
@@ -80,9 +94,85 @@ def calc_Nlayer(layers, x, num_lay):
             # Adjust RI delta parameters
             nnn = Metal.n + delta_n
             kap = Metal.k + delta_alpha
-            print(f"Updated n: {nnn}, Updated k: {kap}")
             Nlay = nnn - 1j*kap
-                
+
+        elif case == 'Brendel-Bormann':
+            v2p = materials  # metal name (e.g. 'Au') or BB parameter dict
+            Metal = BB.BB(x * 1e-9, v2p, delta_omega_p or 0.0, delta_f or 0.0,
+                          delta_gamma or 0.0, delta_omega or 0.0)
+            nnn = Metal.n + (delta_n or 0.0)
+            kap = Metal.k + (delta_alpha or 0.0)
+            Nlay = nnn - 1j*kap
+
+        elif case == 'Adachi':
+            v2p = [layers[num_lay][2][0], layers[num_lay][2][1]]  # material, alloy fraction x
+            N = Adachi.refractive_index(x * 1e-9, v2p[0], v2p[1] or 0.0)[0]
+            Nlay = N.real - 1j*N.imag
+
+        elif case == 'Alloy':
+            v2p = [layers[num_lay][2][0], layers[num_lay][2][1]]  # material (e.g. 'AlGaSb'), alloy fraction x
+            N = Alloys.refractive_index(x * 1e-9, v2p[0], v2p[1] or 0.0)[0]
+            Nlay = N.real - 1j*N.imag
+
+        elif case == 'Air':
+            v3p = [layers[num_lay][2][0], layers[num_lay][2][1], layers[num_lay][2][2]]  # T (K), p (Pa), H (%)
+            nnn = Air.refractive_index(x * 1e-9, T=v3p[0] or 288.15, p=v3p[1] or 101325, H=v3p[2] or 0)
+            Nlay = nnn - 1j*0.0
+
+        elif case == 'Gaussian-Oscillator':
+            v2p = materials  # material name (e.g. 'SiO2') or Gaussian parameter dict
+            Mat = Gaussian.Gaussian(x * 1e-9, v2p)
+            Nlay = Mat.n - 1j*Mat.k
+
+        elif case == 'Bundle':
+            v2p = materials  # script name in scripts/ (e.g. 'Bright 2012 - HfO2'); OutOfRangeError outside its range
+            nnn, kap = dispersion_bundle.load_bundle().nk(v2p, x * 1e-9)
+            Nlay = nnn - 1j*kap
+
+        elif case == 'Kramers-Kronig':
+            v3p = [layers[num_lay][2][0], layers[num_lay][2][1], layers[num_lay][2][2]]  # source, anchor λ (nm), anchor n
+            anchors = [(v3p[1] * 1e-9, v3p[2])] if v3p[1] else []
+            Mat = KK.KK(x * 1e-9, v3p[0], anchors)
+            Nlay = Mat.n - 1j*Mat.k
+
+        elif case == 'EMA':
+            v3p = [layers[num_lay][2][0], layers[num_lay][2][1], layers[num_lay][2][2]]  # [(n, k) or (case, params), ...], volume fractions, model
+            components = []
+            for comp in v3p[0]:
+                if isinstance(comp[0], str):  # (case, params): a layer model evaluated on this grid
+                    Ncomp = calc_Nlayer([[0, comp[0], list(comp[1])]], x, 0)
+                    comp = (Ncomp.real, -Ncomp.imag)
+                components.append(comp)
+            N = EMA.effective_index(components, v3p[1], v3p[2] or 'Bruggeman', size=x.size)
+            Nlay = N.real - 1j*abs(N.imag)
+
+        elif case == 'Free-Carrier':
+            v4p = [layers[num_lay][2][0], layers[num_lay][2][1], layers[num_lay][2][2], layers[num_lay][2][3]]  # host, doping (cm^-3), mobility (cm^2/Vs), carrier
+            N = FreeCarrier.refractive_index(x * 1e-9, v4p[0], v4p[1], v4p[2] or None, v4p[3] or 'n')[0]
+            Nlay = N.real - 1j*N.imag
+
+        elif case == 'Uniaxial':
+            # Isotropic view of a uniaxial layer (ordinary index); calc_rsrpTsTp uses Berreman.py
+            N = Berreman._uniaxial_index(materials, x)
+            Nlay = N.real - 1j*N.imag
+
+        elif case == 'Drude-T':
+            v5p = [layers[num_lay][2][0], layers[num_lay][2][1], layers[num_lay][2][2],
+                   layers[num_lay][2][3], layers[num_lay][2][4]]  # f_o, w_p (eV), G (eV) at room T, metal, T (K; room T if omitted)
+            N = Thermal.drude(x * 1e-9, v5p[0], v5p[1], v5p[2], v5p[3], v5p[4] or Thermal.T0_ROOM)[0]
+            Nlay = N.real - 1j*N.imag
+
+        elif case == 'Semiconductor-T':
+            v3p = [layers[num_lay][2][0], layers[num_lay][2][1], layers[num_lay][2][2]]  # material, alloy fraction x, T (K; 300 K if omitted)
+            N = Thermal.semiconductor_index(x * 1e-9, v3p[0], v3p[1] or 0.0, v3p[2] or Thermal.T0_SEMICONDUCTOR)[0]
+            Nlay = N.real - 1j*N.imag
+
+        elif case == 'Sellmeier-T':
+            v7p = list(layers[num_lay][2][:7])  # A, B, C (m), dA/dT, dB/dT, dC/dT (1/K), T (K; room T if omitted)
+            N = Thermal.sellmeier(x * 1e-9, v7p[0], v7p[1], v7p[2], v7p[6] or Thermal.T0_ROOM,
+                                  v7p[3] or 0.0, v7p[4] or 0.0, v7p[5] or 0.0)[0]
+            Nlay = N.real - 1j*N.imag
+
         elif case == 'Drude':
             v2p=[layers[num_lay][2][0],layers[num_lay][2][1],layers[num_lay][2][2]]   # f_o, w_o, G       
             ehbar = 1.519250349719305e+15 # e/hbar where hbar=h/(2*pi) and e=1.6e-19
@@ -110,6 +200,8 @@ def calc_Nlayer(layers, x, num_lay):
             return np.ones_like(x, dtype=complex)  # Default to air if invalid
         return Nlay
         
+    except dispersion_bundle.OutOfRangeError:
+        raise  # grid outside a bundle model's native range
     except Exception as e:
         print(f"Error calculating Nlayer: {e}")
         return np.ones_like(x, dtype=complex)  # Default to air if error
@@ -120,6 +212,20 @@ def calc_rsrpTsTp(incang, layers, x):
     x = np.asarray(x)
     if np.any(x <= 0):
         raise ValueError("Wavelength values must be positive")
+
+    # Composition grades enter the matrix product as homogeneous slices
+    layers = Graded.expand_layers(layers, x)
+
+    # Uniaxial layers need the 4x4 engine; isotropic stacks stay on the 2x2 kernel below
+    if Berreman.is_anisotropic(layers):
+        try:
+            return Berreman.calc_rsrpTsTp(incang, layers, x, calc_Nlayer)
+        except dispersion_bundle.OutOfRangeError:
+            raise
+        except Exception as e:
+            print(f"Error in calc_rsrpTsTp (4x4): {e}")
+            zeros = np.zeros(x.size, dtype=complex)
+            return zeros, zeros.copy(), zeros.copy(), zeros.copy()
     
     # Initialize all return arrays
     rs = np.zeros(x.size, dtype=complex)
@@ -221,6 +327,8 @@ def calc_rsrpTsTp(incang, layers, x):
                 Ts[ix] = 0
                 Tp[ix] = 0
                 
+    except dispersion_bundle.OutOfRangeError:
+        raise
     except Exception as e:
         print(f"Error in calc_rsrpTsTp: {e}")
     
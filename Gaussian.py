@@ -0,0 +1,131 @@
+"""
+Gaussian.py
+ This module calculates the dielectric function and complex refractive index
+ of glasses and phonon bands using the Kramers-Kronig consistent Gaussian
+ oscillator model, where the real part of each Gaussian absorption band is
+ given by the Dawson function. The parameter sets are those of
+ scripts/Kitamura 2007 - Fused silica.py and scripts/Le 2022 - InGaAs.py.
+
+ All oscillators are evaluated as one (noscillators x nlambda) array and the
+ result is cached per material and wavelength grid.
+
+    Example:
+
+    from Gaussian import Gaussian
+    import numpy as np
+    lamda = np.linspace(7E-6, 50E-6, 200)   # 7 um to 50 um
+    silica = Gaussian(lamda, material='SiO2')
+    print silica.n
+    print silica.k
+
+    As a layer of a stack:
+    [1000, "Gaussian-Oscillator", ['SiO2']]
+
+%   INPUT PARAMETERS:
+%
+%       lambda   ==> wavelength (meters) of light excitation on material. Numpy array
+%
+%       material ==>    'SiO2'   = fused silica (Kitamura 2007)
+%                       'InGaAs' = InGaAs phonon bands (Le 2022)
+%                       or a dict with the same keys as GAUSSIAN_PARAMS
+%
+%       Reference:
+%       Kitamura et al., Optical constants of silica glass from extreme
+%       ultraviolet to far infrared at near room temperature, Applied Optics (2007)
+%       Le et al., Optical Materials Express (2022)
+
+"""
+
+import numpy as np
+from scipy.special import dawsn
+
+from dispersion_cache import DispersionCache, grid_key
+
+# eps_inf and per-oscillator amplitude alpha, centre eta0 (1/cm) and FWHM sigma (1/cm)
+GAUSSIAN_PARAMS = {
+    'SiO2': {'eps_inf': 2.1232,
+             'alpha': [3.7998, .46089, 1.2520, 7.8147, 1.0313, 5.3757, 6.3305, 1.2948],
+             'eta0':  [1089.7, 1187.7, 797.78, 1058.2, 446.13, 443.00, 465.80, 1026.7],
+             'sigma': [31.454, 100.46, 91.601, 63.153, 275.111, 45.220, 22.680, 232.14]},
+    'InGaAs': {'eps_inf': 11.31,
+               'alpha': [18.65, 21.23, 10.13],
+               'eta0':  [225.31, 245.23, 254.14],
+               'sigma': [12.11, 23.08, 7.16]},
+}
+
+_cache = DispersionCache(maxsize=32)
+
+
+class Gaussian():
+    def __init__(self, lamda, material):
+        """
+        Initialize the material model
+
+        Parameters:
+        lamda : array_like
+            Wavelength(s) in meters
+        material : str or dict
+            Material name in GAUSSIAN_PARAMS or a parameter dict with the same keys
+        """
+        self.lamda = np.asarray(lamda, dtype=float)
+        self.material = material
+
+        params = self._get_material_params(material)
+        key = (tuple((name, tuple(np.atleast_1d(params[name]))) for name in
+                     ('eps_inf', 'alpha', 'eta0', 'sigma')), grid_key(self.lamda))
+        self.epsilon, self.refractive_index = _cache.get(key, lambda: self._calculate(params))
+
+        # Complex refractive index (n + ik)
+        self.n = self.refractive_index.real
+        self.k = self.refractive_index.imag
+        self.epsilon_real = self.epsilon.real
+        self.epsilon_imag = self.epsilon.imag
+
+    def _calculate(self, params):
+        epsilon = self.calculate_epsilon(params)
+        return epsilon, np.sqrt(epsilon)
+
+    def calculate_epsilon(self, params):
+        """Evaluate the Gaussian oscillator sum on the wavelength grid"""
+        # Wavenumber (1/cm) as a row vector against (nosc, 1) columns
+        eta = (1e-2 / self.lamda)[np.newaxis, :]
+        alpha = params['alpha'][:, np.newaxis]
+        eta0 = params['eta0'][:, np.newaxis]
+        sigma = params['sigma'][:, np.newaxis]
+
+        c = 4 * np.log(2)
+        gc = alpha * (np.exp(-c * ((eta - eta0) / sigma)**2) - np.exp(-c * ((eta + eta0) / sigma)**2))
+        D = dawsn(np.sqrt(c) * np.stack((eta + eta0, eta - eta0)) / sigma)
+        gckkg = 2 * alpha / np.sqrt(np.pi) * (D[0] - D[1])
+        return params['eps_inf'] + (gckkg + 1j * gc).sum(axis=0)
+
+    @staticmethod
+    def _get_material_params(material):
+        """Get Gaussian oscillator parameters as float arrays"""
+        if isinstance(material, str):
+            if material not in _GAUSSIAN_ARRAYS:
+                raise ValueError(f"No Gaussian oscillator parameters for material '{material}'. "
+                                 f"Available: {list(GAUSSIAN_PARAMS.keys())}")
+            return _GAUSSIAN_ARRAYS[material]
+        return _as_arrays(material)  # Assume parameters were passed directly
+
+
+def _as_arrays(params):
+    return {'eps_inf': float(params['eps_inf']),
+            'alpha': np.asarray(params['alpha'], dtype=float),
+            'eta0': np.asarray(params['eta0'], dtype=float),
+            'sigma': np.asarray(params['sigma'], dtype=float)}
+
+
+_GAUSSIAN_ARRAYS = {name: _as_arrays(p) for name, p in GAUSSIAN_PARAMS.items()}
+
+
+def cache_stats():
+    """Return hit/miss counters of the Gaussian oscillator result cache"""
+    return _cache.stats()
+
+
+if __name__ == '__main__':
+    wavelengths = np.linspace(7e-6, 50e-6, 300)
+    silica = Gaussian(wavelengths, 'SiO2')
+    print(f"At {wavelengths[0]*1e6:.1f} um: n = {silica.n[0]:.3f}, k = {silica.k[0]:.3e}")
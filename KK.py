@@ -0,0 +1,186 @@
+"""
+KK.py
+ This module reconstructs the refractive index n from the extinction
+ coefficient k (or the absorption coefficient alpha) with the Kramers-Kronig
+ relation. k is resampled onto a uniform frequency grid, extended as an odd
+ function of frequency and Hilbert transformed with one FFT, so the cost is
+ O(N log N) instead of the O(N^2) principal-value quadrature.
+
+ Because k is only known over a finite band, the reconstructed n is pinned to
+ one or more anchor points (subtractive KK). One anchor shifts n by a
+ constant, which is exactly the singly subtractive KK relation; m anchors add
+ a polynomial of degree m-1 in frequency^2 that stands for the absorption
+ outside the band.
+
+    Example:
+
+    from KK import KK
+    import numpy as np
+    lamda = np.linspace(2E-6, 12E-6, 100)   # 2 um to 12 um
+    gasb = KK(lamda, 'GaSb', anchors=[(4e-6, 3.816)])
+    print gasb.n
+    print gasb.k
+
+    As a layer of a stack (anchor wavelength in nm):
+    [1000, "Kramers-Kronig", ['GaSb', 4000, 3.816]]
+
+%   INPUT PARAMETERS:
+%
+%       lambda   ==> wavelength (meters) of light excitation on material. Numpy array
+%
+%       source   ==>    'GaSb'          = GaSb substrate absorption fit (plot_stack)
+%                       'Sellmeier-epi' = epi k polynomial of Funcs.calc_Nlayer
+%                       'Sellmeier-sub' = substrate k polynomial of Funcs.calc_Nlayer
+%                       or a dict {'wavelength': meters, 'k': ...} / {'wavelength': meters, 'alpha': 1/cm}
+%
+%       anchors  ==> list of (wavelength (meters), n) pairs
+%
+%       n_inf    ==> n far above the band, used only when no anchor is given
+
+"""
+
+import numpy as np
+
+import FreeCarrier
+from dispersion_cache import DispersionCache, grid_key
+
+_cache = DispersionCache(maxsize=32)
+
+
+def _gasb_alpha(um):
+    # GaSb free-carrier absorption fit (1/cm) used for the finite substrate in plot_stack
+    return 7.6 * (4.4 ** (0.3 * um - 2.8)) + 1.2
+
+
+def _epi_k(um):
+    return FreeCarrier.empirical_k(um * 1e-6, 10.0e16, 'epi')[0]
+
+
+def _sub_k(um):
+    return FreeCarrier.empirical_k(um * 1e-6, 10.0e17, 'sub')[0]
+
+
+# k(wavelength in um) of the absorption-only sources and the band (um) they are valid in
+ABSORPTION_MODELS = {
+    'GaSb': {'range': (2.0, 12.0), 'k': lambda um: _gasb_alpha(um) * um * 1e-4 / (4 * np.pi)},
+    'Sellmeier-epi': {'range': (2.0, 16.0), 'k': _epi_k},
+    'Sellmeier-sub': {'range': (2.0, 16.0), 'k': _sub_k},
+}
+
+
+def kramers_kronig(lamda, k, anchors=(), n_inf=1.0, npoints=8192):
+    """
+    Reconstruct n from k sampled on a wavelength grid
+
+    Parameters:
+    lamda : array_like
+        Wavelengths (meters) where k is known and n is returned
+    k : array_like
+        Extinction coefficient on lamda (zero is assumed outside)
+    anchors : sequence of (float, float)
+        (wavelength in meters, n) pairs the result is pinned to
+    n_inf : float
+        n far above the band, used only when anchors is empty
+    npoints : int
+        Size of the uniform frequency grid (the FFT uses twice as many points)
+
+    Returns:
+    n : ndarray
+    """
+    lamda = np.asarray(lamda, dtype=float)
+    k = np.asarray(k, dtype=float)
+    nu = 1.0 / lamda
+    order = np.argsort(nu)
+
+    # Uniform grid from zero to twice the top frequency, so the periodic
+    # FFT does not fold the band onto itself
+    nu_grid = np.linspace(0.0, 2.0 * nu.max(), npoints, endpoint=False)
+    k_grid = np.interp(nu_grid, nu[order], k[order], left=0.0, right=0.0)
+
+    # Odd extension k(-nu) = -k(nu) and Hilbert transform in the Fourier domain
+    k_ext = np.concatenate((k_grid, [0.0], -k_grid[:0:-1]))
+    H = np.fft.ifft(np.fft.fft(k_ext) * -1j * np.sign(np.fft.fftfreq(k_ext.size))).real
+    n_kk = lambda v: np.interp(v, nu_grid, -H[:npoints])
+
+    n = n_inf + n_kk(nu)
+    if len(anchors):
+        # Polynomial in nu^2 through the anchor residuals (subtractive KK)
+        nu_a = 1.0 / np.array([a[0] for a in anchors], dtype=float)
+        residual = np.array([a[1] for a in anchors], dtype=float) - n_kk(nu_a)
+        coeffs = np.linalg.solve(np.vander(nu_a**2, len(anchors), increasing=True), residual)
+        n = n_kk(nu) + np.polynomial.polynomial.polyval(nu**2, coeffs)
+    return n
+
+
+class KK():
+    def __init__(self, lamda, source, anchors=(), n_inf=1.0, npoints=8192):
+        """
+        Initialize the material model
+
+        Parameters:
+        lamda : array_like
+            Wavelength(s) in meters
+        source : str or dict
+            Name in ABSORPTION_MODELS or a tabulated {'wavelength', 'k' or 'alpha'} dict
+        anchors : sequence of (float, float)
+            (wavelength in meters, n) pairs, see kramers_kronig
+        n_inf : float
+            n far above the band when no anchor is given
+        npoints : int
+            Size of the uniform frequency grid
+        """
+        self.lamda = np.asarray(lamda, dtype=float)
+        self.source = source
+        self.anchors = tuple((float(a[0]), float(a[1])) for a in anchors)
+
+        table = self._get_source_table(source)
+        key = (grid_key(table[0]), grid_key(table[1]), self.anchors, n_inf, npoints,
+               grid_key(self.lamda))
+        self.refractive_index = _cache.get(
+            key, lambda: self._calculate(table, n_inf, npoints))
+
+        # Complex refractive index (n + ik)
+        self.n = self.refractive_index.real
+        self.k = self.refractive_index.imag
+
+    def _calculate(self, table, n_inf, npoints):
+        lamda, k = table
+        n = kramers_kronig(lamda, k, self.anchors, n_inf, npoints)
+
+        # Back onto the requested grid in frequency; k is zero outside its band
+        order = np.argsort(1.0 / lamda)
+        nu = 1.0 / self.lamda
+        n_out = np.interp(nu, 1.0 / lamda[order], n[order])
+        k_out = np.interp(nu, 1.0 / lamda[order], k[order], left=0.0, right=0.0)
+        return n_out + 1j * k_out
+
+    @staticmethod
+    def _get_source_table(source, npoints=2000):
+        """Return (wavelength in meters, k) of a named model or a tabulated dict"""
+        if isinstance(source, str):
+            if source not in ABSORPTION_MODELS:
+                raise ValueError(f"No absorption model '{source}'. "
+                                 f"Available: {list(ABSORPTION_MODELS.keys())}")
+            model = ABSORPTION_MODELS[source]
+            um = np.linspace(model['range'][0], model['range'][1], npoints)
+            return um * 1e-6, np.clip(model['k'](um), 0.0, None)
+
+        lamda = np.asarray(source['wavelength'], dtype=float)
+        if 'k' in source:
+            k = np.asarray(source['k'], dtype=float)
+        elif 'alpha' in source:
+            k = np.asarray(source['alpha'], dtype=float) * lamda * 1e2 / (4 * np.pi)
+        else:
+            raise ValueError("Tabulated KK source needs a 'k' or an 'alpha' (1/cm) column")
+        return lamda, k
+
+
+def cache_stats():
+    """Return hit/miss counters of the KK result cache"""
+    return _cache.stats()
+
+
+if __name__ == '__main__':
+    wavelengths = np.linspace(2e-6, 12e-6, 300)
+    gasb = KK(wavelengths, 'GaSb', anchors=[(4e-6, 3.816)])
+    print(f"At {wavelengths[-1]*1e6:.1f} um: n = {gasb.n[-1]:.4f}, k = {gasb.k[-1]:.3e}")
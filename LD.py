@@ -20,6 +20,17 @@ LD.py
     gold.plot_epsilon()
     gold.plot_n_k()
 
+    Tabulated data from refractiveindex.info, built offline from a local YAML snapshot:
+
+    import LD
+    LD.configure_database('refractive.db', yaml_folder='database')
+    gold_db = LD.LD(lamda, 'Au', model='DB')
+
+    Batched over delta sets, one (nsets x nlambda) array without LD objects:
+
+    import LD
+    N = LD.refractive_index(lamda, 'Au', delta_omega_p=np.linspace(-0.2, 0.2, 50))
+
 %   INPUT PARAMETERS:
 %
 %       lambda   ==> wavelength (meters) of light excitation on material. Numpy array
@@ -47,11 +58,80 @@ LD.py
 import numpy as np
 from refractivesqlite import dboperations as DB
 import os
+import threading
 import warnings
+from types import MappingProxyType
+
+from dispersion_cache import DispersionCache, grid_key
+
+TWOPIC = 1.883651567308853e+09  # 2*pi*c
+EHBAR = 1.519250349719305e+15    # e/hbar
+
+# refractiveindex.info SQLite database of the 'DB' model, opened on first use.
+# RII_DATABASE_FOLDER (or configure_database) points at an unpacked YAML
+# snapshot to build it offline instead of downloading.
+DB_PATH = "refractive.db"
+DB_YAML_FOLDER = os.environ.get("RII_DATABASE_FOLDER")
+_database = None
+_database_lock = threading.Lock()
+
+_cache = DispersionCache(maxsize=64)
+
+# Policies for DB wavelengths outside the tabulated range: raise, NaN,
+# hold the edge value, or extend the edge slope linearly
+OUT_OF_RANGE = ('raise', 'nan', 'clip', 'extrapolate')
+
+# Rakic 1998 LD parameters (eV). Index 0 is the Drude term (omega unused)
+LD_PARAMS = {
+    'Ag': {'omega_p': 9.01,
+           'f':     [0.845, 0.065, 0.124, 0.011, 0.840, 5.646],
+           'Gamma': [0.048, 3.886, 0.452, 0.065, 0.916, 2.419],
+           'omega': [0.000, 0.816, 4.481, 8.185, 9.083, 20.29]},
+    'Al': {'omega_p': 14.98,
+           'f':     [0.523, 0.227, 0.050, 0.166, 0.030],
+           'Gamma': [0.047, 0.333, 0.312, 1.351, 3.382],
+           'omega': [0.000, 0.162, 1.544, 1.808, 3.473]},
+    'Au': {'omega_p': 9.03,
+           'f':     [0.760, 0.024, 0.010, 0.071, 0.601, 4.384],
+           'Gamma': [0.053, 0.241, 0.345, 0.870, 2.494, 2.214],
+           'omega': [0.000, 0.415, 0.830, 2.969, 4.304, 13.32]},
+    'Be': {'omega_p': 18.51,
+           'f':     [0.084, 0.031, 0.140, 0.530, 0.130],
+           'Gamma': [0.035, 1.664, 3.395, 4.454, 1.802],
+           'omega': [0.000, 0.100, 1.032, 3.183, 4.604]},
+    'Cr': {'omega_p': 10.75,
+           'f':     [0.168, 0.151, 0.150, 1.149, 0.825],
+           'Gamma': [0.047, 3.175, 1.305, 2.676, 1.335],
+           'omega': [0.000, 0.121, 0.543, 1.970, 8.775]},
+    'Cu': {'omega_p': 10.83,
+           'f':     [0.575, 0.061, 0.104, 0.723, 0.638],
+           'Gamma': [0.030, 0.378, 1.056, 3.213, 4.305],
+           'omega': [0.000, 0.291, 2.957, 5.300, 11.18]},
+    'Ni': {'omega_p': 15.92,
+           'f':     [0.096, 0.100, 0.135, 0.106, 0.729],
+           'Gamma': [0.048, 4.511, 1.334, 2.178, 6.292],
+           'omega': [0.000, 0.174, 0.582, 1.597, 6.089]},
+    'Pd': {'omega_p': 9.72,
+           'f':     [0.330, 0.649, 0.121, 0.638, 0.453],
+           'Gamma': [0.008, 2.950, 0.555, 4.621, 3.236],
+           'omega': [0.000, 0.336, 0.501, 1.659, 5.715]},
+    'Pt': {'omega_p': 9.59,
+           'f':     [0.333, 0.191, 0.659, 0.547, 3.576],
+           'Gamma': [0.080, 0.517, 1.838, 3.668, 8.517],
+           'omega': [0.000, 0.780, 1.314, 3.141, 9.249]},
+    'Ti': {'omega_p': 7.29,
+           'f':     [0.148, 0.899, 0.393, 0.187, 0.001],
+           'Gamma': [0.082, 2.276, 2.518, 1.663, 1.762],
+           'omega': [0.000, 0.777, 1.545, 2.509, 19.43]},
+    'W':  {'omega_p': 13.22,
+           'f':     [0.206, 0.054, 0.166, 0.706, 2.590],
+           'Gamma': [0.064, 0.530, 1.281, 3.332, 5.836],
+           'omega': [0.000, 1.004, 1.917, 3.580, 7.498]},
+}
 
 class LD():
     def __init__(self, lamda, material, delta_omega_p=0, delta_f=0, 
-                 delta_gamma=0, delta_omega=0, model='LD'):
+                 delta_gamma=0, delta_omega=0, model='LD', out_of_range='raise'):
         """
         Initialize the material model
         
@@ -62,11 +142,13 @@ class LD():
             Material name (for DB model) or parameters (for LD/D model)
         model : str
             'DB' for database, 'LD' for Lorentz-Drude, 'D' for Drude
+        out_of_range : str
+            DB model only, see OUT_OF_RANGE: 'raise', 'nan', 'clip' or 'extrapolate'
         """
         self.lamda = np.asarray(lamda)
         self.material = material
         self.model = model
-        self.db_path = "refractive.db"
+        self.out_of_range = out_of_range
 
         # Delta parameters for adjustments
         self.delta_omega_p = delta_omega_p
@@ -74,41 +156,44 @@ class LD():
         self.delta_gamma = delta_gamma
         self.delta_omega = delta_omega
 
-        # Initialize database
-        self._init_database()
-
         # Physical constants
-        self.twopic = 1.883651567308853e+09  # 2*pi*c (c in nm/s)
-        self.ehbar = 1.519250349719305e+15    # e/hbar
+        self.twopic = TWOPIC
+        self.ehbar = EHBAR
         
-        # Calculate optical properties
-        if model == 'DB':
-            self.get_refractive_index_from_db()
-        elif model in ['LD', 'D']:
-            self.calculate_with_drude_lorentz()
-        else:
+        if model not in ('DB', 'LD', 'D'):
             raise ValueError(f"Invalid model '{model}'. Use 'DB', 'LD', or 'D'")
 
+        # Calculate optical properties, shared with every object of the same key
+        key = (self._material_key(material), model, delta_omega_p, delta_f,
+               delta_gamma, delta_omega, grid_key(self.lamda))
+        if model == 'DB':
+            key += (DB_PATH, out_of_range)
+        self.epsilon, self.refractive_index = _cache.get(key, self._calculate)
+
         # Complex refractive index and dielectric function
-        self.refractive_index = self.n + 1j*self.k
-        self.epsilon = self.refractive_index**2
+        self.n = self.refractive_index.real
+        self.k = self.refractive_index.imag
         self.epsilon_real = self.epsilon.real
         self.epsilon_imag = self.epsilon.imag
 
-    def _init_database(self):
-        """Initialize the refractiveindex.info database"""
-        if not os.path.exists(self.db_path):
-            warnings.warn("Downloading refractiveindex.info database (first-time setup)...")
-            try:
-                db = DB.Database(self.db_path)
-                db.create_database_from_url()
-                print("Database successfully downloaded.")
-            except Exception as e:
-                raise RuntimeError(f"Failed to initialize database: {str(e)}")
+    def _calculate(self):
+        if self.model == 'DB':
+            self.get_refractive_index_from_db()
+        else:
+            self.calculate_with_drude_lorentz()
+        refractive_index = self.n + 1j*self.k
+        return refractive_index**2, refractive_index
+
+    @staticmethod
+    def _material_key(material):
+        if isinstance(material, str):
+            return material
+        return tuple((name, tuple(np.atleast_1d(material[name])))
+                     for name in ('omega_p', 'f', 'Gamma', 'omega'))
 
     def get_refractive_index_from_db(self):
         """Get refractive index from refractiveindex.info database"""
-        db = DB.Database(self.db_path)
+        db = load_database()
         
         # Search for material in database
         results = db.search_pages(self.material, exact=True)
@@ -121,8 +206,17 @@ class LD():
                 f"Example available materials:\n{available_str}"
             )
             
+        # Pages with only extinction data (hasrefractive = 0) cannot give n
+        with_n = [r for r in results if r[5]]
+        if not with_n:
+            pages = ", ".join(f"{r[1]}/{r[2]}/{r[3]}" for r in results)
+            raise ValueError(
+                f"No refractive index data for material '{self.material}': "
+                f"its pages ({pages}) only tabulate the extinction coefficient"
+            )
+
         # For simplicity, use the first result (Rakic data when available)
-        preferred = [r for r in results if 'Rakic' in r[3]] or results
+        preferred = [r for r in with_n if 'Rakic' in r[3]] or with_n
         pageid = preferred[0][0]
         
         try:
@@ -130,81 +224,43 @@ class LD():
         except Exception as e:
             raise RuntimeError(f"Failed to load material data: {str(e)}")
         
-        # Convert wavelength from meters to microns for database lookup
+        # Tabulated (wavelength in microns, value) arrays, fetched once
         wavelength_microns = self.lamda * 1e6
-        
-        # Get n and k at specified wavelengths
-        self.n = np.zeros_like(wavelength_microns)
-        self.k = np.zeros_like(wavelength_microns)
-        
-        for i, wl in enumerate(wavelength_microns):
-            self.n[i] = mat.get_refractiveindex(wl)
-            self.k[i] = mat.get_extinctioncoefficient(wl)
+        table_n = np.asarray(mat.get_complete_refractive(), dtype=float)
+        table_k = np.asarray(mat.get_complete_extinction(), dtype=float) if mat.has_extinction() else None
+
+        # One vectorized interpolation over the whole grid; pages without k are taken as lossless
+        self.n = interpolate_table(table_n[:, 0], table_n[:, 1], wavelength_microns,
+                                   self.out_of_range)
+        if table_k is None:
+            self.k = np.zeros_like(self.n)
+        else:
+            self.k = interpolate_table(table_k[:, 0], table_k[:, 1], wavelength_microns,
+                                       self.out_of_range)
 
     def calculate_with_drude_lorentz(self):
         """Calculate using Drude-Lorentz model"""
         # Material parameters from Rakic papers
-        if isinstance(self.material, str):
-            material_params = self._get_material_params(self.material)
-        else:
-            material_params = self.material  # Assume parameters were passed directly
-            
-        omega_p = material_params['omega_p'] * self.ehbar
-        f = material_params['f']
-        Gamma = [g * self.ehbar for g in material_params['Gamma']]
-        omega = [o * self.ehbar for o in material_params['omega']]
-        
-        # Apply delta adjustments
-        omega_p += self.delta_omega_p * self.ehbar
-        f = [fi + self.delta_f for fi in f]
-        Gamma = [g + self.delta_gamma * self.ehbar for g in Gamma]
-        omega = [o + self.delta_omega * self.ehbar for o in omega]
-        
-        # Angular frequency of light (rad/s)
-        omega_light = self.twopic / self.lamda
-        
-        # Drude term
-        epsilon_D = 1 - (f[0] * omega_p**2 / 
-                        (omega_light**2 + 1j * Gamma[0] * omega_light))
-        
-        if self.model == 'D':
-            epsilon = epsilon_D
-        else:  # LD model
-            # Lorentz terms
-            epsilon_L = np.zeros_like(omega_light, dtype=complex)
-            for k in range(1, len(omega)):
-                epsilon_L += (f[k] * omega_p**2) / \
-                           (omega[k]**2 - omega_light**2 - 1j * Gamma[k] * omega_light)
-            epsilon = epsilon_D + epsilon_L
-        
+        material_params = self._get_material_params(self.material)
+
+        epsilon = drude_lorentz_epsilon(self.lamda, material_params, self.delta_omega_p,
+                                        self.delta_f, self.delta_gamma, self.delta_omega,
+                                        self.model)[0]
+
         # Complex refractive index (n + ik)
         self.refractive_index = np.sqrt(epsilon)
         self.n = self.refractive_index.real
         self.k = self.refractive_index.imag
 
-    def _get_material_params(self, material):
-        """Get Drude-Lorentz parameters for common materials"""
-        params = {
-            'Ag': {
-                'omega_p': 9.01,
-                'f': [0.845, 0.065, 0.124, 0.011, 0.840, 5.646],
-                'Gamma': [0.048, 3.886, 0.452, 0.065, 0.916, 2.419],
-                'omega': [0.000, 0.816, 4.481, 8.185, 9.083, 20.29]
-            },
-            'Au': {
-                'omega_p': 9.03,
-                'f': [0.760, 0.024, 0.010, 0.071, 0.601, 4.384],
-                'Gamma': [0.053, 0.241, 0.345, 0.870, 2.494, 2.214],
-                'omega': [0.000, 0.415, 0.830, 2.969, 4.304, 13.32]
-            },
-            # Add other materials as needed
-        }
-        
-        if material not in params:
-            raise ValueError(f"No Drude-Lorentz parameters for material '{material}'. "
-                           f"Available: {list(params.keys())}")
-        
-        return params[material]
+    @staticmethod
+    def _get_material_params(material):
+        """Get Drude-Lorentz parameters as read-only arrays in rad/s"""
+        if isinstance(material, str):
+            if material not in _LD_ARRAYS:
+                raise ValueError(f"No Drude-Lorentz parameters for material '{material}'. "
+                                 f"Available: {list(LD_PARAMS.keys())}")
+            return _LD_ARRAYS[material]
+        return _scaled_arrays(material)  # Assume parameters (eV) were passed directly
 
     def plot_epsilon(self):
         """Plot real and imaginary parts of dielectric function"""
@@ -257,6 +313,165 @@ class LD():
         plt.show()
 
 
+def configure_database(path=DB_PATH, yaml_folder=None):
+    """
+    Select the database file and the offline YAML snapshot it is built from
+
+    The shared database is reopened on the next 'DB' lookup.
+    """
+    global DB_PATH, DB_YAML_FOLDER, _database
+    with _database_lock:
+        DB_PATH, DB_YAML_FOLDER, _database = path, yaml_folder, None
+
+
+def load_database():
+    """Return the process-wide database, building refractive.db on first use if missing"""
+    global _database
+    with _database_lock:
+        if _database is None:
+            if not os.path.exists(DB_PATH):
+                _build_database(DB_PATH, DB_YAML_FOLDER)
+            _database = DB.Database(DB_PATH)
+        return _database
+
+
+def _build_database(path, yaml_folder):
+    db = DB.Database(path)
+    try:
+        if yaml_folder:
+            db.create_database_from_folder(yaml_folder)
+        else:
+            warnings.warn("Downloading refractiveindex.info database (first-time setup)...")
+            db.create_database_from_url()
+            print("Database successfully downloaded.")
+    except Exception as e:
+        if os.path.exists(path):
+            os.remove(path)  # do not leave a half-built file for the next call
+        raise RuntimeError(f"Failed to initialize database: {str(e)}")
+
+
+def interpolate_table(wavelengths, values, wl, out_of_range='raise'):
+    """
+    Linear interpolation of a tabulated page onto wl (same unit as wavelengths)
+
+    Parameters:
+    wavelengths, values : array_like
+        Tabulated data, any order
+    wl : array_like
+        Points to evaluate
+    out_of_range : str
+        Policy for wl outside the table, see OUT_OF_RANGE
+    """
+    if out_of_range not in OUT_OF_RANGE:
+        raise ValueError(f"Invalid out_of_range policy '{out_of_range}'. Use {list(OUT_OF_RANGE)}")
+    order = np.argsort(wavelengths)
+    wavelengths, values = np.asarray(wavelengths)[order], np.asarray(values)[order]
+    wl = np.asarray(wl, dtype=float)
+    outside = (wl < wavelengths[0]) | (wl > wavelengths[-1])
+
+    if out_of_range == 'raise' and outside.any():
+        raise ValueError(f"{outside.sum()} wavelength(s) between {wl[outside].min():.4g} and "
+                         f"{wl[outside].max():.4g} are outside the tabulated range "
+                         f"({wavelengths[0]:.4g}, {wavelengths[-1]:.4g})")
+    result = np.interp(wl, wavelengths, values)
+    if out_of_range == 'nan':
+        result[outside] = np.nan
+    elif out_of_range == 'extrapolate' and wavelengths.size > 1:
+        # Continue the slope of the first and last table intervals
+        below, above = wl < wavelengths[0], wl > wavelengths[-1]
+        slope_lo = (values[1] - values[0]) / (wavelengths[1] - wavelengths[0])
+        slope_hi = (values[-1] - values[-2]) / (wavelengths[-1] - wavelengths[-2])
+        result[below] = values[0] + slope_lo * (wl[below] - wavelengths[0])
+        result[above] = values[-1] + slope_hi * (wl[above] - wavelengths[-1])
+    return result
+
+
+def _scaled_arrays(params):
+    """Read-only rad/s arrays of an LD parameter dict given in eV"""
+    arrays = {'omega_p': float(params['omega_p']) * EHBAR,
+              'f': np.asarray(params['f'], dtype=float),
+              'Gamma': np.asarray(params['Gamma'], dtype=float) * EHBAR,
+              'omega': np.asarray(params['omega'], dtype=float) * EHBAR}
+    for name in ('f', 'Gamma', 'omega'):
+        arrays[name] = arrays[name][:, np.newaxis]  # (nosc, 1) columns against the grid
+        arrays[name].flags.writeable = False
+    return MappingProxyType(arrays)
+
+
+# Pre-scaled parameters, built once at import
+_LD_ARRAYS = MappingProxyType({name: _scaled_arrays(p) for name, p in LD_PARAMS.items()})
+
+
+def drude_lorentz_epsilon(lamda, material_params, delta_omega_p=0, delta_f=0,
+                          delta_gamma=0, delta_omega=0, model='LD'):
+    """
+    Drude or Lorentz-Drude dielectric function for one or more delta sets
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    material_params : mapping
+        Pre-scaled parameters from LD._get_material_params (rad/s)
+    delta_* : float or array_like
+        Adjustments added to omega_p, f, Gamma and omega (eV); arrays of equal
+        length give one parameter set each
+    model : str
+        'LD' or 'D'
+
+    Returns:
+    (nsets, nlambda) complex array
+    """
+    if model not in ('LD', 'D'):
+        raise ValueError(f"Invalid model '{model}'. Use 'LD' or 'D'")
+
+    # Angular frequency of light (rad/s) as a (1, 1, nlambda) row
+    omega_light = (TWOPIC / np.asarray(lamda, dtype=float))[np.newaxis, np.newaxis, :]
+
+    # Delta sets as (nsets, 1, 1) columns against the (nosc, 1) oscillators
+    deltas = np.broadcast_arrays(*(np.atleast_1d(np.asarray(d, dtype=float))
+                                   for d in (delta_omega_p, delta_f, delta_gamma, delta_omega)))
+    d_omega_p, d_f, d_gamma, d_omega = (d[:, np.newaxis, np.newaxis] for d in deltas)
+
+    omega_p = material_params['omega_p'] + d_omega_p * EHBAR
+    f = material_params['f'] + d_f
+    Gamma = material_params['Gamma'] + d_gamma * EHBAR
+    omega = material_params['omega'] + d_omega * EHBAR
+
+    # Drude term
+    epsilon = 1 - (f[:, 0] * omega_p[:, 0]**2 /
+                   (omega_light[:, 0]**2 + 1j * Gamma[:, 0] * omega_light[:, 0]))
+
+    if model == 'LD':
+        # Lorentz terms as (nsets, nosc, nlambda), summed over the oscillators
+        epsilon = epsilon + (f[:, 1:] * omega_p**2 /
+                             (omega[:, 1:]**2 - omega_light**2 - 1j * Gamma[:, 1:] * omega_light)).sum(axis=1)
+    return epsilon
+
+
+def refractive_index(lamda, material, delta_omega_p=0, delta_f=0, delta_gamma=0,
+                     delta_omega=0, model='LD'):
+    """
+    Complex refractive index n + ik (nsets, nlambda) for arrays of delta sets,
+    without building an LD object per set
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    material : str or dict
+        Metal name or Drude-Lorentz parameters (eV)
+    delta_* : float or array_like
+        Adjustments (eV), broadcast against each other
+    model : str
+        'LD' or 'D'
+    """
+    return np.sqrt(drude_lorentz_epsilon(lamda, LD._get_material_params(material), delta_omega_p,
+                                         delta_f, delta_gamma, delta_omega, model))
+
+def cache_stats():
+    """Return hit/miss counters of the LD result cache"""
+    return _cache.stats()
+
+
 if __name__ == '__main__':
     # Example usage
     wavelengths = np.linspace(200e-9, 2000e-9, 300)  # 200-2000 nm
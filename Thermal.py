@@ -0,0 +1,250 @@
+"""
+Thermal.py
+ This module makes the dispersion models temperature dependent for the 77 K
+ to 400 K range of our detectors and emitters. Every function takes a vector
+ of temperatures and returns (nT x nlambda) spectra from one batched
+ evaluation:
+
+   metals          Drude plasma frequency scaled with thermal volume
+                   expansion, wp(T) = wp(T0) / sqrt(1 + 3 alpha_L (T - T0)), and
+                   damping scaled with the Bloch-Grueneisen electron-phonon
+                   rate, Gamma(T) = Gamma_res + (Gamma(T0) - Gamma_res) BG(T) / BG(T0)
+   semiconductors  Varshni band gap Eg(T) = Eg(0) - a T^2 / (T + b); the room
+                   temperature dispersion is shifted rigidly in photon energy by
+                   Eg(T) - Eg(T0) (alloys interpolate the shift of their binaries)
+   dielectrics     Sellmeier with linear thermo-optic coefficients
+                   A(T) = A + dA/dT (T - T0), same for B and C
+
+    Example:
+
+    import Thermal
+    import numpy as np
+    lamda = np.linspace(2E-6, 12E-6, 100)   # 2 um to 12 um
+    T = np.array([77, 200, 300, 400])
+    N_gold = Thermal.lorentz_drude(lamda, 'Au', T)
+    N_gasb = Thermal.semiconductor_index(lamda, 'GaSb', 0.0, T)
+    print N_gold.shape, N_gasb.shape
+
+    As layers of a stack:
+    [50, "Drude-T", [f0, wp, gamma0, 'Au', 77]]
+    [1000, "Semiconductor-T", ['AlGaSb', 0.3, 77]]
+    [1000, "Sellmeier-T", [A, B, C, dA/dT, dB/dT, dC/dT, 77]]
+    An omitted (or 0) layer temperature means the reference temperature of
+    the model: T0_ROOM for Drude-T and Sellmeier-T, T0_SEMICONDUCTOR for
+    Semiconductor-T.
+
+%   INPUT PARAMETERS:
+%
+%       lambda   ==> wavelength (meters) of light excitation on material. Numpy array
+%
+%       T        ==> temperature(s) in K
+%
+%       Reference:
+%       I. Vurgaftman et al., Band parameters for III-V compound semiconductors
+%       and their alloys, J. Appl. Phys. 89, 5815 (2001)
+%       A. Alabastri et al., Molding of plasmonic resonances in metallic
+%       nanostructures: dependence of the non-linear electric permittivity on
+%       system size and temperature, Materials 6, 4879 (2013)
+
+"""
+
+import numpy as np
+
+import Alloys
+import LD
+
+# Reference temperatures of the tabulated models (K)
+T0_ROOM = 293.15
+T0_SEMICONDUCTOR = 300.0
+
+# hc in eV*m
+HC = 1.23984198e-06
+TWOPIC = LD.TWOPIC
+EHBAR = LD.EHBAR
+
+# Debye temperature (K) and linear thermal expansion coefficient (1/K)
+METAL_THERMAL = {
+    'Ag': {'theta_D': 225, 'alpha_L': 18.9e-6},
+    'Al': {'theta_D': 428, 'alpha_L': 23.1e-6},
+    'Au': {'theta_D': 165, 'alpha_L': 14.2e-6},
+    'Be': {'theta_D': 1440, 'alpha_L': 11.3e-6},
+    'Cr': {'theta_D': 630, 'alpha_L': 4.9e-6},
+    'Cu': {'theta_D': 343, 'alpha_L': 16.5e-6},
+    'Ni': {'theta_D': 450, 'alpha_L': 13.4e-6},
+    'Pd': {'theta_D': 274, 'alpha_L': 11.8e-6},
+    'Pt': {'theta_D': 240, 'alpha_L': 8.8e-6},
+    'Ti': {'theta_D': 420, 'alpha_L': 8.6e-6},
+    'W':  {'theta_D': 400, 'alpha_L': 4.5e-6},
+}
+
+# Varshni parameters of the direct gap: Eg(0) (eV), a (eV/K), b (K), Vurgaftman 2001
+VARSHNI_PARAMS = {
+    'GaAs': {'Eg0': 1.519, 'a': 0.5405e-3, 'b': 204},
+    'GaSb': {'Eg0': 0.812, 'a': 0.417e-3, 'b': 140},
+    'InAs': {'Eg0': 0.417, 'a': 0.276e-3, 'b': 93},
+    'InSb': {'Eg0': 0.235, 'a': 0.32e-3, 'b': 170},
+    'AlSb': {'Eg0': 2.386, 'a': 0.42e-3, 'b': 140},
+    'AlAs': {'Eg0': 3.099, 'a': 0.885e-3, 'b': 530},
+    'InP':  {'Eg0': 1.4236, 'a': 0.363e-3, 'b': 162},
+    'GaP':  {'Eg0': 2.886, 'a': 0.5771e-3, 'b': 372},
+}
+
+# Alloy -> (binary at x = 1, binary at x = 0), x as defined by Alloys/Adachi
+ALLOY_ENDPOINTS = {
+    'AlGaSb': ('AlSb', 'GaSb'),
+    'AlAsSb': ('AlAs', 'AlSb'),
+    'AlGaAs': ('AlAs', 'GaAs'),
+    'InAsSb': ('InAs', 'InSb'),
+    'InGaAs': ('GaAs', 'InAs'),
+}
+
+# Gauss-Legendre nodes for the Bloch-Grueneisen integral
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(64)
+
+
+def bloch_gruneisen(T, theta_D):
+    """Bloch-Grueneisen electron-phonon scattering rate (arbitrary units) for each T"""
+    T = np.atleast_1d(np.asarray(T, dtype=float))[:, np.newaxis]
+    z = theta_D / T
+    u = 0.5 * (_GL_NODES + 1)  # nodes on [0, 1]
+    s = z * u
+    integrand = s**5 * np.exp(s) / np.expm1(s)**2
+    return (T[:, 0] / theta_D)**5 * z[:, 0] * 0.5 * (integrand * _GL_WEIGHTS).sum(axis=1)
+
+
+def drude_parameters(omega_p, gamma, metal, T, gamma_res=0.0, T0=T0_ROOM):
+    """
+    Plasma frequency and damping at each temperature
+
+    Parameters:
+    omega_p, gamma : float
+        Values at T0 (any unit, returned in the same unit)
+    metal : str
+        Name in METAL_THERMAL
+    T : float or array_like
+        Temperature(s) in K
+    gamma_res : float
+        Temperature-independent (defect) part of gamma
+
+    Returns:
+    omega_p(T), gamma(T) : (nT,) arrays
+    """
+    if metal not in METAL_THERMAL:
+        raise ValueError(f"No thermal parameters for metal '{metal}'. "
+                         f"Available: {list(METAL_THERMAL.keys())}")
+    p = METAL_THERMAL[metal]
+    T = np.atleast_1d(np.asarray(T, dtype=float))
+    omega_p_T = omega_p / np.sqrt(1 + 3 * p['alpha_L'] * (T - T0))
+    ratio = bloch_gruneisen(T, p['theta_D']) / bloch_gruneisen(T0, p['theta_D'])
+    gamma_T = gamma_res + (gamma - gamma_res) * ratio
+    return omega_p_T, gamma_T
+
+
+def drude(lamda, f0, omega_p, gamma, metal, T, gamma_res=0.0):
+    """
+    Drude index n + ik (nT, nlambda) with temperature-scaled parameters
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    f0, omega_p, gamma : float
+        Drude strength, plasma frequency (eV) and damping (eV) at room temperature
+    metal : str
+        Name in METAL_THERMAL
+    T : float or array_like
+        Temperature(s) in K
+    """
+    w = (TWOPIC / np.asarray(lamda, dtype=float) / EHBAR)[np.newaxis, :]
+    wp, g = drude_parameters(omega_p, gamma, metal, T, gamma_res)
+    wp, g = wp[:, np.newaxis], g[:, np.newaxis]
+    return np.sqrt(1 - f0 * wp**2 / (w * (w + 1j * g)))
+
+
+def lorentz_drude(lamda, material, T, gamma_res=0.0):
+    """
+    Rakic Lorentz-Drude index n + ik (nT, nlambda) of a metal at each temperature
+
+    The plasma frequency of every term follows the thermal expansion and the
+    Drude damping follows the Bloch-Grueneisen rate.
+    """
+    if material not in LD.LD_PARAMS:
+        raise ValueError(f"No Drude-Lorentz parameters for material '{material}'. "
+                         f"Available: {list(LD.LD_PARAMS.keys())}")
+    params = LD.LD_PARAMS[material]
+    w = (TWOPIC / np.asarray(lamda, dtype=float) / EHBAR)[np.newaxis, np.newaxis, :]
+    wp, g0 = drude_parameters(params['omega_p'], params['Gamma'][0], material, T, gamma_res)
+    wp = wp[:, np.newaxis, np.newaxis]
+
+    f = np.asarray(params['f'], dtype=float)[:, np.newaxis]
+    Gamma = np.asarray(params['Gamma'], dtype=float)[1:, np.newaxis]
+    omega = np.asarray(params['omega'], dtype=float)[1:, np.newaxis]
+
+    epsilon = 1 - f[0] * wp[:, 0]**2 / (w[:, 0] * (w[:, 0] + 1j * g0[:, np.newaxis]))
+    epsilon = epsilon + (f[1:] * wp**2 / (omega**2 - w**2 - 1j * w * Gamma)).sum(axis=1)
+    return np.sqrt(epsilon)
+
+
+def varshni(material, T):
+    """Band gap (eV) at each temperature"""
+    if material not in VARSHNI_PARAMS:
+        raise ValueError(f"No Varshni parameters for material '{material}'. "
+                         f"Available: {list(VARSHNI_PARAMS.keys())}")
+    p = VARSHNI_PARAMS[material]
+    T = np.atleast_1d(np.asarray(T, dtype=float))
+    return p['Eg0'] - p['a'] * T**2 / (T + p['b'])
+
+
+def gap_shift(material, x, T, T0=T0_SEMICONDUCTOR):
+    """Band-gap shift Eg(T) - Eg(T0) (eV), linear in x between the binaries of an alloy"""
+    if material in ALLOY_ENDPOINTS:
+        a, b = ALLOY_ENDPOINTS[material]
+        return x * (varshni(a, T) - varshni(a, T0)) + (1 - x) * (varshni(b, T) - varshni(b, T0))
+    return varshni(material, T) - varshni(material, T0)
+
+
+def semiconductor_index(lamda, material, x, T):
+    """
+    Index n + ik (nT, nlambda) of an Alloys/Adachi semiconductor at each temperature
+
+    The room-temperature dispersion is evaluated once on the stacked grid of
+    photon energies shifted by the band-gap change of every temperature.
+    Raises a ValueError when a photon energy is not above the shift, where
+    the shifted energy would be zero or negative.
+    """
+    lamda = np.asarray(lamda, dtype=float)
+    dE = gap_shift(material, x, T)[:, np.newaxis]
+    E = HC / lamda[np.newaxis, :]
+    if np.any(E <= dE):
+        T = np.atleast_1d(np.asarray(T, dtype=float))
+        i = np.argmax(dE[:, 0])
+        raise ValueError(f"{material} at T = {T[i]:g} K shifts the gap by {dE[i, 0]:.4f} eV; "
+                         f"wavelengths must stay below {HC / dE[i, 0] * 1e6:.1f} um")
+    lamda_eff = HC / (E - dE)
+    N = Alloys.refractive_index(lamda_eff.ravel(), material, x)[0]
+    return N.reshape(lamda_eff.shape)
+
+
+def sellmeier(lamda, A, B, C, T, dA=0.0, dB=0.0, dC=0.0, T0=T0_ROOM):
+    """
+    Single-term Sellmeier index (nT, nlambda) with linear thermo-optic coefficients
+
+    Parameters:
+    lamda : array_like
+        Wavelength(s) in meters
+    A, B, C : float
+        Room-temperature coefficients of n^2 = A + B lamda^2 / (lamda^2 - C^2), C in meters
+    T : float or array_like
+        Temperature(s) in K
+    dA, dB, dC : float
+        Temperature derivatives of A, B and C (per K)
+    """
+    lamda = np.asarray(lamda, dtype=float)[np.newaxis, :]
+    dT = np.atleast_1d(np.asarray(T, dtype=float))[:, np.newaxis] - T0
+    return np.sqrt((A + dA * dT) + (B + dB * dT) * lamda**2 / (lamda**2 - (C + dC * dT)**2) + 0j)
+
+
+if __name__ == '__main__':
+    wavelengths = np.linspace(2e-6, 12e-6, 300)
+    T = np.array([77.0, 300.0, 400.0])
+    N = semiconductor_index(wavelengths, 'GaSb', 0.0, T)
+    print(f"GaSb n at {wavelengths[0]*1e6:.1f} um: {N.real[:, 0]}")
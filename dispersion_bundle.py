@@ -0,0 +1,288 @@
+"""
+dispersion_bundle.py
+ This module builds and reads a precomputed bundle of the literature
+ dispersion models in scripts/. Every script is run once in a process pool,
+ the n,k table it writes (out.txt or a refractiveindex.info YAML file) is
+ resampled onto one dense log-spaced wavelength grid, and all tables are
+ stored in a single uncompressed .npz together with an index of names and
+ native wavelength ranges.
+
+ The loader memory-maps the arrays of the .npz, so making every script model
+ available costs a file open instead of executing dozens of scripts, and
+ interpolates any set of materials on a wavelength grid in one vectorized step.
+
+    Example:
+
+    # build once (from the repository root)
+    python dispersion_bundle.py
+
+    from dispersion_bundle import load_bundle
+    import numpy as np
+    lamda = np.linspace(2E-6, 12E-6, 100)   # 2 um to 12 um
+    bundle = load_bundle()
+    n, k = bundle.nk('Bright 2012 - HfO2', lamda)
+
+    As a layer of a stack:
+    [1000, "Bundle", ['Bright 2012 - HfO2']]
+
+%   INPUT PARAMETERS:
+%
+%       lambda   ==> wavelength (meters) of light excitation on material. Numpy array
+%
+%       name     ==> script name without extension (see DispersionBundle.names)
+%
+%       Wavelengths outside the native range of a script raise an
+%       OutOfRangeError, a ValueError subclass (pass out_of_range='nan' to nk to get NaN there instead).
+
+"""
+
+import os
+import time
+import runpy
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts')
+BUNDLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'dispersion_bundle.npz')
+
+# Dense log-spaced grid (meters) shared by every table of the bundle
+GRID_MIN = 1e-8
+GRID_MAX = 1e-3
+GRID_POINTS = 8192
+
+_default_bundle = None
+
+
+def build_bundle(scripts_dir=SCRIPTS_DIR, path=BUNDLE_PATH, npoints=GRID_POINTS,
+                 lamda_min=GRID_MIN, lamda_max=GRID_MAX, processes=None):
+    """
+    Run every model script and store the resampled n,k tables in one .npz
+
+    Parameters:
+    scripts_dir : str
+        Folder with the literature model scripts
+    path : str
+        Output .npz file
+    npoints, lamda_min, lamda_max :
+        Size and range (meters) of the shared log-spaced grid
+    processes : int or None
+        Worker processes (None = number of CPUs)
+    """
+    start = time.perf_counter()
+    files = sorted(f for f in os.listdir(scripts_dir) if f.endswith('.py'))
+    grid = np.geomspace(lamda_min, lamda_max, npoints)
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        tables = list(pool.map(_run_script, [os.path.join(scripts_dir, f) for f in files]))
+
+    names, n, k, native = [], [], [], []
+    for filename, table in zip(files, tables):
+        if isinstance(table, str):
+            print("Skipped", filename + ":", table)
+            continue
+        lamda, nn, kk = table
+        names.append(os.path.splitext(filename)[0])
+        n.append(_resample(grid, lamda, nn))
+        k.append(_resample(grid, lamda, kk))
+        native.append((lamda[0], lamda[-1]))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Uncompressed so that the loader can memory-map every member
+    np.savez(path, names=np.array(names), wavelength=grid, n=np.array(n), k=np.array(k),
+             native_range=np.array(native))
+    print(f"Wrote {len(names)} of {len(files)} models to {path} "
+          f"in {time.perf_counter() - start:.1f} s")
+    return path
+
+
+def _run_script(script):
+    """Execute one model script in a scratch folder and return its (lamda, n, k) table"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    if not hasattr(np, 'complex'):  # alias removed in NumPy 1.24, still used by some scripts
+        np.complex = complex
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            runpy.run_path(script, run_name='__main__')
+            outputs = sorted(f for f in os.listdir(scratch) if f == 'out.txt' or f.endswith('.yml'))
+            if not outputs:
+                return "no n,k table written"
+            return _read_table(os.path.join(scratch, outputs[0]))
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+        finally:
+            os.chdir(cwd)
+            plt.close('all')
+
+
+def _read_table(filename):
+    """Parse the numeric 'wavelength(um) n [k]' rows of an out.txt or YAML table"""
+    rows = []
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) not in (2, 3):
+                continue
+            try:
+                rows.append([float(v) for v in fields] + [0.0] * (3 - len(fields)))
+            except ValueError:
+                continue
+    if not rows:
+        return "n,k table is empty"
+    table = np.array(rows)
+    table = table[np.argsort(table[:, 0])]
+    return table[:, 0] * 1e-6, table[:, 1], table[:, 2]
+
+
+def _resample(grid, lamda, values):
+    """Interpolate a native table onto the shared grid in log(wavelength); NaN outside"""
+    return np.interp(np.log(grid), np.log(lamda), values, left=np.nan, right=np.nan)
+
+
+class OutOfRangeError(ValueError):
+    """Wavelengths outside the native range of a bundle script"""
+
+
+class DispersionBundle():
+    def __init__(self, path=BUNDLE_PATH):
+        """
+        Memory-map a bundle written by build_bundle
+
+        Parameters:
+        path : str
+            Bundle .npz file
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Dispersion bundle '{path}' not found. "
+                                    f"Build it with 'python dispersion_bundle.py'")
+        self.path = path
+        arrays = _memmap_npz(path)
+        self.names = [str(name) for name in arrays['names']]
+        self.wavelength = arrays['wavelength']
+        self.native_range = arrays['native_range']
+        self._n = arrays['n']
+        self._k = arrays['k']
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+        # Uniform step of the log grid
+        self._log0 = np.log(self.wavelength[0])
+        self._dlog = (np.log(self.wavelength[-1]) - self._log0) / (len(self.wavelength) - 1)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def rows(self, names):
+        """Return the bundle row indices of one name or a list of names"""
+        names = [names] if isinstance(names, str) else list(names)
+        missing = [name for name in names if name not in self._index]
+        if missing:
+            raise ValueError(f"Materials {missing} are not in the dispersion bundle. "
+                             f"Available: {self.names}")
+        return np.array([self._index[name] for name in names])
+
+    def nk(self, names, lamda, out_of_range='raise'):
+        """
+        Interpolate n and k of one or several materials
+
+        Parameters:
+        names : str or list of str
+            Script names
+        lamda : array_like
+            Wavelength(s) in meters
+        out_of_range : str
+            'raise' (ValueError naming the native range) or 'nan' for
+            wavelengths outside the native range of a script
+
+        Returns:
+        (n, k) : arrays of shape (nlambda,) for one name or (nnames, nlambda)
+        """
+        if out_of_range not in ('raise', 'nan'):
+            raise ValueError(f"Unknown out_of_range '{out_of_range}'. Available: ['raise', 'nan']")
+        lamda = np.asarray(lamda, dtype=float)
+        rows = self.rows(names)
+        native = self.native_range[rows]
+        if out_of_range == 'raise':
+            self._check_range(rows, lamda)
+        rows = rows[:, np.newaxis]
+
+        # One set of grid indices and weights for every material
+        t = (np.log(lamda) - self._log0) / self._dlog
+        i = np.clip(np.floor(t).astype(int), 0, len(self.wavelength) - 2)
+        w = t - i
+        outside = (lamda < native[:, :1]) | (lamda > native[:, 1:])
+
+        n = _interp_cell(self._n[rows, i], self._n[rows, i + 1], w)
+        k = _interp_cell(self._k[rows, i], self._k[rows, i + 1], w)
+        n[outside] = np.nan
+        k[outside] = np.nan
+        if isinstance(names, str):
+            return n[0], k[0]
+        return n, k
+
+    def _check_range(self, rows, lamda):
+        """Raise an OutOfRangeError if lamda leaves the native range of any row"""
+        if lamda.size == 0:
+            return
+        for row in rows:
+            lo, hi = self.native_range[row]
+            if lamda.min() < lo or lamda.max() > hi:
+                raise OutOfRangeError(f"Wavelengths {lamda.min()*1e6:.4g}-{lamda.max()*1e6:.4g} um are outside "
+                                 f"the native range {lo*1e6:.4g}-{hi*1e6:.4g} um of bundle "
+                                 f"model '{self.names[row]}'")
+
+    def refractive_index(self, names, lamda, out_of_range='raise'):
+        """Complex refractive index n + ik, see nk"""
+        n, k = self.nk(names, lamda, out_of_range)
+        return n + 1j * k
+
+
+def _interp_cell(left, right, w):
+    """Linear interpolation inside one grid cell; a cell at the edge of a native
+    range has one NaN neighbour and takes the other value"""
+    value = left * (1 - w) + right * w
+    value = np.where(np.isnan(left), right, value)
+    return np.where(np.isnan(right), left, value)
+
+
+def _memmap_npz(path):
+    """Memory-map the members of an uncompressed .npz (np.load ignores mmap_mode for archives)"""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(archive.open(info))
+                continue
+            # Skip the local file header to reach the .npy payload
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(f.read(4), dtype='<u2')
+            f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+            version = np.lib.format.read_magic(f)
+            read_header = {(1, 0): np.lib.format.read_array_header_1_0,
+                           (2, 0): np.lib.format.read_array_header_2_0}.get(version)
+            if read_header is None:  # no public header reader for this .npy version
+                arrays[name] = np.load(archive.open(info))
+                continue
+            shape, fortran_order, dtype = read_header(f)
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                     order='F' if fortran_order else 'C')
+    return arrays
+
+
+def load_bundle(path=BUNDLE_PATH):
+    """Return the process-wide bundle, memory-mapping it on first use"""
+    global _default_bundle
+    if _default_bundle is None or _default_bundle.path != path:
+        _default_bundle = DispersionBundle(path)
+    return _default_bundle
+
+
+if __name__ == '__main__':
+    build_bundle()
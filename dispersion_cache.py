@@ -0,0 +1,108 @@
+"""
+dispersion_cache.py
+ Small shared cache for dispersion models. Results are keyed by the model
+ parameters together with a fingerprint of the wavelength grid, so that
+ redrawing the same stack on the same grid reuses the complex index
+ instead of recomputing it.
+
+    Example:
+
+    from dispersion_cache import DispersionCache, grid_key
+    cache = DispersionCache(maxsize=32)
+    N = cache.get(('Au', grid_key(x)), lambda: expensive_model(x))
+    print(cache.stats())
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+
+def grid_key(x):
+    """
+    Return a hashable fingerprint of a wavelength grid
+
+    Parameters:
+    x : array_like
+        Wavelength grid (any unit)
+    """
+    x = np.ascontiguousarray(x, dtype=float)
+    return (x.size, hash(x.tobytes()))
+
+
+def _freeze(value):
+    """Mark cached arrays read-only so shared results cannot be mutated"""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, tuple):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+class DispersionCache():
+    def __init__(self, maxsize=64):
+        """
+        Bounded least-recently-used cache of computed dispersions
+
+        Parameters:
+        maxsize : int
+            Maximum number of entries kept before the oldest is evicted
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Return the cached value for key, calling compute() on a miss
+
+        Arrays in the returned value are shared and read-only.
+        """
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+
+        return self.put(key, compute())
+
+    def lookup(self, key, default=None):
+        """Return the cached value for key, or default on a miss"""
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store value under key (arrays are made read-only) and return it"""
+        value = _freeze(value)
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._data), 'maxsize': self.maxsize}
+
+    def __len__(self):
+        return len(self._data)
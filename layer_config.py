@@ -6,6 +6,7 @@ from ttkbootstrap.constants import *
 from utils import *
 import time  
 import Funcs as MF
+import Adachi
 from tkinter import ttk, messagebox
 import numpy as np
 from scipy.interpolate import RegularGridInterpolator
@@ -1846,11 +1847,19 @@ class LayerConfig:
                     # Get material properties from the layer's input frame
                     material_properties = self._get_material_properties(layer)
                     
-                    # Add each material component based on composition percentage
-                    for mat_type, n, k, percent in material_properties:
-                        if percent > 0:  # Only add if composition percentage > 0
-                            sublayer_thickness = thickness * (percent / 100)
-                            manual_layers.append([sublayer_thickness, "Constant", [n, k]])
+                    # Mix the material components by composition percentage in one
+                    # effective-medium layer instead of stacking thinner sublayers.
+                    # Components are (case, params) layer models, so calc_Nlayer
+                    # evaluates them on whatever wavelength grid the simulation uses
+                    components = [(spec, percent) for mat_type, spec, percent in material_properties
+                                  if percent > 0]  # Only add if composition percentage > 0
+                    if len(components) == 1:
+                        case, params = components[0][0]
+                        manual_layers.append([thickness, case, list(params)])
+                    elif components:
+                        manual_layers.append([thickness, "EMA", [[spec for spec, _ in components],
+                                                                 [percent for _, percent in components],
+                                                                 'Bruggeman']])
                 except ValueError:
                     print(f"Warning: Invalid thickness entry. Skipping this layer.")
                     continue
@@ -1975,9 +1984,9 @@ class LayerConfig:
                             except ValueError:
                                 composition = 0
                     
-                    # Get refractive indices based on material and composition
-                    n, k = self._get_semiconductor_refractive_index(material, composition, wavelength_nm=global_wavelength_array)
-                    properties.append(("Semiconductor", n, k, composition))
+                    # Dispersion model of the material and composition
+                    spec = self._get_semiconductor_refractive_index(material, composition)
+                    properties.append(("Semiconductor", spec, composition))
                     
                 elif material_type == "Metal":
                     # Get metal properties
@@ -1988,7 +1997,7 @@ class LayerConfig:
                     
                     # Get metal optical constants
                     n, k = self._get_metal_refractive_index(metal)
-                    properties.append(("Metal", n, k, composition))
+                    properties.append(("Metal", ("Constant", [n, k]), composition))
                     
                 elif material_type == "Dielectric":
                     # Get dielectric properties
@@ -2004,346 +2013,60 @@ class LayerConfig:
                     try:
                         n = float(n_entry.get()) if n_entry else 1.0
                         k = float(k_entry.get()) if k_entry else 0.0
-                        properties.append(("Dielectric", n, k, 100))  # 100% composition
+                        properties.append(("Dielectric", ("Constant", [n, k]), 100))  # 100% composition
                     except ValueError:
                         print("Warning: Invalid dielectric constants - using n=1.0, k=0.0")
-                        properties.append(("Dielectric", 1.0, 0.0, 100))
+                        properties.append(("Dielectric", ("Constant", [1.0, 0.0]), 100))
         
         return properties
 
-    def _get_semiconductor_refractive_index(self, material, composition, wavelength_nm):
+    def _get_semiconductor_refractive_index(self, material, composition, temperature=None):
       
-        """Return refractive index (n,k) for semiconductor materials with composition dependence"""
+        """Return the (case, params) layer model of a semiconductor with composition dependence.
+        calc_Nlayer evaluates it on the simulation grid through the cached engines"""
         # Convert composition percentage to fraction (0-1)
         x = composition / 100.0
+
+        if temperature is not None and material in self.THERMAL_SEMICONDUCTORS:
+            # Varshni-shifted dispersion at temperature (K)
+            return ("Semiconductor-T", [material, x, temperature])
         
         if material == "GaAs":
-            # Pure GaAs from Adachi 1989
-            return (3.3, 0.0)  # n=3.3, k=0 at ~2.0 eV
+            # Pure GaAs from Adachi 1989 (model dielectric function, cached per grid)
+            return ("Adachi", ["GaAs", 0.0])
             
         elif material == "AlGaAs":
-            # Calculate Al(x)Ga(1-x)As refractive index 
-            # Using data from batop.de (https://batop.de/information/n_AlGaAs.html#), with linear interpolation between points
-            # Create wavelength array (from 2 µm to 16 µm, 10 nm step)
-            if x < 0 or x > 1:
-                raise ValueError("Aluminum fraction x must be between 0 and 1.")
-
-            wl = np.array(wavelength_nm) 
-            energy_eV = 1239.84 / wl  # Convert wavelength to energy
-
-            # Calculate energy gap
-            if x > 0.45:
-                energy_gap = 1.9 + 0.125 * x + 0.143 * x**2
-            else:
-                energy_gap = 1.422 + 1.2475 * x
-
-            # Identify where absorption occurs
-            absorbing = energy_eV >= energy_gap
-
-            # Intermediate chi terms
-            chi = energy_eV / (1.425 + 1.155 * x + 0.37 * x**2)
-            chio = energy_eV / (1.765 + 1.115 * x + 0.37 * x**2)
-
-            # Avoid invalid sqrt of (1 - chi), clip inside [-1, 1] range
-            chi = np.clip(chi, -0.999, 0.999)
-            chio = np.clip(chio, -0.999, 0.999)
-
-            # f and fo terms
-            f = (2 - np.sqrt(1 + chi) - np.sqrt(1 - chi)) / (chi**2)
-            fo = (2 - np.sqrt(1 + chio) - np.sqrt(1 - chio)) / (chio**2)
-
-            # Bruch coefficient
-            bruch = 0.5 * np.sqrt(
-                ((1.425 + 1.155 * x + 0.37 * x**2) /
-                (1.765 + 1.115 * x + 0.37 * x**2)) ** 3
-            )
-
-            # Final refractive index
-            n_squared_term = (6.3 + 19.0 * x) * (f + bruch * fo) + (9.4 - 10.2 * x)
-            n = np.sqrt(n_squared_term)
-
-            # Set k = 0 for non-absorbing regions, or NaN if absorbing
-            k = np.zeros_like(n)
-            n[absorbing] = np.nan  # or optionally keep as-is
-            k[absorbing] = np.nan  # if you want to mark absorbing wavelengths
-
-            return (n, k)
+            # Al(x)Ga(1-x)As from Adachi 1989, parameters interpolated in x
+            x_min, x_max = Adachi.composition_range("AlGaAs")
+            if x < x_min or x > x_max:
+                raise ValueError(f"Aluminum fraction x must be between {x_min} and {x_max}.")
+            return ("Adachi", ["AlGaAs", x])
 
         elif material == "GaSb":
             # Pure GaSb from Adachi 1989
-            return (3.8, 0.0)  # n=3.8 at ~1.5 eV
+            return ("Adachi", ["GaSb", 0.0])
             
         elif material == "AlAsSb":
             # AlAs(x)Sb(1-x) refractive index with wavelength dependence
             # Using multiple empirical relations from Gupta, Moss, Herve, Ravindra, and Reddy
-            
-            wl = np.array(wavelength_nm) 
-            
-            # Calculate energy in eV
-            energy_eV = 1239.84 / wl  # hc/E conversion
-            
-            # Bandgap calculation for AlAsSb (from https://www.sciencedirect.com/science/article/pii/S0749603613000931)
-            Eg = 1.615 * x + 0.73 * (1-x) - 0.5 * x * (1-x)  # Vegard's law with bowing
-            
-            # Initialize arrays
-            n_vals = np.zeros_like(wl)
-            k_vals = np.zeros_like(wl)
-            
-            # Apply all empirical relations
-            for i, (wl_i, E_i) in enumerate(zip(wl, energy_eV)):
-                # Gupta and Ravindra relation
-                n_gupta = 4.084 - 0.62 * Eg
-                
-                # Moss formula (n^4 Eg = k, where k ≈ 95 is typical)
-                n_moss = (95 / Eg)**0.25 if Eg > 0 else n_gupta
-                
-                # Herve and Vandamme
-                n_herve = np.sqrt(1 + (13.6/(Eg + 3.4))**2)
-                
-                # Ravindra relation
-                n_ravindra = 4.16 - 0.85 * Eg
-                
-                # Reddy and Ahammed
-                n_reddy = ((154/(Eg - 0.365)))**0.25 if Eg > 0.365 else n_gupta
-                
-                # Take average of all valid relations
-                valid_estimates = [n for n in [n_gupta, n_moss, n_herve, n_ravindra, n_reddy] if not np.isnan(n)]
-                n_vals[i] = np.mean(valid_estimates) if valid_estimates else 3.5  # fallback
-                
-                # Calculate k if above bandgap
-                if E_i >= Eg:
-                    # Simple approximation for absorption coefficient
-                    alpha = 1e4 * np.sqrt(E_i - Eg)  # cm^-1
-                    k_vals[i] = (alpha * wl_i * 1e-7) / (4 * np.pi)
-                else:
-                    k_vals[i] = 0.0
-            
-            # Return as tuple (n, k)
-            if len(n_vals) == 1:
-                return (float(n_vals[0]), float(k_vals[0]))
-            return (n_vals, k_vals)
-
-        elif material == "InSb":
-            # From the first dataset you provided (Mikhail Polyanskiy)
-            # At ~1.5 eV (827 nm)
-            n, k = 3.8, 0.0
-            return(n,k)
-           
-        elif material == "AlSb":
-            # From the second dataset you provided (Mikhail Polyanskiy)
-            # At ~2.0 eV (620 nm)
-            n, k = 3.1, 0.0
-            return(n,k)
-
-        elif material == "InAs":
-            # From the third dataset you provided (Mikhail Polyanskiy)
-            # At ~1.5 eV (827 nm)
-            n, k = 3.5, 0.0
-            return(n,k)
+            return ("Alloy", ["AlAsSb", x])
+
+        elif material in ("InSb", "AlSb", "InAs"):
+            # Adachi 1989 (InSb, InAs) and Adachi 1990 (AlSb)
+            return ("Adachi", [material, 0.0])
+
         elif material == "InAsSb":
-            # For InAs(x)Sb(1-x), interpolate between InAs and InSb
+            # InAs(x)Sb(1-x), Adachi parameters interpolated between InSb and InAs
+            return ("Adachi", ["InAsSb", x])
 
-                x = composition / 100.0
-                # InSb (x=0) parameters
-                n_InSb = 3.8
-                k_InSb = 0.0
-                
-                # InAs (x=1) parameters
-                n_InAs = 3.5
-                k_InAs = 0.0
-                
-                # Linear interpolation
-                n = n_InSb + (n_InAs - n_InSb) * x
-                k = k_InSb + (k_InAs - k_InSb) * x
-                return (n, k)
         elif material == "AlGaSb":
             # data from R. Ferrini et al., Optical functions from 0.02 to 6 eV of AlxGa1-xSb/GaSb epitaxial layers
-            # Al(x)Ga(1-x)Sb implementation based on provided data
-            # We'll implement two approaches:
-            # 1. For energies below E0 (fundamental gap): Use Sellmeier equation
-            # 2. For energies above E0: Use interpolation of tabulated data
-
-            wavelength_um_array = wavelength_nm / 1000.0
-
-            energy_eV_array = 1.2398 / wavelength_um_array
-
-            # Output arrays
-            n_array = np.zeros_like(energy_eV_array)
-            k_array = np.zeros_like(energy_eV_array)
-
-            data_points = [
-                    # x=0.0 (GaSb)
-                    [0.0, 0.5, 3.846, 0.0],
-                    [0.0, 0.6, 3.878, 0.0],
-                    [0.0, 0.7, 3.959, 0.023],
-                    [0.0, 0.8, 4.010, 0.125],
-                    [0.0, 0.9, 4.026, 0.145],
-                    [0.0, 1.0, 4.050, 0.173],
-                    [0.0, 1.1, 4.096, 0.201],
-                    [0.0, 1.2, 4.140, 0.225],
-                    [0.0, 1.3, 4.200, 0.268],
-                    [0.0, 1.4, 4.270, 0.299],
-                    [0.0, 1.5, 4.370, 0.338],
-                    [0.0, 1.6, 4.500, 0.407],
-                    [0.0, 1.7, 4.644, 0.514],
-                    [0.0, 1.8, 4.822, 0.647],
-                    [0.0, 1.9, 5.037, 0.881],
-                    [0.0, 2.0, 5.197, 1.465],
-                    [0.0, 2.1, 4.630, 1.843],
-                    [0.0, 2.2, 4.470, 1.770],
-                    [0.0, 2.3, 4.455, 1.812],
-                    [0.0, 2.4, 4.464, 2.000],
-                    [0.0, 2.5, 4.235, 2.289],
-                    [0.0, 2.6, 3.946, 2.268],
-                    [0.0, 2.7, 3.816, 2.190],
-                    [0.0, 2.8, 3.755, 2.148],
-                    [0.0, 2.9, 3.740, 2.116],
-                    [0.0, 3.0, 3.751, 2.119],
-                    # x=0.1
-                    [0.1, 0.5, 3.765, 0.0],
-                    [0.1, 0.6, 3.781, 0.0],
-                    [0.1, 0.7, 3.807, 0.0],
-                    [0.1, 0.8, 3.861, 0.014],
-                    [0.1, 0.9, 3.942, 0.094],
-                    [0.1, 1.0, 3.952, 0.125],
-                    [0.1, 1.1, 3.983, 0.148],
-                    [0.1, 1.2, 4.031, 0.162],
-                    [0.1, 1.3, 4.110, 0.184],
-                    [0.1, 1.4, 4.183, 0.217],
-                    [0.1, 1.5, 4.262, 0.268],
-                    [0.1, 1.6, 4.393, 0.309],
-                    [0.1, 1.7, 4.529, 0.372],
-                    [0.1, 1.8, 4.697, 0.487],
-                    [0.1, 1.9, 4.917, 0.675],
-                    [0.1, 2.0, 5.154, 1.025],
-                    [0.1, 2.1, 5.087, 1.729],
-                    [0.1, 2.2, 4.568, 1.804],
-                    [0.1, 2.3, 4.483, 1.792],
-                    [0.1, 2.4, 4.461, 1.897],
-                    [0.1, 2.5, 4.425, 2.142],
-                    [0.1, 2.6, 4.100, 2.327],
-                    [0.1, 2.7, 3.893, 2.247],
-                    [0.1, 2.8, 3.804, 2.200],
-                    [0.1, 2.9, 3.768, 2.181],
-                    [0.1, 3.0, 3.758, 2.164],
-                    # x=0.3
-                    [0.3, 0.5, 3.637, 0.0],
-                    [0.3, 0.6, 3.645, 0.0],
-                    [0.3, 0.7, 3.657, 0.0],
-                    [0.3, 0.8, 3.674, 0.0],
-                    [0.3, 0.9, 3.702, 0.0],
-                    [0.3, 1.0, 3.751, 0.0],
-                    [0.3, 1.1, 3.863, 0.033],
-                    [0.3, 1.2, 3.906, 0.075],
-                    [0.3, 1.3, 3.946, 0.109],
-                    [0.3, 1.4, 4.015, 0.125],
-                    [0.3, 1.5, 4.106, 0.133],
-                    [0.3, 1.6, 4.249, 0.174],
-                    [0.3, 1.7, 4.373, 0.240],
-                    [0.3, 1.8, 4.515, 0.361],
-                    [0.3, 1.9, 4.679, 0.497],
-                    [0.3, 2.0, 4.853, 0.674],
-                    [0.3, 2.1, 5.053, 0.974],
-                    [0.3, 2.2, 5.127, 1.539],
-                    [0.3, 2.3, 4.636, 1.845],
-                    [0.3, 2.4, 4.489, 1.833],
-                    [0.3, 2.5, 4.453, 1.909],
-                    [0.3, 2.6, 4.419, 2.101],
-                    [0.3, 2.7, 4.180, 2.318],
-                    [0.3, 2.8, 3.959, 2.286],
-                    [0.3, 2.9, 3.870, 2.259],
-                    [0.3, 3.0, 3.829, 2.249],
-                    # x=0.5
-                    [0.5, 0.5, 3.508, 0.0],
-                    [0.5, 0.6, 3.514, 0.0],
-                    [0.5, 0.7, 3.523, 0.0],
-                    [0.5, 0.8, 3.535, 0.0],
-                    [0.5, 0.9, 3.551, 0.0],
-                    [0.5, 1.0, 3.575, 0.0],
-                    [0.5, 1.1, 3.610, 0.0],
-                    [0.5, 1.2, 3.667, 0.0],
-                    [0.5, 1.3, 3.778, 0.0],
-                    [0.5, 1.4, 3.895, 0.004],
-                    [0.5, 1.5, 3.970, 0.017],
-                    [0.5, 1.6, 4.063, 0.033],
-                    [0.5, 1.7, 4.176, 0.067],
-                    [0.5, 1.8, 4.289, 0.098],
-                    [0.5, 1.9, 4.475, 0.155],
-                    [0.5, 2.0, 4.720, 0.265],
-                    [0.5, 2.1, 4.989, 0.525],
-                    [0.5, 2.2, 5.112, 0.970],
-                    [0.5, 2.3, 5.031, 1.426],
-                    [0.5, 2.4, 4.632, 1.702],
-                    [0.5, 2.5, 4.483, 1.605],
-                    [0.5, 2.6, 4.552, 1.716],
-                    [0.5, 2.7, 4.491, 1.943],
-                    [0.5, 2.8, 4.302, 2.147],
-                    [0.5, 2.9, 4.105, 2.146],
-                    [0.5, 3.0, 4.030, 2.149]
-                ]
- 
-            x_values = sorted(list(set(pt[0] for pt in data_points)))
-
-            # Preprocess data by x
-            data_by_x = {xv: [] for xv in x_values}
-            for pt in data_points:
-                data_by_x[pt[0]].append(pt)
-
-
-            # First calculate E0 (fundamental gap) for this composition
-            E0 = 0.738 + 1.247 * x  # From linear relation in paper
-
-            for i, energy_eV in enumerate(energy_eV_array):
-
-                if energy_eV < E0:
-                    # Use Sellmeier equation
-                    A = 14.07 - 4.80*x - 0.66*x*x
-                    B = 0.458 - 0.099*x + 1.258*x*x
-                    C = 1.486 - 2.308*x + 1.973*x*x  # in microns
-                    λ = wavelength_um_array[i]
-                    n_squared = A + B * λ**2 / (λ**2 - C**2)
-                    n_array[i] = np.sqrt(n_squared)
-                    k_array[i] = 0.0
-                
-                else:
-                    # Bilinear interpolation in x and energy
-                    lower_x = max([xv for xv in x_values if xv <= x])
-                    upper_x = min([xv for xv in x_values if xv >= x])
-
-                    def interpolate_energy(x_data, energy):
-                        energies = [pt[1] for pt in x_data]
-                        n_vals = [pt[2] for pt in x_data]
-                        k_vals = [pt[3] for pt in x_data]
-
-                        lower_e = max([e for e in energies if e <= energy])
-                        upper_e = min([e for e in energies if e >= energy])
-
-                        if lower_e == upper_e:
-                            idx = energies.index(lower_e)
-                            return n_vals[idx], k_vals[idx]
-                        else:
-                            idx_l = energies.index(lower_e)
-                            idx_u = energies.index(upper_e)
-                            t = (energy - lower_e) / (upper_e - lower_e)
-                            n = n_vals[idx_l] + t * (n_vals[idx_u] - n_vals[idx_l])
-                            k = k_vals[idx_l] + t * (k_vals[idx_u] - k_vals[idx_l])
-                            return n, k
-
-                    if lower_x == upper_x:
-                        n, k = interpolate_energy(data_by_x[lower_x], energy_eV)
-                    else:
-                        n_lower, k_lower = interpolate_energy(data_by_x[lower_x], energy_eV)
-                        n_upper, k_upper = interpolate_energy(data_by_x[upper_x], energy_eV)
-                        t_x = (x - lower_x) / (upper_x - lower_x)
-                        n = n_lower + t_x * (n_upper - n_lower)
-                        k = k_lower + t_x * (k_upper - k_lower)
-
-                    n_array[i] = n
-                    k_array[i] = k
-
-            return n_array, k_array
+            # Sellmeier equation below E0 (fundamental gap), tabulated data interpolated above
+            return ("Alloy", ["AlGaSb", x])
         else:
-            return (1.0, 0.0)  # Default for unknown materials
+            return ("Constant", [1.0, 0.0])  # Default for unknown materials
+
+    THERMAL_SEMICONDUCTORS = ("GaAs", "AlGaAs", "GaSb", "AlAsSb", "InSb", "AlSb", "InAs", "InAsSb", "AlGaSb")
 
     def _get_metal_refractive_index(self, metal):
         """Return refractive index (n,k) for common metals"""
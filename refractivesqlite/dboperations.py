@@ -1,7 +1,15 @@
 from collections import namedtuple, OrderedDict
 import os
+import re
 import yaml
 import sqlite3
+import struct
+import threading
+import time
+import hashlib
+import functools
+import logging
+import zlib
 import numpy as np
 
 from refractivesqlite import material
@@ -11,51 +19,488 @@ Shelf = namedtuple('Shelf', ['shelf', 'name'])
 Book = namedtuple('Book', ['book', 'name'])
 Page = namedtuple('Page', ['page', 'name', 'path'])
 Entry = namedtuple('Entry', ['id', 'shelf', 'book', 'page'])
+Samples = namedtuple('Samples', ['wave', 'n', 'k'])
+
+logger = logging.getLogger(__name__)
 
 _riiurl = "https://refractiveindex.info/download/database/" +\
           "rii-database-2019-02-11.zip"
 
+# Tabulated data of a page: float64 little-endian arrays stored as BLOBs,
+# 'raw' or 'zlib' compressed; n and k may have their own wavelength grids
+_PAGEDATA_TABLE = ('CREATE TABLE IF NOT EXISTS pagedata'
+                   '(pageid int PRIMARY KEY, codec text,'
+                   'npoints_n int, wave_n blob, n blob,'
+                   'npoints_k int, wave_k blob, k blob)')
+
+
+def encode_array(values, codec='raw'):
+    '''
+    Pack an array into a float64 BLOB
+
+    :param values: The values, or None
+    :param codec: 'raw' or 'zlib'
+    '''
+    if values is None:
+        return None
+    data = np.ascontiguousarray(values, dtype='<f8').tobytes()
+    return zlib.compress(data) if codec == 'zlib' else data
+
+
+def decode_array(blob, codec='raw'):
+    '''
+    Unpack a float64 BLOB; raw BLOBs are wrapped without copying
+
+    :param blob: The BLOB, or None
+    :param codec: 'raw' or 'zlib'
+    :returns: A read-only numpy array, or None
+    '''
+    if blob is None:
+        return None
+    if codec == 'zlib':
+        blob = zlib.decompress(blob)
+    return np.frombuffer(blob, dtype='<f8')
+
+
+def _rows_to_arrays(rows):
+    if len(rows) == 0:
+        return None, None
+    data = np.array(rows, dtype=float)
+    return data[:, 0], data[:, 1]
+
+
+def _insert_pagedata(conn, pageid, wave_n, n, wave_k, k, codec):
+    conn.execute('INSERT OR REPLACE INTO pagedata VALUES (?,?,?,?,?,?,?,?)',
+                 [pageid, codec,
+                  0 if n is None else len(n),
+                  encode_array(wave_n, codec), encode_array(n, codec),
+                  0 if k is None else len(k),
+                  encode_array(wave_k, codec), encode_array(k, codec)])
+
+
+def _blob_value(blob, codec, i):
+    # Element i of a BLOB array, for the row-based compatibility views
+    if blob is None:
+        return None
+    if codec == 'zlib':
+        return float(_decode_cached(blob)[i])
+    return struct.unpack_from('<d', blob, 8 * i)[0]
+
+
+@functools.lru_cache(maxsize=8)
+def _decode_cached(blob):
+    return decode_array(blob, 'zlib')
+
+
+def _install_compat_views(conn):
+    '''
+    Row-based refractiveindex(pageid, wave, refindex) and
+    extcoeff(pageid, wave, coeff) TEMP views over pagedata, so custom
+    queries and search_n/search_k/search_nk keep working
+    '''
+    tables = {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'pagedata' not in tables:
+        return
+    conn.create_function('rii_value', 3, _blob_value, deterministic=True)
+    for view, npoints, wave, value, column in (
+            ('refractiveindex', 'npoints_n', 'wave_n', 'n', 'refindex'),
+            ('extcoeff', 'npoints_k', 'wave_k', 'k', 'coeff')):
+        conn.execute(
+            'CREATE TEMP VIEW IF NOT EXISTS {view} AS '
+            'WITH RECURSIVE seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 '
+            'FROM seq WHERE i + 1 < (SELECT max({npoints}) FROM pagedata)) '
+            'SELECT d.pageid AS pageid, '
+            'rii_value(d.{wave}, d.codec, seq.i) AS wave, '
+            'rii_value(d.{value}, d.codec, seq.i) AS {column} '
+            'FROM pagedata d JOIN seq ON seq.i < d.{npoints}'.format(
+                view=view, npoints=npoints, wave=wave, value=value,
+                column=column))
+
+
+# Source file digest of every page and build metadata (source version,
+# path, options), used by incremental updates
+_PAGESOURCES_TABLE = ('CREATE TABLE IF NOT EXISTS pagesources'
+                      '(pageid int PRIMARY KEY, digest text)')
+_METADATA_TABLE = ('CREATE TABLE IF NOT EXISTS metadata'
+                   '(key text PRIMARY KEY, value text)')
+
+
+# Full-text index of the page names; rowid is the pageid
+_PAGES_FTS_TABLE = ('CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5'
+                    "(shelf, book, page, filepath, prefix='1 2 3')")
+
+
+def _fts5_available(conn):
+    try:
+        conn.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+        conn.execute('DROP TABLE temp.fts5_probe')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _rebuild_fts(conn):
+    '''
+    Refill the full-text index from the pages table (skipped when this
+    SQLite has no FTS5; search_pages then falls back to LIKE)
+    '''
+    if not _fts5_available(conn):
+        return
+    conn.execute(_PAGES_FTS_TABLE)
+    conn.execute('DELETE FROM pages_fts')
+    conn.execute('INSERT INTO pages_fts (rowid, shelf, book, page, filepath)'
+                 ' SELECT pageid, shelf, book, page, filepath FROM pages')
+
+
+def _fts_query(term):
+    # Every word of term as a quoted prefix, all required
+    words = [w for w in re.split(r'\W+', term) if w]
+    return ' '.join('"{}"*'.format(w) for w in words) or '""'
+
+
+# 3-D R*-tree over the tabulated samples: the (wave, n, k) points of a page
+# (see _page_samples; a missing n or k is indexed at _MISSING) are cut into
+# chunks of _SAMPLE_CHUNK consecutive samples and every chunk is indexed by
+# its bounding box. The id packs pageid * _SAMPLE_STRIDE + chunk index.
+_SAMPLES_RTREE_TABLE = ('CREATE VIRTUAL TABLE IF NOT EXISTS samples_rtree'
+                        ' USING rtree(id, wave_min, wave_max, n_min, n_max,'
+                        ' k_min, k_max)')
+_SAMPLE_CHUNK = 32
+_SAMPLE_STRIDE = 1 << 20
+# Sentinel of a missing n or k: below any window, inside an open one
+_MISSING = -1e30
+
+
+def _rtree_available(conn):
+    try:
+        conn.execute('CREATE VIRTUAL TABLE temp.rtree_probe'
+                     ' USING rtree(id, x0, x1)')
+        conn.execute('DROP TABLE temp.rtree_probe')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _page_samples(wave_n, n, wave_k, k):
+    '''
+    The (wave, n, k) points of a page in wavelength order: the n grid with
+    k interpolated onto it (NaN outside the k range, 0 for pages without
+    k), followed by the k samples outside the n range with n = NaN
+
+    :returns: Samples of arrays, or None for pages without data
+    '''
+    if n is None:
+        if k is None:
+            return None
+        return Samples(np.asarray(wave_k), np.full(len(k), np.nan),
+                       np.asarray(k))
+    wave_n, n = np.asarray(wave_n), np.asarray(n)
+    if k is None:
+        return Samples(wave_n, n, np.zeros_like(n))
+    wave_k, k = np.asarray(wave_k), np.asarray(k)
+    outside = (wave_k < wave_n.min()) | (wave_k > wave_n.max())
+    wave = np.concatenate([wave_n, wave_k[outside]])
+    order = np.argsort(wave, kind='stable')
+    return Samples(wave[order],
+                   np.concatenate([n, np.full(outside.sum(), np.nan)])[order],
+                   np.concatenate([np.interp(wave_n, wave_k, k,
+                                             left=np.nan, right=np.nan),
+                                   k[outside]])[order])
+
+
+def _index_samples(conn, pageid, samples):
+    if samples is None or len(samples.n) == 0:
+        return
+    points = _sample_points(samples)
+    starts = np.arange(0, len(points), _SAMPLE_CHUNK)
+    lo = np.minimum.reduceat(points, starts)
+    hi = np.maximum.reduceat(points, starts)
+    ids = int(pageid) * _SAMPLE_STRIDE + np.arange(len(starts))
+    conn.executemany('INSERT INTO samples_rtree VALUES (?,?,?,?,?,?,?)',
+                     zip(ids.tolist(), lo[:, 0].tolist(), hi[:, 0].tolist(),
+                         lo[:, 1].tolist(), hi[:, 1].tolist(),
+                         lo[:, 2].tolist(), hi[:, 2].tolist()))
+
+
+def _sample_points(samples):
+    # (npoints, 3) array with missing n and k at _MISSING
+    return np.nan_to_num(np.column_stack(samples), nan=_MISSING)
+
+
+def _unindex_samples(conn, pageids):
+    conn.executemany('DELETE FROM samples_rtree WHERE id BETWEEN ? AND ?',
+                     [(int(p) * _SAMPLE_STRIDE, (int(p) + 1) * _SAMPLE_STRIDE - 1)
+                      for p in pageids])
+
+
+def _has_table(conn, name):
+    return conn.execute('SELECT 1 FROM sqlite_master WHERE name = ?',
+                        [name]).fetchone() is not None
+
+
+def _build_samples_rtree(conn):
+    '''
+    Version 5: create the samples R*-tree and fill it from pagedata
+    (skipped when this SQLite has no R*-tree module)
+    '''
+    if not _rtree_available(conn):
+        return
+    conn.execute(_SAMPLES_RTREE_TABLE)
+    conn.execute('DELETE FROM samples_rtree')
+    for row in conn.execute('SELECT pageid, codec, wave_n, n, wave_k, k'
+                            ' FROM pagedata').fetchall():
+        arrays = [decode_array(blob, row[1]) for blob in row[2:]]
+        _index_samples(conn, row[0], _page_samples(*arrays))
+
+
+# Indexes on the pages table, created by fresh builds and by migration 1
+_PAGES_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_pages_pageid ON pages (pageid)',
+    'CREATE INDEX IF NOT EXISTS idx_pages_names ON pages (shelf, book, page)']
+
+
+def _migrate_to_blobs(conn):
+    '''
+    Version 2: move the per-sample rows of refractiveindex/extcoeff into
+    one pagedata row of float64 arrays per page
+    '''
+    conn.execute(_PAGEDATA_TABLE)
+    pageids = [r[0] for r in conn.execute('SELECT pageid FROM pages')]
+    for pageid in pageids:
+        wave_n, n = _rows_to_arrays(conn.execute(
+            'SELECT wave, refindex FROM refractiveindex WHERE pageid = ?'
+            ' ORDER BY wave', [pageid]).fetchall())
+        wave_k, k = _rows_to_arrays(conn.execute(
+            'SELECT wave, coeff FROM extcoeff WHERE pageid = ?'
+            ' ORDER BY wave', [pageid]).fetchall())
+        _insert_pagedata(conn, pageid, wave_n, n, wave_k, k, 'raw')
+    conn.execute('DROP TABLE refractiveindex')
+    conn.execute('DROP TABLE extcoeff')
+
+
+# Schema migrations by version (stored in PRAGMA user_version). Files built
+# before a version existed are upgraded in place when they are opened. Each
+# step is a list of SQL statements or a callable taking the connection.
+_MIGRATIONS = {
+    1: ['CREATE INDEX IF NOT EXISTS idx_refractiveindex_page_wave'
+        ' ON refractiveindex (pageid, wave, refindex)',
+        'CREATE INDEX IF NOT EXISTS idx_refractiveindex_value'
+        ' ON refractiveindex (refindex, pageid, wave)',
+        'CREATE INDEX IF NOT EXISTS idx_extcoeff_page_wave'
+        ' ON extcoeff (pageid, wave, coeff)',
+        'CREATE INDEX IF NOT EXISTS idx_extcoeff_value'
+        ' ON extcoeff (coeff, pageid, wave)'] + _PAGES_INDEXES,
+    2: _migrate_to_blobs,
+    3: [_PAGESOURCES_TABLE, _METADATA_TABLE],
+    4: _rebuild_fts,
+    5: _build_samples_rtree,
+    6: _build_samples_rtree,  # re-index, now with the k-only pages
+    7: _build_samples_rtree,  # re-index, k on its own range (no clamping)
+}
+SCHEMA_VERSION = max(_MIGRATIONS)
+
 
 class Database:
-    def __init__(self, sqlitedbpath):
+    def __init__(self, sqlitedbpath, material_cache_size=128):
         '''
         Construct a database instance
 
         :param sqlitedbpath: The path of the sqlitedatabse
                              it has to exist even if you want to create
                              a new database
+        :param material_cache_size: Number of loaded materials kept by
+                                    get_material (least recently used
+                                    are dropped first, 0 disables)
         '''
         self.db_path = sqlitedbpath
+        # Loaded Material objects by pageid, most recently used last
+        self.material_cache_size = material_cache_size
+        self._materials = OrderedDict()
+        self._materials_lock = threading.Lock()
+        self._material_hits = 0
+        self._material_misses = 0
+        # One connection (and cursor) per thread, reused by every query;
+        # sqlite3 keeps the prepared statements of each connection cached.
+        # _connections holds (thread, connection) pairs; the connections of
+        # finished threads are closed whenever another one is opened
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._pages_columns = None
+        self._catalogue = None
         if not os.path.isfile(sqlitedbpath):
-            print("Database file not found.")
+            logger.info("Database file not found.")
         else:
-            print("Database file found at", sqlitedbpath)
+            logger.info("Database file found at %s", sqlitedbpath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _connection(self):
+        '''
+        The connection of the calling thread, opened on first use
+        '''
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self._close_finished()
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            migrate_database(conn)
+            _install_compat_views(conn)
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+            with self._connections_lock:
+                self._connections.append((threading.current_thread(), conn))
+        return conn
+
+    def _close_finished(self):
+        '''
+        Close the connections of threads that have exited
+        '''
+        with self._connections_lock:
+            finished = [conn for thread, conn in self._connections
+                        if not thread.is_alive()]
+            self._connections = [(thread, conn) for thread, conn
+                                 in self._connections if thread.is_alive()]
+        for conn in finished:
+            conn.close()
+        if finished:
+            logger.debug("Closed %d connections of finished threads.",
+                         len(finished))
+
+    def _cursor(self):
+        '''
+        The cached cursor of the calling thread's connection
+        '''
+        self._connection()
+        return self._local.cursor
+
+    def close(self):
+        '''
+        Close the connections of all threads; the next query reopens one
+        '''
+        with self._connections_lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._local = threading.local()
+        self.clear_cache()
+
+    def clear_cache(self):
+        '''
+        Drop the loaded materials, the page catalogue and the hit/miss
+        counters; done by close() and whenever the database is rebuilt
+        or updated
+        '''
+        with self._materials_lock:
+            self._materials.clear()
+            self._material_hits = 0
+            self._material_misses = 0
+        self._pages_columns = None
+        self._catalogue = None
+
+    def cache_stats(self):
+        '''
+        :returns: Hit/miss counters and size of the material cache
+        '''
+        with self._materials_lock:
+            return {'hits': self._material_hits,
+                    'misses': self._material_misses,
+                    'size': len(self._materials),
+                    'maxsize': self.material_cache_size}
 
     def create_database_from_folder(self, yml_database_path,
-                                    interpolation_points=100):
+                                    interpolation_points=100,
+                                    compress=False, processes=None,
+                                    source_version=None):
         '''
         Create a sql database from a yml database path
 
         :param yml_database_path: The path to the yaml database
         :param interpolation_points: The number of interpolation_points to use
+        :param compress: Store the tabulated arrays zlib compressed
+        :param processes: Worker processes parsing the pages (None = all cores)
+        :param source_version: Version label stored in the metadata table
+                               (default: the folder name)
+        :returns: The build report (page count, failures, timings)
+        '''
+        self.close()
+        return create_sqlite_database(yml_database_path,
+                                      self.db_path,
+                                      interpolation_points=interpolation_points,
+                                      compress=compress,
+                                      processes=processes,
+                                      source_version=source_version)
+
+    def update_database_from_folder(self, yml_database_path,
+                                    source_version=None,
+                                    interpolation_points=100,
+                                    compress=False, processes=None):
+        '''
+        Incrementally refresh the sql database from a newer yml database
+        path; only added, changed and removed pages are touched
+
+        :param yml_database_path: The path to the new yaml database
+        :param source_version: Version label stored in the metadata table
+                               (default: the folder name)
+        :param interpolation_points: The number of interpolation_points to use
+        :param compress: Store the re-ingested arrays zlib compressed
+        :param processes: Worker processes parsing the pages (None = all cores)
+        :returns: The update report (counts, failures, timings)
+        '''
+        if not os.path.isfile(self.db_path):
+            return self.create_database_from_folder(
+                yml_database_path, interpolation_points=interpolation_points,
+                compress=compress, processes=processes,
+                source_version=source_version)
+        self.close()
+        return update_sqlite_database(yml_database_path,
+                                      self.db_path,
+                                      interpolation_points=interpolation_points,
+                                      compress=compress,
+                                      processes=processes,
+                                      source_version=source_version)
+
+    def update_database_from_url(self, riiurl=_riiurl,
+                                 interpolation_points=100, compress=False):
+        '''
+        Download a refractive index database archive and apply it
+        incrementally, recording the archive name as source version
+
+        :param riiurl: The url of the zip compressed database
+        '''
+        Database.DownloadRIIzip(riiurl=riiurl)
+        return self.update_database_from_folder(
+            "database", source_version=os.path.basename(riiurl),
+            interpolation_points=interpolation_points, compress=compress)
+
+    def get_metadata(self):
+        '''
+        The build metadata (source_version, source_path, ...) as a dict
         '''
-        create_sqlite_database(yml_database_path,
-                               self.db_path,
-                               interpolation_points=interpolation_points)
+        c = self._cursor()
+        c.execute('SELECT key, value FROM metadata')
+        return dict(c.fetchall())
 
     def create_database_from_url(self,
                                  riiurl=_riiurl,
-                                 interpolation_points=100):
+                                 interpolation_points=100,
+                                 compress=False):
         '''
         Create a sqlite database from an url
 
         :param riiurl: The url where to download the zip compressed
                        refractive index database from
         :param interpolation_points: The number of interpolation_points to use
+        :param compress: Store the tabulated arrays zlib compressed
         '''
         Database.DownloadRIIzip(riiurl=riiurl)
-        self.create_database_from_folder(
-            "database", interpolation_points=interpolation_points)
+        return self.create_database_from_folder(
+            "database", interpolation_points=interpolation_points,
+            compress=compress, source_version=os.path.basename(riiurl))
 
     def check_url_version(self):
         print(_riiurl)
@@ -67,15 +512,13 @@ class Database:
         :param sqlquery: The sql query to make
         :retrurn: Return all results of the query
         '''
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        c = self._cursor()
         c.execute(sqlquery)
         results = c.fetchall()
         if len(results) == 0:
-            print("No results found.")
+            logger.info("No results found.")
         else:
-            print(len(results), "results found.")
-        conn.close()
+            logger.info("%d results found.", len(results))
         return results
 
     def search_pages(self, term="", exact=False):
@@ -84,29 +527,60 @@ class Database:
         in shelf, book, page and filename
 
         :param term: The search term to look for
-        :param exact: If false term is extended to %term%
+        :param exact: If true, case-insensitive equality with one of the
+                      fields (from the in-memory catalogue); otherwise a
+                      prefix search of every word of term, best match first
+        :returns: The matching rows of the pages table
         '''
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        if not exact:
-            c.execute('SELECT * FROM pages WHERE shelf like ? or book like'
-                      '? or page like ? or filepath like ?',
-                      ["%"+term+"%" for i in range(4)])
+        if exact:
+            results = self.resolve(term)
+        elif not term.strip():
+            results = list(self._get_catalogue()[0])
+        elif _has_table(self._connection(), 'pages_fts'):
+            c = self._cursor()
+            c.execute('SELECT p.* FROM pages_fts f JOIN pages p'
+                      ' ON p.pageid = f.rowid WHERE pages_fts MATCH ?'
+                      ' ORDER BY f.rank', [_fts_query(term)])
+            results = c.fetchall()
         else:
+            c = self._cursor()
             c.execute('SELECT * FROM pages WHERE shelf like ? or book like'
                       '? or page like ? or filepath like ?',
-                      [term for i in range(4)])
-        results = c.fetchall()
+                      ["%"+term+"%" for i in range(4)])
+            results = c.fetchall()
         if len(results) == 0:
-            print("No results found.")
+            logger.info("No results found.")
         else:
-            print(len(results), "results found.")
-            columns = self._get_pages_columns()
-            print("\t".join(columns))
-            for r in results:
-                print("\t".join(map(str, r[:])))
-        conn.close()
-        # return results
+            logger.info("%d results found.", len(results))
+        return results
+
+    def resolve(self, name):
+        '''
+        Pages whose shelf, book, page or filepath equals name
+        (case-insensitive), in pageid order
+
+        :param name: The name to look up
+        :returns: A list of rows of the pages table
+        '''
+        rows, index = self._get_catalogue()
+        return [rows[i] for i in index.get(name.lower(), ())]
+
+    def _get_catalogue(self):
+        '''
+        All pages rows and a lowercase name -> row positions index,
+        loaded once and kept until the database is closed or rebuilt
+        '''
+        catalogue = self._catalogue
+        if catalogue is None:
+            c = self._cursor()
+            c.execute('SELECT * FROM pages ORDER BY pageid')
+            rows = c.fetchall()
+            index = {}
+            for i, row in enumerate(rows):
+                for name in set(str(v).lower() for v in row[1:5]):
+                    index.setdefault(name, []).append(i)
+            catalogue = self._catalogue = (rows, index)
+        return catalogue
 
     def search_id(self, pageid):
         '''
@@ -124,124 +598,152 @@ class Database:
     def search_n(self, n, delta_n):
         '''
         Search for materials with a fraction index between
-        n and delta_n
-
-        :param n: The lower bound of the fraction index
-        :param delta_m: The upper bound of the fraction index
-        '''
-        print("*Search n =", n, "delta_n = ", delta_n)
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        interval = [n-delta_n, n+delta_n]
-        c.execute('''select r.pageid,shelf,book,page,r.wave,r.refindex
-                    from refractiveindex r join pages p on r.pageid = p.pageid
-                    where refindex between ? and ? ''', interval)
-        results = c.fetchall()
-        if len(results) == 0:
-            print("No results found.")
-        else:
-            print(len(results), "results found.")
-            print("pageid|shelf|book|page|wavelength|n")
-            for r in results:
-                print(r)
-        conn.close()
+        n - delta_n and n + delta_n
+
+        :param n: The center of the fraction index window
+        :param delta_n: The half width of the window
+        :returns: The matching samples grouped per page, see search_box
+        '''
+        logger.info("Search n = %s delta_n = %s", n, delta_n)
+        return self.search_box(n_min=n-delta_n, n_max=n+delta_n)
 
     def search_k(self, k, delta_k):
         '''
         Search for materials with an extinction coefficient between
-        k and delta_k
-
-        :param k: The lower bound of the extinction coefficient
-        :param delta_k: The upper bound of the extinction coefficient
-        '''
-        print("*Search k =", k, "delta_k = ", delta_k)
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        interval = [k-delta_k, k+delta_k]
-        c.execute('''select e.pageid,shelf,book,page,e.wave,e.coeff
-                    from extcoeff e join pages p on e.pageid = p.pageid
-                    where coeff between ? and ?''', interval)
-        results = c.fetchall()
-        if len(results) == 0:
-            print("No results found.")
-        else:
-            print(len(results), "results found.")
-            print("pageid|shelf|book|page|wavelength|k")
-            for r in results:
-                print(r)
-        conn.close()
+        k - delta_k and k + delta_k
+
+        :param k: The center of the extinction coefficient window
+        :param delta_k: The half width of the window
+        :returns: The matching samples grouped per page, see search_box
+        '''
+        logger.info("Search k = %s delta_k = %s", k, delta_k)
+        return self.search_box(k_min=k-delta_k, k_max=k+delta_k)
 
     def search_nk(self, n, delta_n, k, delta_k):
         '''
         Search for materials with fraction indice and extinction
-        coefficient between n and delta_n and k and delta_k
-
-        :param n: The lower bound of the fraction index
-        :param delta_n: The upper bound of the fraction index
-        :param k: The lower bound of the extinction coefficient
-        :param delta_k: The upper bound of the extinction coefficient
-        '''
-        print("*Search n =", n, "delta_n = ", delta_n, "k = ", k,
-              "delta_k = ", delta_k)
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        interval = [n-delta_n, n+delta_n, k-delta_k, k+delta_k]
-        c.execute('''select r.pageid, shelf, book, page, r.wave, r.refindex,
-                     e.coeff from refractiveindex r join extcoeff e on
-                     r.pageid = e.pageid and r.wave = e.wave join pages p
-                     on r.pageid = p.pageid where refindex between
-                     ? and ? and coeff between ? and ?''', interval)
-        results = c.fetchall()
+        coefficient between n +- delta_n and k +- delta_k
+
+        :param n: The center of the fraction index window
+        :param delta_n: The half width of the n window
+        :param k: The center of the extinction coefficient window
+        :param delta_k: The half width of the k window
+        :returns: The matching samples grouped per page, see search_box
+        '''
+        logger.info("Search n = %s delta_n = %s k = %s delta_k = %s",
+                    n, delta_n, k, delta_k)
+        return self.search_box(n_min=n-delta_n, n_max=n+delta_n,
+                               k_min=k-delta_k, k_max=k+delta_k)
+
+    def search_box(self, wave_min=None, wave_max=None, n_min=None,
+                   n_max=None, k_min=None, k_max=None):
+        '''
+        Find the tabulated samples inside a wavelength band and an n/k box.
+        The samples R*-tree selects the candidate chunks, which are then
+        filtered exactly. The samples of a page are its n grid with k
+        interpolated onto it (0 for pages without k) plus its k samples
+        outside the n range. A missing n or k is NaN and only matches when
+        both bounds of that window are None.
+
+        :param wave_min, wave_max: The wavelength band (um), None = open
+        :param n_min, n_max: The fraction index window, None = open
+        :param k_min, k_max: The extinction coefficient window, None = open
+        :returns: OrderedDict pageid -> Samples(wave, n, k) of numpy
+                  arrays in wavelength order, pages in pageid order
+        '''
+        lo = [-np.inf if v is None else v for v in (wave_min, n_min, k_min)]
+        hi = [np.inf if v is None else v for v in (wave_max, n_max, k_max)]
+        c = self._cursor()
+        if _has_table(self._connection(), 'samples_rtree'):
+            c.execute('SELECT id FROM samples_rtree'
+                      ' WHERE wave_max >= ? AND n_max >= ? AND k_max >= ?'
+                      ' AND wave_min <= ? AND n_min <= ? AND k_min <= ?'
+                      ' ORDER BY id', lo + hi)
+            ids = np.array([r[0] for r in c.fetchall()], dtype=np.int64)
+            pageids, chunks = np.divmod(ids, _SAMPLE_STRIDE)
+            candidates = OrderedDict()
+            for pageid, chunk in zip(pageids.tolist(), chunks.tolist()):
+                candidates.setdefault(pageid, []).append(chunk)
+        else:
+            # No R*-tree in this SQLite: every chunk of every page
+            candidates = OrderedDict(
+                (pageid, None) for pageid in sorted(self._get_all_pageids() or []))
+
+        results = OrderedDict()
+        nsamples = 0
+        for pageid, page_chunks in candidates.items():
+            samples = _page_samples(*self._get_page_arrays(pageid))
+            if samples is None:
+                continue
+            points = np.column_stack(samples)
+            if page_chunks is not None:
+                rows = (np.asarray(page_chunks)[:, np.newaxis] * _SAMPLE_CHUNK +
+                        np.arange(_SAMPLE_CHUNK)).ravel()
+                points = points[rows[rows < len(points)]]
+            test = np.nan_to_num(points, nan=_MISSING)
+            points = points[np.all((test >= lo) & (test <= hi), axis=1)]
+            if len(points):
+                results[pageid] = Samples(points[:, 0], points[:, 1],
+                                          points[:, 2])
+                nsamples += len(points)
         if len(results) == 0:
-            print("No results found.")
+            logger.info("No results found.")
         else:
-            print(len(results), "results found.")
-            print("pageid|shelf|book|page|wavelength|n|k")
-            for r in results:
-                print(r)
-        conn.close()
+            logger.info("%d samples on %d pages found.", nsamples,
+                        len(results))
+        return results
 
     def get_material(self, pageid):
         '''
-        Get the material from a pageid
+        Get the material from a pageid. Loaded materials are cached and
+        shared between callers, see material_cache_size and clear_cache.
 
         :param pageid: The pageid of the material
         :returns: Material
         '''
+        key = int(pageid)
+        with self._materials_lock:
+            mat = self._materials.get(key)
+            if mat is not None:
+                self._material_hits += 1
+                self._materials.move_to_end(key)
+                return mat
+            self._material_misses += 1
+
         pagedata = self._get_page_info(pageid)
         if pagedata is None:
-            print("PageID not found.")
+            logger.warning("PageID %s not found.", pageid)
             return None
-        else:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            wavelengths_r = None
-            wavelengths_e = None
-            refractive = None
-            extinction = None
-            if pagedata['hasrefractive'] == 1:
-                c.execute('''select wave,refindex
-                            from refractiveindex
-                            where pageid = ?
-                            order by wave asc''', [pageid])
-                results = c.fetchall()
-                wavelengths_r = [r[0] for r in results]
-                refractive = [r[1] for r in results]
-            if pagedata['hasextinction'] == 1:
-                c.execute('''select wave,coeff
-                            from extcoeff
-                            where pageid = ?
-                            order by wave asc''', [pageid])
-                results = c.fetchall()
-                wavelengths_e = [r[0] for r in results]
-                extinction = [r[1] for r in results]
-            conn.close()
-            print("Material", pagedata['filepath'], "loaded.")
-            return Material.FromLists(pagedata,
-                                      wavelengths_r=wavelengths_r,
-                                      refractive=refractive,
-                                      wavelengths_e=wavelengths_e,
-                                      extinction=extinction)
+        wavelengths_r, refractive, wavelengths_e, extinction = \
+            self._get_page_arrays(pageid)
+        mat = Material.FromLists(pagedata,
+                                 wavelengths_r=wavelengths_r,
+                                 refractive=refractive,
+                                 wavelengths_e=wavelengths_e,
+                                 extinction=extinction)
+        logger.info("Material %s loaded.", pagedata['filepath'])
+        with self._materials_lock:
+            self._materials[key] = mat
+            while len(self._materials) > self.material_cache_size:
+                self._materials.popitem(last=False)
+        return mat
+
+    def _get_page_arrays(self, pageid):
+        '''
+        The tabulated arrays of a page, straight from its BLOBs
+
+        :param pageid: The pageid of the material
+        :returns: wavelengths_r, refractive, wavelengths_e, extinction
+                  (None where the page has no data)
+        '''
+        c = self._cursor()
+        c.execute('''select codec, wave_n, n, wave_k, k from pagedata
+                    where pageid = ?''', [pageid])
+        row = c.fetchone()
+        if row is None:
+            return None, None, None, None
+        codec = row[0]
+        return tuple(decode_array(blob, codec) for blob in row[1:])
 
     def get_material_n_numpy(self, pageid):
         '''
@@ -255,7 +757,7 @@ class Database:
             return None
         n = mat.get_complete_refractive()
         if n is None:
-            print("Material has no refractive data.")
+            logger.warning("Material has no refractive data.")
             return None
         return np.array(n)
 
@@ -271,7 +773,7 @@ class Database:
             return None
         k = mat.get_complete_extinction()
         if k is None:
-            print("Material has no extinction data.")
+            logger.warning("Material has no extinction data.")
             return None
         return np.array(k)
 
@@ -286,7 +788,6 @@ class Database:
         '''
         mat = self.get_material(pageid)
         if mat is None:
-            print("PageID not found.")
             return None
         matInfo = mat.get_page_info()
         # print(matInfo)
@@ -305,17 +806,16 @@ class Database:
         '''
         allids = self._get_all_pageids()
         for id in allids:
-            print("Processing", id)
+            logger.info("Processing %s", id)
             self.get_material_csv(pageid=id, output="", folder=outputfolder)
 
     def _get_pages_columns(self):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('PRAGMA table_info(pages);')
-        results = c.fetchall()
-        names = [r[1] for r in results]
-        conn.close()
-        return names
+        if self._pages_columns is None:
+            c = self._cursor()
+            c.execute('PRAGMA table_info(pages);')
+            results = c.fetchall()
+            self._pages_columns = [r[1] for r in results]
+        return self._pages_columns
 
     def _get_page_info(self, pageid):
         '''
@@ -325,12 +825,10 @@ class Database:
         :returns: An ordered dict of page informations
         '''
         columns = self._get_pages_columns()
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        c = self._cursor()
         c.execute('SELECT * FROM pages WHERE pageid = ?', [pageid])
         results = c.fetchall()
         if len(results) == 0:
-            conn.close()
             return None
         else:
             row = results[0]
@@ -338,7 +836,6 @@ class Database:
             for idx, c in enumerate(columns):
                 data[c] = row[idx]
             # data = {columns[i]:row[i] for i in range(len(columns))}
-            conn.close()
             return data
 
     def _get_all_pageids(self):
@@ -347,12 +844,10 @@ class Database:
 
         :returns: A lis of pageids
         '''
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        c = self._cursor()
         c.execute('SELECT pageid FROM pages')
         results = c.fetchall()
         if len(results) == 0:
-            conn.close()
             return None
         else:
             pageids = [row[0] for row in results]
@@ -370,20 +865,48 @@ class Database:
         import requests
         import zipfile
         import io
-        print("Making request to", riiurl)
+        logger.info("Making request to %s", riiurl)
         r = requests.get(riiurl)
         if r.ok:
-            print("Downloaded and extracting...")
+            logger.info("Downloaded and extracting...")
             z = zipfile.ZipFile(io.BytesIO(r.content))
             z.extractall(path=outputfolder)
-            print("Wrote", outputfolder+"/database", "from", riiurl)
+            logger.info("Wrote %s from %s", outputfolder+"/database", riiurl)
             # The destination+database is the result.
             return True
         else:
-            print("There was a problem with the request.")
+            logger.warning("There was a problem with the request.")
             return False
 
 
+def migrate_database(conn):
+    '''
+    Bring an existing database up to SCHEMA_VERSION, one transaction
+    per version
+
+    :param conn: An open sqlite3 connection
+    :returns: The schema version after the migration
+    '''
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+    tables = {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'pages' not in tables:
+        return version  # empty file, nothing to upgrade yet
+    for target in sorted(v for v in _MIGRATIONS if v > version):
+        with conn:
+            step = _MIGRATIONS[target]
+            if callable(step):
+                step(conn)
+            else:
+                for statement in step:
+                    conn.execute(statement)
+            conn.execute('PRAGMA user_version = {:d}'.format(target))
+        version = target
+    return version
+
+
 def extract_entry_list(db_path):
     entries = []
     referencePath = os.path.normpath(db_path)
@@ -421,82 +944,359 @@ def pretty_entry(entry):
 
 def create_sqlite_database(refractiveindex_db_path,
                            new_sqlite_db,
-                           interpolation_points=100):
+                           interpolation_points=100,
+                           compress=False,
+                           processes=None,
+                           progress=None,
+                           source_version=None):
     '''
-    Creates a new sqlite database containing a pages, refractiveindex
-    and a extcoeff table.
+    Creates a new sqlite database containing a pages and a pagedata
+    table at the current schema version.
 
     :param refractiveindex_db_path: Path to the refractiveindex db
     :new_sqlite_db: Path to the sqlite database
     :interpolation_points=100: The number of interpolation points
+    :compress=False: Store the arrays zlib compressed
+    :processes=None: Worker processes parsing the YAML pages
+                     (None = all cores, 1 = in this process)
+    :progress=None: Callable progress(done, total), default logs
+    :source_version=None: Version recorded in the metadata table
+                          (default: the snapshot folder name)
+    :returns: The build report, see _populate_sqlite_database
     '''
     conn = sqlite3.connect(new_sqlite_db)
     c = conn.cursor()
     c.execute('''DROP TABLE IF EXISTS pages;''')
     c.execute('''DROP TABLE IF EXISTS refractiveindex;''')
     c.execute('''DROP TABLE IF EXISTS extcoeff;''')
+    c.execute('''DROP TABLE IF EXISTS pagedata;''')
+    c.execute('''DROP TABLE IF EXISTS pagesources;''')
+    c.execute('''DROP TABLE IF EXISTS metadata;''')
+    c.execute('''DROP TABLE IF EXISTS pages_fts;''')
+    c.execute('''DROP TABLE IF EXISTS samples_rtree;''')
+    c.execute('PRAGMA user_version = 0')
     c.execute('CREATE TABLE pages'
               '(pageid int, shelf text COLLATE NOCASE,'
               'book text COLLATE NOCASE, page text COLLATE NOCASE,'
               'filepath text COLLATE NOCASE,'
               'hasrefractive integer, hasextinction integer,'
               'rangeMin real, rangeMax real, points int)')
-    c.execute('CREATE TABLE refractiveindex'
-              '(pageid int, wave real, refindex real)')
-    c.execute('CREATE TABLE extcoeff (pageid int, wave real, coeff real)')
+    c.execute(_PAGEDATA_TABLE)
+    c.execute(_PAGESOURCES_TABLE)
+    c.execute(_METADATA_TABLE)
+    if _rtree_available(conn):
+        c.execute(_SAMPLES_RTREE_TABLE)
     conn.commit()
     conn.close()
-    _populate_sqlite_database(refractiveindex_db_path,
-                              new_sqlite_db,
-                              interpolation_points=interpolation_points)
+    report = _populate_sqlite_database(refractiveindex_db_path,
+                                       new_sqlite_db,
+                                       interpolation_points=interpolation_points,
+                                       compress=compress,
+                                       processes=processes,
+                                       progress=progress,
+                                       source_version=source_version)
+    # Indexes are built once after the bulk insert
+    conn = sqlite3.connect(new_sqlite_db)
+    with conn:
+        for statement in _PAGES_INDEXES:
+            conn.execute(statement)
+        conn.execute('PRAGMA user_version = {:d}'.format(SCHEMA_VERSION))
+    conn.close()
+    return report
+
+
+def _parse_page(args):
+    '''
+    Parse one YAML page into its arrays (runs in a worker process)
+
+    :param args: (entry, interpolation_points)
+    :returns: (entry, page dict or None, error message or None)
+    '''
+    entry, interpolation_points = args
+    try:
+        mat = material.Material(filename=entry.page.path,
+                                interpolation_points=interpolation_points)
+        wave_n, n = _page_arrays(mat.refractiveIndex)
+        wave_k, k = _page_arrays(mat.extinctionCoefficient)
+        return entry, {'wave_n': wave_n, 'n': n, 'wave_k': wave_k, 'k': k,
+                       'rangeMin': float(mat.rangeMin),
+                       'rangeMax': float(mat.rangeMax),
+                       'points': int(mat.points)}, None
+    except Exception as error:
+        return entry, None, str(error)
+
+
+def _page_arrays(data):
+    # Tabulated data as stored; formulas sampled over their range
+    if data is None:
+        return None, None
+    if isinstance(data, material.FormulaRefractiveIndexData):
+        return data.get_complete_refractive_numpy()
+    return (np.asarray(data.wavelengths, dtype=float),
+            np.asarray(data.coefficients, dtype=float))
+
+
+def _log_progress(done, total):
+    if done == total or done % 200 == 0:
+        logger.info("Parsed %d/%d pages", done, total)
+
+
+def _parse_pages(entries, interpolation_points, processes, progress):
+    '''
+    Parse all pages, in a process pool unless processes == 1
+
+    :returns: A list of _parse_page results in entry order
+    '''
+    jobs = [(e, interpolation_points) for e in entries]
+    if processes == 1 or len(jobs) < 2:
+        results = []
+        for job in jobs:
+            results.append(_parse_page(job))
+            progress(len(results), len(jobs))
+        return results
+    from concurrent.futures import ProcessPoolExecutor
+    results = []
+    workers = processes or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(_parse_page, jobs, chunksize=chunksize):
+            results.append(result)
+            progress(len(results), len(jobs))
+    return results
 
 
 def _populate_sqlite_database(refractiveindex_db_path,
                               new_sqlite_db,
-                              interpolation_points=100):
+                              interpolation_points=100,
+                              compress=False,
+                              processes=None,
+                              progress=None,
+                              source_version=None):
     '''
-    Insert and commit the materials to the sqlite database
+    Parse the materials in parallel and insert them in one transaction
 
     :param refractiveindex_db_path: Path to the refractiveindex db
     :new_sqlite_db: Path to the sqlite database
     :interpolation_points=100: The number of interpolation points
+    :compress=False: Store the arrays zlib compressed
+    :processes=None: Worker processes (None = all cores)
+    :progress=None: Callable progress(done, total)
+    :source_version=None: Version recorded in the metadata table
+    :returns: Report dict with the page count, the failed pages
+              and the parse/insert/total times (s)
     '''
+    t_start = time.perf_counter()
+    codec = 'zlib' if compress else 'raw'
     entries = extract_entry_list(refractiveindex_db_path)
-    conn = sqlite3.connect(new_sqlite_db)
-    c = conn.cursor()
+    digests = {e.id: _file_digest(e.page.path) for e in entries}
+    results = _parse_pages(entries, interpolation_points, processes,
+                           progress or _log_progress)
+    t_parsed = time.perf_counter()
+
+    conn = _bulk_connection(new_sqlite_db)
+    conn.execute('BEGIN')
+    try:
+        failed = _write_pages(conn, results, digests, codec)
+        _write_metadata(conn, refractiveindex_db_path, source_version,
+                        interpolation_points, codec)
+        _rebuild_fts(conn)
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.execute('PRAGMA synchronous = FULL')
+        conn.close()
+    t_end = time.perf_counter()
+
+    report = {'pages': len(results) - len(failed),
+              'failed': failed,
+              'parse_time': t_parsed - t_start,
+              'insert_time': t_end - t_parsed,
+              'total_time': t_end - t_start}
+    logger.info("Wrote SQLite DB on %s", new_sqlite_db)
+    logger.info("%d pages in %.1f s (parse %.1f s, insert %.1f s), "
+                "%d failed", report['pages'], report['total_time'],
+                report['parse_time'], report['insert_time'], len(failed))
+    return report
+
+
+def update_sqlite_database(refractiveindex_db_path,
+                           sqlite_db,
+                           interpolation_points=100,
+                           compress=False,
+                           processes=None,
+                           progress=None,
+                           source_version=None):
+    '''
+    Bring a database up to date with a newer yaml snapshot, re-ingesting
+    only the pages whose source file was added, changed or removed.
+    Pages are matched by (shelf, book, page) and keep their pageid; a
+    changed page whose new file fails to parse keeps its old data. The
+    update runs in one transaction with the default rollback journal.
+
+    :param refractiveindex_db_path: Path to the new refractiveindex db
+    :sqlite_db: Path to an existing sqlite database
+    :interpolation_points=100: The number of interpolation points
+    :compress=False: Store the new arrays zlib compressed
+    :processes=None: Worker processes (None = all cores)
+    :progress=None: Callable progress(done, total)
+    :source_version=None: Version recorded in the metadata table
+    :returns: Report dict with the added/changed/removed/unchanged
+              counts, the failed pages and the times (s)
+    '''
+    t_start = time.perf_counter()
+    codec = 'zlib' if compress else 'raw'
+    # Not _bulk_connection: this file holds data that must survive a crash
+    conn = sqlite3.connect(sqlite_db, isolation_level=None)
+    migrate_database(conn)
+    known = {}
+    for pageid, shelf, book, page, digest in conn.execute(
+            'SELECT p.pageid, p.shelf, p.book, p.page, s.digest FROM pages p'
+            ' LEFT JOIN pagesources s ON p.pageid = s.pageid'):
+        known[(shelf, book, page)] = (pageid, digest)
+    next_id = max([v[0] for v in known.values()], default=-1) + 1
+
+    entries = extract_entry_list(refractiveindex_db_path)
+    digests = {}
+    todo = []
+    unchanged = 0
+    seen = set()
     for e in entries:
-        try:
-            mat = material.Material(filename=e.page.path,
-                                    interpolation_points=interpolation_points)
-            hasrefractive = 0
-            hasextinction = 0
-            if mat.has_refractive():
-                refr = mat.get_complete_refractive()
-                hasrefractive = 1
-                values = [[e.id, r[0], r[1]] for r in refr]
-                c.executemany('INSERT INTO refractiveindex VALUES (?,?,?)',
-                              values)
-            if mat.has_extinction():
-                ext = mat.get_complete_extinction()
-                hasextinction = 1
-                values = [[e.id, ex[0], ex[1]] for ex in ext]
-                c.executemany('INSERT INTO extcoeff VALUES (?,?,?)', values)
-            c.execute("INSERT INTO pages VALUES (?,?,?,?,?,?,?,?,?,?)",
-                      [e.id,
-                       e.shelf.shelf,
-                       e.book.book,
-                       e.page.page,
-                       os.sep.join(e.page.path.split(os.sep)[-3:]),
-                       hasrefractive,
-                       hasextinction,
-                       mat.rangeMin,
-                       mat.rangeMax,
-                       mat.points])
-        except Exception as error:
-            print("LOG:", pretty_entry(e), ":", error)
-    conn.commit()
-    conn.close()
-    print("***Wrote SQLite DB on ", new_sqlite_db)
+        key = (e.shelf.shelf, e.book.book, e.page.page)
+        seen.add(key)
+        digest = _file_digest(e.page.path)
+        if key in known:
+            pageid, old_digest = known[key]
+            if digest is not None and digest == old_digest:
+                unchanged += 1
+                continue
+        else:
+            pageid, next_id = next_id, next_id + 1
+        e = e._replace(id=str(pageid))
+        digests[e.id] = digest
+        todo.append((e, key in known))
+    removed = [known[key][0] for key in known if key not in seen]
+    results = _parse_pages([e for e, _ in todo], interpolation_points,
+                           processes, progress or _log_progress)
+    t_parsed = time.perf_counter()
+
+    # Only pages that parsed replace their old version
+    parsed = [existed for (_, existed), (_, page, _) in zip(todo, results)
+              if page is not None]
+    conn.execute('BEGIN')
+    try:
+        stale = removed + [int(e.id) for (e, existed), (_, page, _)
+                           in zip(todo, results)
+                           if existed and page is not None]
+        _delete_pages(conn, stale)
+        failed = _write_pages(conn, results, digests, codec)
+        _write_metadata(conn, refractiveindex_db_path, source_version,
+                        interpolation_points, codec)
+        _rebuild_fts(conn)
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    t_end = time.perf_counter()
+
+    report = {'added': sum(not existed for existed in parsed),
+              'changed': sum(parsed),
+              'removed': len(removed),
+              'unchanged': unchanged,
+              'failed': failed,
+              'parse_time': t_parsed - t_start,
+              'insert_time': t_end - t_parsed,
+              'total_time': t_end - t_start}
+    logger.info("Updated SQLite DB on %s", sqlite_db)
+    logger.info("%d added, %d changed, %d removed, %d unchanged in %.1f s, "
+                "%d failed", report['added'], report['changed'],
+                report['removed'], report['unchanged'], report['total_time'],
+                len(failed))
+    return report
+
+
+def _bulk_connection(path):
+    '''
+    Autocommit connection tuned for bulk loads: no journal or fsync
+    until the caller's single COMMIT. Only for fresh builds, where a
+    crash leaves a file that is rebuilt anyway
+    '''
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA cache_size = -65536')
+    return conn
+
+
+def _write_pages(conn, results, digests, codec):
+    '''
+    Insert parsed pages with their source digests
+
+    :returns: The list of (entry, error) of pages that failed to parse
+    '''
+    failed = []
+    pages = []
+    rtree = _has_table(conn, 'samples_rtree')
+    for e, page, error in results:
+        if page is None:
+            failed.append((pretty_entry(e), error))
+            continue
+        _insert_pagedata(conn, e.id, page['wave_n'], page['n'],
+                         page['wave_k'], page['k'], codec)
+        if rtree:
+            _index_samples(conn, e.id, _page_samples(
+                page['wave_n'], page['n'], page['wave_k'], page['k']))
+        pages.append([e.id,
+                      e.shelf.shelf,
+                      e.book.book,
+                      e.page.page,
+                      os.sep.join(e.page.path.split(os.sep)[-3:]),
+                      int(page['n'] is not None),
+                      int(page['k'] is not None),
+                      page['rangeMin'],
+                      page['rangeMax'],
+                      page['points']])
+    conn.executemany("INSERT INTO pages VALUES (?,?,?,?,?,?,?,?,?,?)", pages)
+    conn.executemany("INSERT OR REPLACE INTO pagesources VALUES (?,?)",
+                     [[p[0], digests.get(p[0])] for p in pages])
+    return failed
+
+
+def _delete_pages(conn, pageids):
+    for table in ('pages', 'pagedata', 'pagesources'):
+        conn.executemany('DELETE FROM {} WHERE pageid = ?'.format(table),
+                         [[pageid] for pageid in pageids])
+    if _has_table(conn, 'samples_rtree'):
+        _unindex_samples(conn, pageids)
+
+
+def _write_metadata(conn, refractiveindex_db_path, source_version,
+                    interpolation_points, codec):
+    if source_version is None:
+        source_version = os.path.basename(
+            os.path.normpath(refractiveindex_db_path))
+    conn.executemany('INSERT OR REPLACE INTO metadata VALUES (?,?)',
+                     [['source_version', str(source_version)],
+                      ['source_path',
+                       os.path.abspath(refractiveindex_db_path)],
+                      ['interpolation_points', str(interpolation_points)],
+                      ['codec', codec],
+                      ['updated', time.strftime('%Y-%m-%d %H:%M:%S')]])
+
+
+def _file_digest(path):
+    '''
+    SHA-1 of a page source file, None if it cannot be read
+    '''
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
 
 
 def pipeline_test():
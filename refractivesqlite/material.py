@@ -1,7 +1,35 @@
+import logging
 import yaml
 import numpy
 import scipy.interpolate
 
+logger = logging.getLogger(__name__)
+
+# libyaml's C loader when PyYAML was built with it
+_YAMLLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def parse_table(text):
+    """
+    Parse a tabulated data block into a float array in one NumPy call
+
+    :param text: The whitespace separated rows of a 'tabulated' entry
+    :returns: An array of shape (rows, columns)
+    """
+    rows = [r for r in text.split('\n') if r.strip()]
+    widths = [len(r.split()) for r in rows]
+    ncols = max(widths)
+    if min(widths) == ncols:
+        values = numpy.fromstring(text, sep=' ')
+        if values.size == len(rows) * ncols:
+            return values.reshape(-1, ncols)
+    # Ragged block: pad short rows with NaN
+    table = numpy.full((len(rows), ncols), numpy.nan)
+    for i, r in enumerate(rows):
+        values = [float(v) for v in r.split()]
+        table[i, :len(values)] = values
+    return table
+
 
 class Material:
     """ Material class"""
@@ -20,7 +48,7 @@ class Material:
 
         f = open(filename)
         try:
-            material = yaml.safe_load(f)
+            material = yaml.load(f, Loader=_YAMLLoader)
         except yaml.YAMLError:
             raise Exception('Bad Material YAML File.')
         finally:
@@ -29,17 +57,10 @@ class Material:
         previous_formula = False
         for data in material['DATA']:
             if (data['type'].split())[0] == 'tabulated':
-                rows = data['data'].split('\n')
-                splitrows = [c.split() for c in rows]
-                wavelengths = []
-                n = []
-                k = []
-                for s in splitrows:
-                    if len(s) > 0:
-                        wavelengths.append(float(s[0]))
-                        n.append(float(s[1]))
-                        if len(s) > 2:
-                            k.append(float(s[2]))
+                table = parse_table(data['data'])
+                wavelengths = table[:, 0]
+                n = table[:, 1]
+                k = table[:, 2] if table.shape[1] > 2 else []
                 self.points = len(wavelengths)
 
                 if (data['type'].split())[1] == 'n':
@@ -178,7 +199,7 @@ class Material:
                 output_f.write(",".join(list(
                     map(str, [refr[i][0], refr[i][1], ext[i][1]])))+"\n")
             output_f.close()
-            print("Wrote", output.replace(".csv", "(nk).csv"))
+            logger.info("Wrote %s", output.replace(".csv", "(nk).csv"))
         else:
             if self.has_refractive():
                 output_f = open(output.replace(".csv", "(n).csv"), 'w')
@@ -188,7 +209,7 @@ class Material:
                     output_f.write(",".join(list(
                         map(str, [refr[i][0], refr[i][1]])))+"\n")
                 output_f.close()
-                print("Wrote", output.replace(".csv", "(n).csv"))
+                logger.info("Wrote %s", output.replace(".csv", "(n).csv"))
             if self.has_extinction():
                 output_f = open(output.replace(".csv", "(k).csv"), 'w')
                 header = "wl,k\n"
@@ -197,7 +218,7 @@ class Material:
                     output_f.write(",".join(list(
                         map(str, [ext[i][0], ext[i][1]])))+"\n")
                 output_f.close()
-                print("Wrote", output.replace(".csv", "(k).csv"))
+                logger.info("Wrote %s", output.replace(".csv", "(k).csv"))
 
     @staticmethod
     def FromLists(pageinfo, wavelengths_r=None, refractive=None,
@@ -259,6 +280,90 @@ class RefractiveIndexData:
                                   'and experimentally defined materials')
 
 
+# How formula pages treat wavelengths outside their range: raise an
+# Exception, return NaN there, clamp to the range or evaluate the formula
+OUT_OF_RANGE = ('raise', 'nan', 'clip', 'extrapolate')
+
+
+def _pairs(coefficients, start):
+    # (c[start], c[start+1]), (c[start+2], c[start+3]), ... as two
+    # column vectors that broadcast against a row of wavelengths
+    c = coefficients[start:]
+    c = c[:len(c) // 2 * 2]
+    return c[0::2, numpy.newaxis], c[1::2, numpy.newaxis]
+
+
+def compile_formula(formula, coefficients):
+    """
+    Build the vectorized evaluator of a refractiveindex.info formula
+
+    :param formula: The formula type (1-9)
+    :param coefficients: The coefficients of the page
+    :returns: A function mapping a wavelength array (um) to n
+    :raises FormulaNotImplemented:
+    """
+    c = numpy.asarray(coefficients, dtype=float)
+    if formula == 1:  # Sellmeier
+        B, C = _pairs(c, 1)
+        C2 = C**2
+
+        def evaluate(w):
+            w2 = w**2
+            return numpy.sqrt(1 + c[0] + (B * w2 / (w2 - C2)).sum(axis=0))
+    elif formula == 2:  # Sellmeier-2
+        B, C = _pairs(c, 1)
+
+        def evaluate(w):
+            w2 = w**2
+            return numpy.sqrt(1 + c[0] + (B * w2 / (w2 - C)).sum(axis=0))
+    elif formula == 3:  # Polynomal
+        B, C = _pairs(c, 1)
+
+        def evaluate(w):
+            return numpy.sqrt(c[0] + (B * w**C).sum(axis=0))
+    elif formula == 4:  # RefractiveIndex.INFO
+        # Up to two C1 w^C2 / (w^2 - C3^C4) terms, then C w^D terms
+        poles = [(c[i], c[i + 1], c[i + 2]**c[i + 3])
+                 for i in (1, 5) if i + 3 < len(c)]
+        B, C = _pairs(c, 9)
+
+        def evaluate(w):
+            nsq = c[0] + (B * w**C).sum(axis=0)
+            for ci, cj, pole in poles:
+                nsq = nsq + ci * w**cj / (w**2 - pole)
+            return numpy.sqrt(nsq)
+    elif formula == 5:  # Cauchy
+        B, C = _pairs(c, 1)
+
+        def evaluate(w):
+            return c[0] + (B * w**C).sum(axis=0)
+    elif formula == 6:  # Gasses
+        B, C = _pairs(c, 1)
+
+        def evaluate(w):
+            return 1 + c[0] + (B / (C - w**-2.0)).sum(axis=0)
+    elif formula == 7:  # Herzberger
+        powers = 2.0 * numpy.arange(1, len(c) - 2)[:, numpy.newaxis]
+        D = c[3:, numpy.newaxis]
+
+        def evaluate(w):
+            L = 1 / (w**2 - 0.028)
+            return c[0] + c[1] * L + c[2] * L**2 + (D * w**powers).sum(axis=0)
+    elif formula == 8:  # Retro
+        def evaluate(w):
+            w2 = w**2
+            A = c[0] + c[1] * w2 / (w2 - c[2]) + c[3] * w2
+            return numpy.sqrt((2 * A + 1) / (1 - A))
+    elif formula == 9:  # Exotic
+        def evaluate(w):
+            d = w - c[4]
+            return numpy.sqrt(c[0] + c[1] / (w**2 - c[2]) +
+                              c[3] * d / (d**2 + c[5]))
+    else:
+        raise FormulaNotImplemented('Bad formula type {}'.format(formula))
+    return evaluate
+
+
 class FormulaRefractiveIndexData:
     """Formula RefractiveIndex class"""
 
@@ -269,12 +374,14 @@ class FormulaRefractiveIndexData:
         :param rangeMin: The lower bound for the wavelength
         :param rangeMax: The upper bound for the wavelength
         :param coefficients: Coefficient to interpolate over
+        :raises FormulaNotImplemented:
         """
         self.formula = formula
         self.rangeMin = rangeMin
         self.rangeMax = rangeMax
         self.coefficients = coefficients
         self.interpolation_points = interpolation_points
+        self._evaluate = compile_formula(formula, coefficients)
 
     def get_complete_refractive(self):
         '''
@@ -283,110 +390,51 @@ class FormulaRefractiveIndexData:
         :returns: A list of refractive indices over the whole
                   wavelength intervall (len = interpolation_points)
         '''
+        wavelength, n = self.get_complete_refractive_numpy()
+        return [[w, v] for w, v in zip(wavelength, n)]
+
+    def get_complete_refractive_numpy(self):
+        '''
+        Get the complete refractive index for the whole wavelength intervall
+
+        :returns: The wavelengths (um) and refractive indices as arrays
+                  (len = interpolation_points)
+        '''
         wavelength = numpy.linspace(
             self.rangeMin, self.rangeMax, num=self.interpolation_points)
-        extlist = [[
-            wavelength[i],
-            self.get_refractiveindex(wavelength[i] * 1000)]
-            for i in range(len(wavelength))]
-        # return numpy.array(extlist)
-        return extlist
+        return wavelength, self._evaluate(wavelength)
 
-    def get_refractiveindex(self, wavelength):
+    def get_refractiveindex(self, wavelength, out_of_range='raise'):
         """
-        Get the refractive index at a certain wavelength
+        Get the refractive index at one or more wavelengths
         using the speficied interpolation formula
 
-        :param wavelength:
-        :returns: The interpolated refractive index at wavelength
+        :param wavelength: The wavelength(s) in nm, scalar or array
+        :param out_of_range: One of OUT_OF_RANGE, for wavelengths
+                             outside (rangeMin, rangeMax)
+        :returns: The refractive index, a scalar or an array
+                  shaped like wavelength
         :raises Exception:
         """
-        wavelength /= 1000.0
-        if self.rangeMin <= wavelength <= self.rangeMax:
-            formula_type = self.formula
-            coefficients = self.coefficients
-            n = 0
-            if formula_type == 1:  # Sellmeier
-                nsq = 1 + coefficients[0]
-
-                def sellmeier(c1, c2, w):
-                    return c1 * (w ** 2) / (w ** 2 - c2 ** 2)
-
-                for i in range(1, len(coefficients), 2):
-                    nsq += sellmeier(coefficients[i],
-                                     coefficients[i + 1],
-                                     wavelength)
-                n = numpy.sqrt(nsq)
-            elif formula_type == 2:  # Sellmeier-2
-                nsq = 1 + coefficients[0]
-
-                def sellmeier2(c1, c2, w):
-                    return c1 * (w ** 2) / (w ** 2 - c2)
-                for i in range(1, len(coefficients), 2):
-                    nsq += sellmeier2(coefficients[i],
-                                      coefficients[i + 1],
-                                      wavelength)
-                n = numpy.sqrt(nsq)
-            elif formula_type == 3:  # Polynomal
-                def polynomial(c1, c2, w):
-                    return c1 * w ** c2
-                nsq = coefficients[0]
-                for i in range(1, len(coefficients), 2):
-                    nsq += polynomial(coefficients[i],
-                                      coefficients[i + 1],
-                                      wavelength)
-                n = numpy.sqrt(nsq)
-            elif formula_type == 4:  # RefractiveIndex.INFO
-                def riinfo(wl, ci, cj, ck, cl):
-                    return ci * wl**cj / (wl**2 - ck**cl)
-                n = coefficients[0]
-                n += riinfo(wavelength, *coefficients[1:5])
-                n += riinfo(wavelength, *coefficients[5:9])
-                for kk in range(len(coefficients[9:]) // 2):
-                    n += coefficients[9+kk] * wavelength**coefficients[9+kk+1]
-
-                n = numpy.sqrt(n)
-            elif formula_type == 5:  # Cauchy
-                def cauchy(c1, c2, w):
-                    return c1 * w ** c2
-                n = coefficients[0]
-                for i in range(1, len(coefficients), 2):
-                    n += cauchy(coefficients[i],
-                                coefficients[i + 1],
-                                wavelength)
-            elif formula_type == 6:  # Gasses
-                def gasses(c1, c2, w):
-                    return c1 / (c2 - w ** (-2))
-                n = 1 + coefficients[0]
-                for i in range(1, len(coefficients), 2):
-                    n += gasses(coefficients[i],
-                                coefficients[i + 1],
-                                wavelength)
-            elif formula_type == 7:  # Herzberger
-                n = coefficients[0]
-                n += coefficients[1] / (wavelength**2 - 0.028)
-                n += coefficients[2] * (1 / (wavelength**2 - 0.028))**2
-                for i, cc in enumerate(coefficients[3:]):
-                    n += cc * wavelength**(2*(i+1))
-            elif formula_type == 8:  # Retro
-                n = coefficients[0]
-                n += coefficients[1] * wavelength**2 /\
-                    (wavelength**2 - coefficients[2])
-                n += coefficients[3] * wavelength**2
-                n = numpy.sqrt(-(2 * n + 1) / (n - 1))
-            elif formula_type == 9:  # Exotic
-                n = coefficients[0]
-                n += coefficients[1] / (wavelength**2 - coefficients[2])
-                n += coefficients[3] * (wavelength - coefficients[4]) / \
-                    ((wavelength - coefficients[4])**2 + coefficients[5])
-                n = numpy.sqrt(n)
-            else:
-                raise Exception('Bad formula type')
-            return n
-        else:
-            raise Exception('Wavelength {} is out of bounds.'
-                            'Correct range(um): ({}, {})'.
-                            format(wavelength, self.rangeMin, self.rangeMax))
+        if out_of_range not in OUT_OF_RANGE:
+            raise ValueError('Unknown out_of_range {!r}. Available: {}'
+                             .format(out_of_range, OUT_OF_RANGE))
+        wavelength = numpy.asarray(wavelength, dtype=float) / 1000.0
+        outside = (wavelength < self.rangeMin) | (wavelength > self.rangeMax)
+        if outside.any():
+            if out_of_range == 'raise':
+                raise Exception('Wavelength {} is out of bounds.'
+                                'Correct range(um): ({}, {})'.
+                                format(wavelength[outside].flat[0],
+                                       self.rangeMin, self.rangeMax))
+            if out_of_range == 'clip':
+                wavelength = numpy.clip(wavelength, self.rangeMin,
+                                        self.rangeMax)
+        n = self._evaluate(numpy.atleast_1d(wavelength).ravel())
+        n = n.reshape(wavelength.shape)
+        if out_of_range == 'nan':
+            n = numpy.where(outside, numpy.nan, n)
+        return n[()]
 
 
 class TabulatedRefractiveIndexData: